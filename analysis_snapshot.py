@@ -0,0 +1,53 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+
+# Snapshot tidak pernah diubah setelah dipublikasikan; body sudah diserialisasi
+# published: waktu publikasi (epoch detik), untuk menolak snapshot yang sudah usang
+Snapshot = namedtuple('Snapshot', ['symbol', 'version', 'etag', 'body', 'published'])
+
+
+class SnapshotBoard:
+    """Menyimpan snapshot analisis terbaru per simbol
+
+    Dengan store, snapshot disimpan di tabel state sehingga semua proses worker
+    menyajikan snapshot yang sama.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def publish(self, symbol, data):
+        """Serialisasi data sekali dan jadikan snapshot terbaru untuk simbol"""
+        def build(previous):
+            version = (previous or {}).get('version', 0) + 1
+            body = json.dumps({"status": "success", "data": {**data, "version": version}}, default=float)
+            # ETag dari isi, sehingga tetap valid setelah server restart
+            etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:20]
+            return {'version': version, 'etag': etag, 'body': body, 'published': time.time()}
+
+        if self.store is not None:
+            _, snapshot = self.store.update_state(f'snapshot:{symbol}', build)
+        else:
+            with self._lock:
+                snapshot = build(self._snapshots.get(symbol))
+                self._snapshots[symbol] = snapshot
+        return Snapshot(symbol, **snapshot)
+
+    def get(self, symbol, max_age=None):
+        """Snapshot terbaru, atau None jika belum ada atau lebih tua dari max_age detik"""
+        if self.store is not None:
+            snapshot = self.store.get_state(f'snapshot:{symbol}')
+        else:
+            snapshot = self._snapshots.get(symbol)
+        if not snapshot:
+            return None
+        # Snapshot lama di store (sebelum ada field published) dianggap usang
+        snapshot = {'published': 0, **snapshot}
+        if max_age is not None and time.time() - snapshot['published'] > max_age:
+            return None
+        return Snapshot(symbol, **snapshot)
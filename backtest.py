@@ -0,0 +1,343 @@
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import talib
+
+from kline_decoder import KlineColumns, decode_klines
+
+logger = logging.getLogger("BNB_Trading_Bot")
+
+# Parameter aturan sinyal, sama dengan nilai yang dipakai di binance_bot.py dan main.py
+DEFAULT_PARAMS = {
+    'rsi_period': 14,
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'bb_period': 20,
+    'bb_dev': 2,
+    'sma_fast': 20,
+    'sma_slow': 50,
+    'stoch_k': 14,
+    'stoch_slowk': 3,
+    'stoch_slowd': 3,
+    'stoch_oversold': 20,
+    'stoch_overbought': 80,
+    # Ambang sinyal gabungan analyze_technical_indicators (confidence > 50)
+    'signal_threshold': 50,
+    # Skor minimum analyze_data di binance_bot.py (buy_score >= 2)
+    'min_score': 2
+}
+
+INTERVAL_MS = {
+    '1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000,
+    '1h': 3600000, '2h': 7200000, '4h': 14400000, '6h': 21600000, '8h': 28800000,
+    '12h': 43200000, '1d': 86400000, '3d': 259200000, '1w': 604800000
+}
+
+YEAR_MS = 365 * 86400000
+
+
+def load_history(client, symbol, interval, start_ms, end_ms=None, cache_dir=os.path.join('data', 'klines')):
+    """Unduh kline historis secara bertahap, disimpan ke cache .npz per simbol/interval"""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = os.path.join(cache_dir, f"{symbol}_{interval}.npz")
+    end_ms = end_ms or int(time.time() * 1000)
+
+    columns = None
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as saved:
+            columns = {name: saved[name] for name in saved.files}
+
+    # Lanjutkan dari candle terakhir yang sudah tersimpan
+    fetch_from = start_ms
+    if columns is not None and len(columns['timestamp']) and columns['timestamp'][0] <= start_ms:
+        fetch_from = int(columns['timestamp'][-1]) + 1
+    else:
+        columns = None
+
+    pages = []
+    while fetch_from < end_ms:
+        klines = client.get_klines(symbol=symbol, interval=interval, startTime=fetch_from, limit=1000)
+        if not klines:
+            break
+        pages.append(decode_klines(klines).columns)
+        fetch_from = int(klines[-1][0]) + 1
+        if len(klines) < 1000:
+            break
+
+    if pages:
+        parts = ([columns] if columns is not None else []) + pages
+        columns = {name: np.concatenate([p[name] for p in parts]) for name in pages[0]}
+        # Candle terakhir yang masih berjalan tidak disimpan ke cache
+        closed = columns['close_time'] < int(time.time() * 1000)
+        np.savez(cache_file, **{name: values[closed] for name, values in columns.items()})
+
+    if columns is None:
+        return decode_klines([])
+
+    mask = (columns['timestamp'] >= start_ms) & (columns['timestamp'] < end_ms)
+    return KlineColumns({name: np.ascontiguousarray(values[mask]) for name, values in columns.items()})
+
+
+def _shift(values):
+    """Geser array satu bar ke kanan (nilai bar sebelumnya), NaN di awal"""
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def compute_indicators(data, params):
+    """Hitung semua indikator sekali untuk seluruh seri"""
+    high, low, close = data.high, data.low, data.close
+
+    macd, macd_signal, _ = talib.MACD(
+        close,
+        fastperiod=params['macd_fast'],
+        slowperiod=params['macd_slow'],
+        signalperiod=params['macd_signal']
+    )
+    bb_upper, _, bb_lower = talib.BBANDS(
+        close,
+        timeperiod=params['bb_period'],
+        nbdevup=params['bb_dev'],
+        nbdevdn=params['bb_dev'],
+        matype=0
+    )
+    slowk, slowd = talib.STOCH(
+        high, low, close,
+        fastk_period=params['stoch_k'],
+        slowk_period=params['stoch_slowk'],
+        slowk_matype=0,
+        slowd_period=params['stoch_slowd'],
+        slowd_matype=0
+    )
+
+    return {
+        'rsi': talib.RSI(close, timeperiod=params['rsi_period']),
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'bb_upper': bb_upper,
+        'bb_lower': bb_lower,
+        'sma_fast': talib.SMA(close, timeperiod=params['sma_fast']),
+        'sma_slow': talib.SMA(close, timeperiod=params['sma_slow']),
+        'slowk': slowk,
+        'slowd': slowd
+    }
+
+
+def technical_signals(data, ind, params):
+    """Aturan analyze_technical_indicators (main.py) dalam bentuk ekspresi array"""
+    close = data.close
+    prev_macd, prev_macd_signal = _shift(ind['macd']), _shift(ind['macd_signal'])
+    prev_fast, prev_slow = _shift(ind['sma_fast']), _shift(ind['sma_slow'])
+
+    with np.errstate(invalid='ignore'):
+        # (kondisi BUY, kondisi SELL, confidence) per indikator
+        rules = [
+            (ind['rsi'] < params['rsi_oversold'], ind['rsi'] > params['rsi_overbought'], 70),
+            ((ind['macd'] > ind['macd_signal']) & (prev_macd <= prev_macd_signal),
+             (ind['macd'] < ind['macd_signal']) & (prev_macd >= prev_macd_signal), 60),
+            (close < ind['bb_lower'], close > ind['bb_upper'], 65),
+            ((ind['sma_fast'] > ind['sma_slow']) & (prev_fast <= prev_slow),
+             (ind['sma_fast'] < ind['sma_slow']) & (prev_fast >= prev_slow), 55),
+            ((ind['slowk'] < params['stoch_oversold']) & (ind['slowd'] < params['stoch_oversold']) & (ind['slowk'] > ind['slowd']),
+             (ind['slowk'] > params['stoch_overbought']) & (ind['slowd'] > params['stoch_overbought']) & (ind['slowk'] < ind['slowd']), 60)
+        ]
+
+    n = len(close)
+    active = np.zeros(n)
+    buy_total = np.zeros(n)
+    sell_total = np.zeros(n)
+    for buy, sell, confidence in rules:
+        active += buy | sell
+        buy_total += buy * confidence
+        sell_total += sell * confidence
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        buy_confidence = np.where(active > 0, buy_total / active, 0)
+        sell_confidence = np.where(active > 0, sell_total / active, 0)
+
+    threshold = params['signal_threshold']
+    buy_signal = (buy_confidence > sell_confidence) & (buy_confidence > threshold)
+    sell_signal = (sell_confidence > buy_confidence) & (sell_confidence > threshold)
+
+    signal = np.where(buy_signal, 1, np.where(sell_signal, -1, 0)).astype(np.int8)
+    confidence = np.where(buy_signal, buy_confidence, np.where(sell_signal, sell_confidence, 0))
+    return signal, confidence
+
+
+def basic_signals(data, ind, params):
+    """Aturan skor analyze_data (binance_bot.py) dalam bentuk ekspresi array"""
+    close = data.close
+    prev_macd, prev_macd_signal = _shift(ind['macd']), _shift(ind['macd_signal'])
+    prev_fast, prev_slow = _shift(ind['sma_fast']), _shift(ind['sma_slow'])
+
+    with np.errstate(invalid='ignore'):
+        buy_score = (
+            (ind['rsi'] < params['rsi_oversold']).astype(np.int8)
+            + ((ind['macd'] > ind['macd_signal']) & (prev_macd <= prev_macd_signal))
+            + (close < ind['bb_lower'])
+            + ((ind['sma_fast'] > ind['sma_slow']) & (prev_fast <= prev_slow))
+            + ((ind['slowk'] > ind['slowd']) & (ind['slowk'] < params['stoch_oversold']))
+        )
+        sell_score = (
+            (ind['rsi'] > params['rsi_overbought']).astype(np.int8)
+            + ((ind['macd'] < ind['macd_signal']) & (prev_macd >= prev_macd_signal))
+            + (close > ind['bb_upper'])
+            + ((ind['sma_fast'] < ind['sma_slow']) & (prev_fast >= prev_slow))
+            + ((ind['slowk'] < ind['slowd']) & (ind['slowk'] > params['stoch_overbought']))
+        )
+
+    min_score = params['min_score']
+    buy_signal = (buy_score > sell_score) & (buy_score >= min_score)
+    sell_signal = (sell_score > buy_score) & (sell_score >= min_score)
+
+    max_score = 5
+    signal = np.where(buy_signal, 1, np.where(sell_signal, -1, 0)).astype(np.int8)
+    confidence = np.where(buy_signal, buy_score, np.where(sell_signal, sell_score, 0)) / max_score * 100
+    return signal, confidence
+
+
+STRATEGIES = {
+    'technical': technical_signals,
+    'basic': basic_signals
+}
+
+
+def simulate(data, signal, fee=0.001):
+    """Simulasi long-only: masuk saat BUY, keluar saat SELL, eksekusi di harga close bar sinyal"""
+    close = data.close
+    n = len(close)
+
+    # State posisi: 1 setelah BUY, 0 setelah SELL, diteruskan (forward fill) di antaranya
+    marks = np.where(signal == 1, 1.0, np.where(signal == -1, 0.0, np.nan))
+    marks[0] = 0.0 if np.isnan(marks[0]) else marks[0]
+    index = np.where(~np.isnan(marks), np.arange(n), 0)
+    np.maximum.accumulate(index, out=index)
+    state = marks[index]
+
+    # Posisi berlaku mulai bar berikutnya
+    position = np.zeros(n)
+    position[1:] = state[:-1]
+
+    returns = np.zeros(n)
+    returns[1:] = close[1:] / close[:-1] - 1
+    turnover = np.abs(np.diff(state, prepend=0.0))
+    strategy_returns = position * returns - turnover * fee
+    equity = np.cumprod(1 + strategy_returns)
+
+    # Daftar trade dari perubahan state
+    change = np.diff(state, prepend=0.0)
+    entries = np.flatnonzero(change > 0)
+    exits = np.flatnonzero(change < 0)
+    if len(exits) < len(entries):
+        exits = np.append(exits, n - 1)
+        open_last = True
+    else:
+        open_last = False
+
+    entry_price = close[entries]
+    exit_price = close[exits]
+    trade_returns = exit_price / entry_price * (1 - fee) ** 2 - 1
+
+    trades = [
+        {
+            'entry_time': int(data.timestamp[i]),
+            'exit_time': int(data.timestamp[j]),
+            'entry_price': float(p_in),
+            'exit_price': float(p_out),
+            'bars': int(j - i),
+            'return': float(r),
+            'open': bool(open_last and k == len(entries) - 1)
+        }
+        for k, (i, j, p_in, p_out, r) in enumerate(zip(entries, exits, entry_price, exit_price, trade_returns))
+    ]
+
+    return {
+        'position': position,
+        'returns': strategy_returns,
+        'equity': equity,
+        'trade_returns': trade_returns,
+        'trades': trades
+    }
+
+
+def summarize(data, result, interval):
+    """Hitung statistik ringkasan dari hasil simulasi"""
+    equity = result['equity']
+    returns = result['returns']
+    trade_returns = result['trade_returns']
+    n = len(equity)
+
+    if n == 0:
+        return {}
+
+    bars_per_year = YEAR_MS / INTERVAL_MS.get(interval, 3600000)
+    years = n / bars_per_year
+    total_return = equity[-1] - 1
+    peak = np.maximum.accumulate(equity)
+    drawdown = equity / peak - 1
+    std = returns.std()
+
+    return {
+        'bars': int(n),
+        'start': int(data.timestamp[0]),
+        'end': int(data.timestamp[-1]),
+        'total_return': float(total_return),
+        'cagr': float(equity[-1] ** (1 / years) - 1) if years > 0 and equity[-1] > 0 else 0.0,
+        'max_drawdown': float(drawdown.min()),
+        'sharpe': float(returns.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0,
+        'trades': int(len(trade_returns)),
+        'win_rate': float((trade_returns > 0).mean() * 100) if len(trade_returns) else 0.0,
+        'average_trade': float(trade_returns.mean()) if len(trade_returns) else 0.0,
+        'exposure': float(result['position'].mean()),
+        'buy_and_hold': float(data.close[-1] / data.close[0] - 1)
+    }
+
+
+def run_backtest(data, strategy='technical', params=None, fee=0.001, interval='1h', indicators=None):
+    """Jalankan backtest penuh: indikator, sinyal, simulasi dan statistik"""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if indicators is None:
+        indicators = compute_indicators(data, params)
+
+    signal, confidence = STRATEGIES[strategy](data, indicators, params)
+    result = simulate(data, signal, fee)
+
+    return {
+        'strategy': strategy,
+        'params': params,
+        'signal': signal,
+        'confidence': confidence,
+        'trades': result['trades'],
+        'equity': result['equity'],
+        'stats': summarize(data, result, interval)
+    }
+
+
+def save_backtest(result, data, output_dir):
+    """Simpan daftar trade, equity curve dan ringkasan ke direktori output"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'trades.csv'), 'w') as f:
+        f.write('entry_time,exit_time,entry_price,exit_price,bars,return,open\n')
+        for t in result['trades']:
+            f.write(f"{t['entry_time']},{t['exit_time']},{t['entry_price']},{t['exit_price']},{t['bars']},{t['return']},{t['open']}\n")
+
+    np.savetxt(
+        os.path.join(output_dir, 'equity.csv'),
+        np.column_stack([data.timestamp, result['equity']]),
+        delimiter=',',
+        header='timestamp,equity',
+        comments='',
+        fmt=['%d', '%.8f']
+    )
+
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump({'strategy': result['strategy'], 'params': result['params'], 'stats': result['stats']}, f, indent=2)
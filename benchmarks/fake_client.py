@@ -0,0 +1,59 @@
+"""Pengganti in-process untuk binance.client.Client, dengan data dari SyntheticMarket"""
+import binance.client
+
+from synthetic_market import SyntheticMarket
+
+# Harga tetap untuk semua benchmark (2023-11-14), agar hasil antar run bisa dibandingkan
+FIXED_NOW_MS = 1700000000000
+
+
+class FakeClient:
+    """Subset API python-binance yang dipakai bot; tidak ada request jaringan"""
+
+    market = SyntheticMarket(clock=lambda: FIXED_NOW_MS)
+    symbols = ('BNBUSDT', 'BTCUSDT', 'ETHUSDT', 'BNBBTC')
+
+    def __init__(self, api_key=None, api_secret=None, **kwargs):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.trade_cursor = {}
+
+    def ping(self):
+        return {}
+
+    def get_server_time(self):
+        return {'serverTime': self.market.now()}
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        return self.market.klines(symbol, interval, limit=limit, start_ms=startTime, end_ms=endTime)
+
+    def get_symbol_ticker(self, symbol=None):
+        if symbol is None:
+            return self.get_all_tickers()
+        return {'symbol': symbol, 'price': f"{self.market.price(symbol):.8f}"}
+
+    def get_all_tickers(self):
+        return [{'symbol': s, 'price': f"{self.market.price(s):.8f}"} for s in self.symbols]
+
+    def get_ticker(self, symbol=None):
+        if symbol is not None:
+            return self.market.ticker_24h(symbol)
+        return [self.market.ticker_24h(s) for s in self.symbols]
+
+    def get_recent_trades(self, symbol, limit=500):
+        """Setiap panggilan mengembalikan trade baru setelah panggilan sebelumnya, seperti pasar yang berjalan"""
+        start = self.trade_cursor.get(symbol, self.market.trade_ids() - limit * 1000)
+        trades = self.market.trades(symbol, limit, from_id=start)
+        self.trade_cursor[symbol] = start + limit
+        return trades
+
+
+def install():
+    """Pasang FakeClient sebagai binance.client.Client
+
+    Modul bot membuat client lewat request_scheduler.create_client, yang membaca
+    binance.client.Client saat dipanggil; pasang sebelum bot dibuat agar client-nya
+    (dibungkus ScheduledClient) memakai FakeClient.
+    """
+    binance.client.Client = FakeClient
+    return FakeClient
@@ -0,0 +1,365 @@
+"""Uji beban HTTP end-to-end untuk API server.py dengan campuran route yang realistis
+
+    python benchmarks/loadtest.py --with-standin --concurrency 32 --duration 60
+    python benchmarks/loadtest.py --with-standin --rate 200 --standin-latency 80 --standin-jitter 40
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --mix price=5,health=1
+    python benchmarks/loadtest.py --with-standin --compare benchmarks/results/load-<run-sebelumnya>.json
+
+Dengan --with-standin, stand-in exchange (exchange_standin.py) dijalankan di proses ini dan
+server.py dijalankan sebagai subprocess di direktori sementara, diarahkan ke stand-in lewat
+BINANCE_BASE_URL, sehingga tidak ada request ke exchange asli.
+
+Tanpa --rate setiap worker mengirim request berikutnya segera setelah respons diterima
+(closed loop). Dengan --rate request dikirim menurut jadwal tetap (open loop) dan latensi
+dihitung dari waktu terjadwal, sehingga antrian di server ikut terukur saat server tertinggal.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from run import git_commit  # noqa: E402
+
+# nama: (bobot, method, path, body JSON)
+ROUTES = {
+    'price': (30, 'GET', '/api/price?symbol=BNBUSDT', None),
+    'historical': (12, 'GET', '/api/historical?symbol=BNBUSDT&interval=1h&limit=100', None),
+    'signals': (15, 'GET', '/api/signals?limit=20', None),
+    'bot_status': (15, 'GET', '/api/bot-status', None),
+    'prediction': (15, 'GET', '/api/bnb-trading', None),
+    'trade': (1, 'POST', '/api/bnb-trading', {'orderType': 'BUY', 'amount': 0.01}),
+    'health': (12, 'GET', '/health', None)
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(text):
+    """'price=5,health=1' -> bobot per route; route yang tidak disebut tidak dikirim"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}' ({', '.join(ROUTES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Pacer:
+    """Jadwal kirim open loop bersama semua worker: request ke-n pada start + n / rate"""
+
+    def __init__(self, rate, start):
+        self.interval = 1 / rate
+        self.start = start
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            n = self.sent
+            self.sent += 1
+        return self.start + n * self.interval
+
+
+def worker(index, url, mix, seed, warmup_end, deadline, pacer, timeout, results):
+    """Kirim request sampai deadline; hasil (route, latensi, status) setelah warmup disimpan"""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    rng = random.Random(seed + index)
+    session = requests.Session()
+    samples = results[index] = []
+
+    while True:
+        if pacer is not None:
+            intended = pacer.next()
+            if intended >= deadline:
+                break
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            intended = time.perf_counter()
+            if intended >= deadline:
+                break
+
+        name = rng.choices(names, weights)[0]
+        _, method, path, body = ROUTES[name]
+        try:
+            response = session.request(method, url + path, json=body, timeout=timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        finished = time.perf_counter()
+        if intended >= warmup_end:
+            samples.append((name, finished - intended, status, finished))
+
+
+def summarize(samples, window):
+    latencies = np.array([s[1] for s in samples]) * 1000
+    errors = sum(1 for s in samples if s[2] is None or s[2] >= 400)
+    statuses = {}
+    for s in samples:
+        key = str(s[2]) if s[2] is not None else 'connection_error'
+        statuses[key] = statuses.get(key, 0) + 1
+
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'throughput_rps': len(samples) / window if window > 0 else 0.0,
+        'status_codes': statuses
+    }
+    if len(latencies):
+        summary['latency_ms'] = {
+            **{f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))},
+            'mean': float(latencies.mean()),
+            'max': float(latencies.max())
+        }
+    return summary
+
+
+def run_load(url, mix, concurrency=16, duration=30.0, warmup=5.0, rate=None, timeout=30.0, seed=1):
+    started = time.perf_counter()
+    warmup_end = started + warmup
+    deadline = warmup_end + duration
+    pacer = Pacer(rate, started) if rate else None
+    results = [None] * concurrency
+
+    threads = [
+        threading.Thread(target=worker, name=f'load_{i}', daemon=True,
+                         args=(i, url, mix, seed, warmup_end, deadline, pacer, timeout, results))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = [s for worker_samples in results for s in worker_samples or ()]
+    window = max([s[3] for s in samples], default=deadline) - warmup_end
+    by_route = {}
+    for s in samples:
+        by_route.setdefault(s[0], []).append(s)
+
+    return {
+        'window_seconds': window,
+        'overall': summarize(samples, window),
+        'routes': {name: summarize(by_route[name], window) for name in sorted(by_route)}
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_config(workdir, symbol='BNBUSDT'):
+    """config.ini minimal untuk server.py: tanpa API key, Telegram, auto trading dan stream WebSocket"""
+    with open(os.path.join(workdir, 'config.ini'), 'w') as f:
+        f.write(
+            "[BINANCE]\napi_key =\napi_secret =\n\n"
+            "[TELEGRAM]\nbot_token =\nchat_id =\n\n"
+            f"[TRADING]\nsymbol = {symbol}\nquantity = 0.1\nenable_auto_trading = False\n"
+            "signal_threshold = 65\nanalysis_interval = 60\n\n"
+            "[MARKET_DATA]\nenabled = False\n"
+        )
+
+
+def start_server(workdir, base_url, workers=1, threads=32, ready_timeout=60):
+    """Jalankan server.py di workdir dan tunggu sampai /health menjawab"""
+    write_config(workdir)
+    port = free_port()
+    log = open(os.path.join(workdir, 'server-output.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'server.py'), '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--threads', str(threads)],
+        cwd=workdir, env={**os.environ, 'BINANCE_BASE_URL': base_url}, stdout=log, stderr=subprocess.STDOUT
+    )
+    url = f"http://127.0.0.1:{port}"
+    give_up = time.time() + ready_timeout
+    while time.time() < give_up:
+        if process.poll() is not None:
+            raise RuntimeError(f"server.py exited with code {process.returncode}:\n{output_tail(log.name)}")
+        try:
+            if requests.get(url + '/health', timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"server.py did not become ready within {ready_timeout}s:\n{output_tail(log.name)}")
+
+
+def output_tail(path, lines=20):
+    # Direktori kerja dihapus setelah run, jadi output server dikutip di pesan error
+    with open(path, errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def server_stats(url):
+    """Statistik cache dan anggaran request dari server (per worker jika memakai gunicorn)"""
+    stats = {}
+    for name, path in (('cache', '/api/cache-stats'), ('binance_requests', '/api/request-stats')):
+        try:
+            response = requests.get(url + path, timeout=5)
+            if response.ok:
+                stats[name] = response.json()
+        except (requests.RequestException, ValueError):
+            pass
+    return stats
+
+
+def compare(old, new, threshold=1.2):
+    """Bandingkan p95 dan throughput per route; rasio p95 di atas threshold atau
+    throughput di bawah 1/threshold ditandai sebagai regresi
+
+    Throughput hanya dibandingkan jika kedua run closed loop (dengan --rate throughput ditentukan jadwal).
+    """
+    closed_loop = not old.get('meta', {}).get('rate') and not new['meta'].get('rate')
+    print(f"\n{'route':12s} {'old p95':>10s} {'new p95':>10s} {'ratio':>7s} {'old rps':>9s} {'new rps':>9s}")
+    regressions = 0
+    rows = [('overall', old.get('overall'), new['overall'])]
+    rows += [(name, old.get('routes', {}).get(name), stats) for name, stats in new['routes'].items()]
+    for name, before, after in rows:
+        if not before or 'latency_ms' not in before or 'latency_ms' not in after:
+            continue
+        ratio = after['latency_ms']['p95'] / before['latency_ms']['p95'] if before['latency_ms']['p95'] else float('inf')
+        slower = ratio > threshold or (closed_loop and after['throughput_rps'] < before['throughput_rps'] / threshold)
+        regressions += slower
+        print(f"{name:12s} {before['latency_ms']['p95']:10.2f} {after['latency_ms']['p95']:10.2f} {ratio:7.2f} "
+              f"{before['throughput_rps']:9.1f} {after['throughput_rps']:9.1f}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP load test for the server.py API')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Running server to test (ignored with --with-standin)')
+    parser.add_argument('--with-standin', action='store_true', help='Start the exchange stand-in and server.py pointed at it')
+    parser.add_argument('--mix', help=f"Route weights, e.g. price=5,health=1 (routes: {', '.join(ROUTES)})")
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client connections')
+    parser.add_argument('--rate', type=float, help='Total requests per second (open loop); default sends as fast as possible')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Seconds before measuring starts')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per request timeout (s)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the route choice')
+    parser.add_argument('--server-workers', type=int, default=1, help='server.py worker processes (with --with-standin)')
+    parser.add_argument('--server-threads', type=int, default=32, help='server.py threads per worker (with --with-standin)')
+    parser.add_argument('--standin-mode', choices=('synthetic', 'replay'), default='synthetic')
+    parser.add_argument('--cassette', help='Stand-in recording for --standin-mode replay')
+    parser.add_argument('--standin-latency', type=float, default=0, help='Stand-in latency per request (ms)')
+    parser.add_argument('--standin-jitter', type=float, default=0, help='Stand-in latency jitter (ms)')
+    parser.add_argument('--standin-error-rate', type=float, default=0, help='Fraction of stand-in responses with HTTP 500')
+    parser.add_argument('--standin-throttle-rate', type=float, default=0, help='Fraction of stand-in responses with HTTP 429')
+    parser.add_argument('--output', help='JSON result path (default benchmarks/results/load-<time>-<commit>.json)')
+    parser.add_argument('--compare', help='Previous JSON result to compare against')
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else {name: route[0] for name, route in ROUTES.items()}
+    except ValueError as e:
+        parser.error(str(e))
+
+    commit = git_commit()
+    output = os.path.abspath(args.output or os.path.join(
+        HERE, 'results', f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+    ))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    standin_options = None
+    standin = process = workdir = None
+    url = args.url.rstrip('/')
+    try:
+        if args.with_standin:
+            from exchange_standin import create_standin
+            standin_options = {
+                'mode': args.standin_mode,
+                'cassette': args.cassette,
+                'latency_ms': args.standin_latency,
+                'jitter_ms': args.standin_jitter,
+                'error_rate': args.standin_error_rate,
+                'throttle_rate': args.standin_throttle_rate
+            }
+            standin = create_standin(**standin_options).start()
+            workdir = tempfile.mkdtemp(prefix='bnb-load-')
+            process, url = start_server(workdir, standin.url, args.server_workers, args.server_threads)
+            print(f"Stand-in at {standin.url}, server.py at {url}", flush=True)
+
+        print(f"Load test {url}: concurrency {args.concurrency}, rate {args.rate or 'max'}, "
+              f"{args.warmup:g}s warmup + {args.duration:g}s", flush=True)
+        results = run_load(url, mix, args.concurrency, args.duration, args.warmup, args.rate, args.timeout, args.seed)
+        results['server'] = server_stats(url)
+        if standin is not None:
+            results['standin_requests'] = standin.requests
+    finally:
+        if process is not None:
+            stop_server(process)
+        if standin is not None:
+            standin.shutdown()
+            standin.server_close()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': commit,
+            'target': 'standin' if args.with_standin else url,
+            'mix': mix,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'server_workers': args.server_workers if args.with_standin else None,
+            'server_threads': args.server_threads if args.with_standin else None,
+            'standin': standin_options,
+            'cpu_count': os.cpu_count()
+        },
+        **results
+    }
+
+    for name, stats in [('overall', results['overall'])] + list(results['routes'].items()):
+        latency = stats.get('latency_ms', {})
+        print(f"{name:12s} {stats['requests']:>8d} req  {stats['throughput_rps']:8.1f} rps  "
+              f"p50 {latency.get('p50', 0):8.2f}  p95 {latency.get('p95', 0):8.2f}  p99 {latency.get('p99', 0):8.2f} ms  "
+              f"errors {stats['error_rate'] * 100:5.1f}%")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nResults saved to {output}")
+
+    if baseline is not None:
+        regressions = compare(baseline, report)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
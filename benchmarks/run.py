@@ -0,0 +1,384 @@
+"""Benchmark jalur panas bot dengan pasar sintetis dan FakeClient (tanpa jaringan)
+
+    python benchmarks/run.py                                 # semua benchmark, ukuran default
+    python benchmarks/run.py --only analyze_data --max-size 100000
+    python benchmarks/run.py --compare benchmarks/results/<run-sebelumnya>.json
+
+Hasil disimpan sebagai JSON (kunci terurut) sehingga regresi terlihat sebagai diff antar run.
+Semua file yang ditulis bot (config.ini, logs/, data/) dibuat di direktori sementara.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import fake_client  # noqa: E402
+from request_scheduler import RequestScheduler  # noqa: E402
+from log_writer import LogWriter, load_log  # noqa: E402
+from trade_history import SignalHistory  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(sizes):
+    """Daftarkan benchmark; fungsi menerima (ctx, size) dan mengembalikan run atau (prepare, run)"""
+    def register(func):
+        BENCHMARKS[func.__name__] = (func, sizes)
+        return func
+    return register
+
+
+class Context:
+    """Modul bot diimpor sekali, setelah FakeClient terpasang dan cwd pindah ke direktori sementara"""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.market = fake_client.FakeClient.market
+        self._main = None
+        self._server = None
+        self._trading_bot = None
+
+    @property
+    def main(self):
+        if self._main is None:
+            import main
+            self._main = main
+        return self._main
+
+    @property
+    def server(self):
+        if self._server is None:
+            # server.py membutuhkan config.ini, yang dibuat main.py dengan nilai default
+            self.main
+            import server
+            self._server = server
+        return self._server
+
+    @property
+    def trading_bot(self):
+        if self._trading_bot is None:
+            self._trading_bot = self.main.BNBTradingBot()
+            # FakeClient tidak punya batas bobot; jangan biarkan scheduler menahan benchmark
+            self._trading_bot.client.scheduler = RequestScheduler(weight_limit=10 ** 12)
+        return self._trading_bot
+
+    def fresh_dir(self, name):
+        path = os.path.join(self.workdir, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+
+def sample_signal(i):
+    return {
+        'timestamp': datetime.fromtimestamp(1700000000 + i * 60).isoformat(),
+        'symbol': 'BNBUSDT',
+        'type': ('BUY', 'SELL', 'NEUTRAL')[i % 3],
+        'price': 300.0 + i % 100,
+        'confidence': float(i % 100),
+        'indicators': {'rsi': 50.0, 'macd': 0.1, 'macd_signal': 0.05, 'upper_band': 310.0, 'lower_band': 290.0}
+    }
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000, 1000000))
+def analyze_data(ctx, size):
+    from binance_bot import BinanceBot
+    bot = BinanceBot('', '')
+    data = ctx.market.kline_columns('BNBUSDT', '1h', size)
+    return lambda: bot.analyze_data(data)
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000, 1000000))
+def indicator_engine(ctx, size):
+    # Seed dari riwayat: jalur yang dipakai saat engine baru dibuat atau ada celah data
+    from streaming_indicators import IndicatorEngine
+    data = ctx.market.kline_columns('BNBUSDT', '1h', size)
+    columns = (data.timestamp, data.high, data.low, data.close, data.volume)
+    return IndicatorEngine, lambda engine: engine.seed(*columns)
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000))
+def indicator_engine_update(ctx, size):
+    # Per candle: update candle baru (snapshot) lalu ganti candle yang masih berjalan (restore + update)
+    from streaming_indicators import IndicatorEngine
+    warmup = 300
+    data = ctx.market.kline_columns('BNBUSDT', '1h', warmup + size)
+    rows = list(zip(data.timestamp.tolist(), data.high.tolist(), data.low.tolist(),
+                    data.close.tolist(), data.volume.tolist()))
+
+    def prepare():
+        engine = IndicatorEngine()
+        for row in rows[:warmup]:
+            engine.update(*row)
+        return engine
+
+    def run(engine):
+        for open_time, high, low, close, volume in rows[warmup:]:
+            engine.update(open_time, high, low, close, volume)
+            engine.update(open_time, high, low, close * 1.001, volume)
+
+    return prepare, run
+
+
+@benchmark(sizes=(100,))
+def analyze_technical_indicators(ctx, size):
+    # Ukuran tetap: fungsi selalu meminta 100 candle 1h (lewat KlineCache dan IndicatorEngine)
+    bot = ctx.trading_bot
+    return bot.analyze_technical_indicators
+
+
+@benchmark(sizes=(1000, 10000, 100000, 1000000))
+def detect_whale_movement(ctx, size):
+    bot = ctx.trading_bot
+    main = ctx.main
+    client = fake_client.FakeClient()
+    # Trade dibuat di luar pengukuran; setiap panggilan menerima 1000 trade baru
+    batches = [client.get_recent_trades('BNBUSDT', limit=1000) for _ in range(max(1, size // 1000))]
+
+    def prepare():
+        bot.whale_flow = main.WhaleFlow(windows=bot.whale_flow.windows, thresholds=bot.whale_flow.thresholds,
+                                        default_threshold=bot.whale_flow.default_threshold)
+        pending = list(batches)
+        bot.client.get_recent_trades = lambda **kwargs: pending.pop(0)
+        return len(batches)
+
+    def run(calls):
+        for _ in range(calls):
+            bot.detect_whale_movement()
+
+    return prepare, run
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000))
+def log_signal(ctx, size):
+    bot = ctx.trading_bot
+    signals = [sample_signal(i) for i in range(size)]
+
+    def prepare():
+        # Hanya antrian yang diukur; penulisan file terjadi di thread LogWriter
+        bot.signal_log.close()
+        shutil.rmtree('logs', ignore_errors=True)
+        bot.signal_log = LogWriter('logs', 'bnb_signals_log', ctx.main.SIGNAL_LOG_COLUMNS, max_queue=size + 1)
+        bot.signal_history.close()
+        bot.signal_history = SignalHistory(ctx.fresh_dir('history'), size)
+        return signals
+
+    def run(signals):
+        for s in signals:
+            bot.log_signal(s['symbol'], s['type'], s['price'], s['confidence'], s['indicators'])
+
+    return prepare, run
+
+
+@benchmark(sizes=(1000, 10000, 100000, 1000000))
+def signal_history_append(ctx, size):
+    # Buffer 10000 entri: ukuran besar mengukur penimpaan entri lama dan penghapusan segmen detail
+    signals = [sample_signal(i) for i in range(min(size, 10000))]
+
+    def prepare():
+        return SignalHistory(ctx.fresh_dir('history'), 10000, segment_bytes=1024 * 1024)
+
+    def run(history):
+        for i in range(size):
+            s = signals[i % len(signals)]
+            history.append(s['symbol'], s['type'], s['price'], s['confidence'], s['indicators'])
+        history.close()
+
+    return prepare, run
+
+
+@benchmark(sizes=(10000, 100000, 1000000))
+def load_signal_log(ctx, size):
+    # Riwayat sinyal per menit (100000 ~ 70 hari) dalam segmen npz, dibaca dengan satu panggilan
+    directory = ctx.fresh_dir(f'signal-log-{size}')
+    writer = LogWriter(directory, 'bnb_signals_log', ('timestamp',), fmt='npz', flush_rows=20000, max_rows=20000)
+    for i in range(size):
+        s = sample_signal(i)
+        writer.write({**s, 'indicators': {**s['indicators'], 'technical': {'rsi': 50.0 + i % 20, 'signal': s['type']}}})
+    writer.close(timeout=None)
+
+    def run():
+        data = load_log(directory, 'bnb_signals_log')
+        assert len(data['timestamp']) == size
+    return run
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000))
+def store_append_signal(ctx, size):
+    # Pengganti save_data_to_file: setiap sinyal langsung ditulis ke SQLite
+    from signal_store import SignalStore
+    signals = [sample_signal(i) for i in range(size)]
+
+    def prepare():
+        return SignalStore(os.path.join(ctx.fresh_dir('store'), 'bot.db'))
+
+    def run(store):
+        for s in signals:
+            store.append_signal(s)
+        store.close()
+
+    return prepare, run
+
+
+@benchmark(sizes=(100, 1000, 10000, 100000, 1000000))
+def api_signals(ctx, size):
+    from signal_store import SignalStore
+    server = ctx.server
+    store = SignalStore(os.path.join(ctx.fresh_dir(f'signals-{size}'), 'bot.db'))
+    for start in range(0, size, 100000):
+        store.import_signals([sample_signal(i) for i in range(start, min(size, start + 100000))])
+    server.store = store
+    client = server.app.test_client()
+
+    def run():
+        response = client.get('/api/signals?limit=10&type=BUY')
+        assert response.status_code == 200
+    return run
+
+
+def measure(setup, repeat, max_time, warmup=1):
+    """Jalankan benchmark beberapa kali (minimal sekali) dalam batas waktu total
+
+    Run pemanasan (import lazy, cache, page cache) tidak dihitung.
+    """
+    prepare, run = setup if isinstance(setup, tuple) else (None, setup)
+    times = []
+    started = time.perf_counter()
+    for i in range(warmup + repeat):
+        if i > warmup and time.perf_counter() - started >= max_time:
+            break
+        args = (prepare(),) if prepare is not None else ()
+        t0 = time.perf_counter()
+        run(*args)
+        if i >= warmup:
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names, sizes=None, max_size=None, repeat=5, max_time=10.0, warmup=1):
+    workdir = tempfile.mkdtemp(prefix='bnb-bench-')
+    previous = os.getcwd()
+    fake_client.install()
+    # Log bot tidak relevan untuk benchmark, kecuali error
+    logging.disable(logging.WARNING)
+
+    results = {}
+    try:
+        os.chdir(workdir)
+        ctx = Context(workdir)
+        for name in names:
+            func, default_sizes = BENCHMARKS[name]
+            results[name] = {}
+            for size in sizes or default_sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                times = measure(func(ctx, size), repeat, max_time, warmup)
+                median = statistics.median(times)
+                results[name][str(size)] = {
+                    'runs': len(times),
+                    'min': min(times),
+                    'median': median,
+                    'mean': statistics.fmean(times),
+                    'per_item_us': median / size * 1e6
+                }
+                print(f"{name:30s} {size:>9d}  median {median * 1000:10.3f} ms  ({len(times)} runs)", flush=True)
+    finally:
+        os.chdir(previous)
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(old, new, threshold=1.2):
+    """Cetak rasio waktu tercepat run baru terhadap run lama; rasio di atas threshold ditandai
+
+    Waktu minimum dipakai karena paling sedikit terpengaruh gangguan dari proses lain.
+    """
+    print(f"\n{'benchmark':30s} {'size':>9s} {'old ms':>11s} {'new ms':>11s} {'ratio':>7s}")
+    regressions = 0
+    for name, sizes in new['results'].items():
+        for size, stats in sizes.items():
+            before = old.get('results', {}).get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = stats['min'] / before['min'] if before['min'] else float('inf')
+            flag = '  REGRESSION' if ratio > threshold else ''
+            regressions += ratio > threshold
+            print(f"{name:30s} {size:>9s} {before['min'] * 1000:11.3f} {stats['min'] * 1000:11.3f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BNB trading bot hot paths')
+    parser.add_argument('--only', help=f"Comma separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--sizes', help='Comma separated sizes, overriding the defaults of every benchmark')
+    parser.add_argument('--max-size', type=int, help='Skip sizes above this value')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark and size')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs before measuring')
+    parser.add_argument('--max-time', type=float, default=10.0, help='Stop repeating after this many seconds')
+    parser.add_argument('--output', help='JSON result path (default benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='Previous JSON result to compare against')
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(',')] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(',')] if args.sizes else None
+
+    commit = git_commit()
+    output = os.path.abspath(args.output or os.path.join(
+        HERE, 'results', f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+    ))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    import numpy
+    import pandas
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': commit,
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'pandas': pandas.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': run_benchmarks(names, sizes, args.max_size, args.repeat, args.max_time, args.warmup)
+    }
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nResults saved to {output}")
+
+    if baseline is not None:
+        regressions = compare(baseline, report)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
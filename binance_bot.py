@@ -1,39 +1,55 @@
 import logging
-import numpy as np
-import pandas as pd
-from binance.client import Client
 from binance.exceptions import BinanceAPIException
 import talib
 import time
 from datetime import datetime
+from kline_cache import KlineCache
+from kline_decoder import KlineColumns, columns_from_records, decode_klines
+from metrics import FUNCTION_SECONDS, timed
+from request_scheduler import ORDER, create_client, request_priority
 
 logger = logging.getLogger(__name__)
 
 class BinanceBot:
-    def __init__(self, api_key, api_secret, symbol='BNBUSDT', quantity=0.1):
+    def __init__(self, api_key, api_secret, symbol='BNBUSDT', quantity=0.1, base_url=None):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.base_url = base_url
         self.symbol = symbol
         self.quantity = quantity
         self.client = None
+        self.kline_cache = None
+        self.market_data = None
         
         self.connect()
     
     def connect(self):
         """Menghubungkan ke API Binance"""
         try:
-            self.client = Client(self.api_key, self.api_secret)
+            self.client = create_client(self.api_key, self.api_secret, self.base_url)
+            self.kline_cache = KlineCache(self.client)
             logger.info(f"Connected to Binance API")
             return True
         except Exception as e:
             logger.error(f"Error connecting to Binance API: {e}")
             return False
     
+    def attach_market_data(self, market_data):
+        """Gunakan LiveMarketView dari stream WebSocket sebagai sumber data utama"""
+        self.market_data = market_data
+        market_data.attach_kline_cache(self.kline_cache)
+    
     def get_current_price(self, symbol=None):
         """Mendapatkan harga terkini"""
         if symbol is None:
             symbol = self.symbol
         
+        # Harga dari stream jika tersedia, tanpa request REST
+        if self.market_data is not None:
+            price = self.market_data.get_price(symbol)
+            if price is not None:
+                return price
+        
         try:
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
@@ -46,29 +62,16 @@ class BinanceBot:
     
     def get_historical_data(self, symbol=None, interval='1d', limit=100):
         """Mendapatkan data historis"""
+        return self.get_historical_columns(symbol, interval, limit).to_records()
+    
+    def get_historical_columns(self, symbol=None, interval='1d', limit=100):
+        """Mendapatkan data historis dalam bentuk kolom NumPy"""
         if symbol is None:
             symbol = self.symbol
         
         try:
-            klines = self.client.get_klines(
-                symbol=symbol,
-                interval=interval,
-                limit=limit
-            )
-            
-            # Konversi ke format yang lebih mudah digunakan
-            data = []
-            for k in klines:
-                data.append({
-                    'timestamp': k[0],
-                    'open': float(k[1]),
-                    'high': float(k[2]),
-                    'low': float(k[3]),
-                    'close': float(k[4]),
-                    'volume': float(k[5])
-                })
-            
-            return data
+            klines = self.kline_cache.get_klines(symbol, interval, limit)
+            return decode_klines(klines)
         
         except BinanceAPIException as e:
             logger.error(f"Binance API error: {e}")
@@ -77,6 +80,7 @@ class BinanceBot:
             logger.error(f"Error getting historical data: {e}")
             raise e
     
+    @timed(FUNCTION_SECONDS, 'analyze_data')
     def analyze_data(self, data):
         """Menganalisis data dan menghasilkan sinyal trading"""
         if not data or len(data) < 50:
@@ -84,59 +88,74 @@ class BinanceBot:
             return None
         
         try:
-            # Konversi data ke DataFrame
-            df = pd.DataFrame(data)
+            # Gunakan kolom NumPy langsung tanpa DataFrame
+            if not isinstance(data, KlineColumns):
+                data = columns_from_records(data)
+            
+            high = data.high
+            low = data.low
+            close = data.close
+            volume = data.volume
             
             # Hitung indikator teknis
             
             # RSI (Relative Strength Index)
-            df['rsi'] = talib.RSI(np.array(df['close']), timeperiod=14)
+            rsi = talib.RSI(close, timeperiod=14)
             
             # MACD (Moving Average Convergence Divergence)
             macd, macdsignal, macdhist = talib.MACD(
-                np.array(df['close']),
+                close,
                 fastperiod=12,
                 slowperiod=26,
                 signalperiod=9
             )
-            df['macd'] = macd
-            df['macdsignal'] = macdsignal
-            df['macdhist'] = macdhist
             
             # Bollinger Bands
             upperband, middleband, lowerband = talib.BBANDS(
-                np.array(df['close']),
+                close,
                 timeperiod=20,
                 nbdevup=2,
                 nbdevdn=2,
                 matype=0
             )
-            df['upperband'] = upperband
-            df['middleband'] = middleband
-            df['lowerband'] = lowerband
             
             # Moving Averages
-            df['sma20'] = talib.SMA(np.array(df['close']), timeperiod=20)
-            df['sma50'] = talib.SMA(np.array(df['close']), timeperiod=50)
-            df['sma200'] = talib.SMA(np.array(df['close']), timeperiod=200)
+            sma20 = talib.SMA(close, timeperiod=20)
+            sma50 = talib.SMA(close, timeperiod=50)
+            sma200 = talib.SMA(close, timeperiod=200)
             
             # Stochastic Oscillator
             slowk, slowd = talib.STOCH(
-                np.array(df['high']),
-                np.array(df['low']),
-                np.array(df['close']),
+                high,
+                low,
+                close,
                 fastk_period=14,
                 slowk_period=3,
                 slowk_matype=0,
                 slowd_period=3,
                 slowd_matype=0
             )
-            df['slowk'] = slowk
-            df['slowd'] = slowd
+            
+            indicators = {
+                'close': close,
+                'volume': volume,
+                'rsi': rsi,
+                'macd': macd,
+                'macdsignal': macdsignal,
+                'macdhist': macdhist,
+                'upperband': upperband,
+                'middleband': middleband,
+                'lowerband': lowerband,
+                'sma20': sma20,
+                'sma50': sma50,
+                'sma200': sma200,
+                'slowk': slowk,
+                'slowd': slowd
+            }
             
             # Ambil data terbaru
-            latest = df.iloc[-1]
-            prev = df.iloc[-2]
+            latest = {name: values[-1] for name, values in indicators.items()}
+            prev = {name: values[-2] for name, values in indicators.items()}
             
             # Logika sinyal trading
             signal_type = "NEUTRAL"
@@ -201,15 +220,10 @@ class BinanceBot:
             # Tentukan status indikator
             macd_status = "bullish" if latest['macd'] > latest['macdsignal'] else "bearish"
             ma_status = "uptrend" if latest['sma20'] > latest['sma50'] else "downtrend"
-            volume_status = "increasing" if latest['volume'] > df['volume'].mean() else "decreasing"
+            volume_status = "increasing" if latest['volume'] > volume.mean() else "decreasing"
             
             # Hitung target harga dan stop loss
-            atr = talib.ATR(
-                np.array(df['high']),
-                np.array(df['low']),
-                np.array(df['close']),
-                timeperiod=14
-            )
+            atr = talib.ATR(high, low, close, timeperiod=14)
             latest_atr = atr[-1]
             
             if signal_type == "BUY":
@@ -257,8 +271,9 @@ class BinanceBot:
             #     quantity=quantity
             # )
             
-            # Untuk demo, kita simulasikan order
-            current_price = self.get_current_price()
+            # Untuk demo, kita simulasikan order; harga untuk order didahulukan dari request lain
+            with request_priority(ORDER):
+                current_price = self.get_current_price()
             order = {
                 "symbol": self.symbol,
                 "side": "BUY",
@@ -291,8 +306,9 @@ class BinanceBot:
             #     quantity=quantity
             # )
             
-            # Untuk demo, kita simulasikan order
-            current_price = self.get_current_price()
+            # Untuk demo, kita simulasikan order; harga untuk order didahulukan dari request lain
+            with request_priority(ORDER):
+                current_price = self.get_current_price()
             order = {
                 "symbol": self.symbol,
                 "side": "SELL",
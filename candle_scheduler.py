@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+import zlib
+
+from metrics import Counter, Histogram, get_or_create
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_LAG = get_or_create(
+    Histogram, 'candle_schedule_lag_seconds', 'Delay between a candle closing and the scheduled run starting',
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 300, 900, 3600)
+)
+SCHEDULE_MISSED = get_or_create(Counter, 'candle_schedule_missed_total', 'Candle closes without their own run')
+
+
+class ServerClock:
+    """Jam exchange: waktu lokal ditambah offset dari GET /api/v3/time, disinkronkan ulang berkala"""
+
+    def __init__(self, client=None, resync_interval=3600):
+        self.client = client
+        self.resync_interval = resync_interval
+        self.offset_ms = 0.0
+        self._synced_at = None
+
+    def sync(self):
+        """Ukur offset; titik tengah round-trip dianggap waktu server membuat respons"""
+        if self.client is None:
+            return self.offset_ms
+        try:
+            before = time.time() * 1000
+            server_time = self.client.get_server_time()['serverTime']
+            after = time.time() * 1000
+            self.offset_ms = server_time - (before + after) / 2
+            logger.debug(f"Server clock offset {self.offset_ms:.0f} ms (round-trip {after - before:.0f} ms)")
+        except Exception as e:
+            logger.warning(f"Could not sync with Binance server time, keeping offset {self.offset_ms:.0f} ms: {e}")
+        self._synced_at = time.monotonic()
+        return self.offset_ms
+
+    def now_ms(self):
+        if self._synced_at is None or time.monotonic() - self._synced_at > self.resync_interval:
+            self.sync()
+        return time.time() * 1000 + self.offset_ms
+
+
+class CandleScheduler:
+    """Jalankan siklus tepat setelah candle interval menit ditutup (menurut jam server)
+
+    Setiap run terjadi pada penutupan candle + delay (agar candle sudah final di exchange)
+    + jitter tetap per key (mis. simbol), sehingga beberapa bot tidak meminta data bersamaan.
+    Jika run terlambat (siklus terlalu lama, proses tertidur), penutupan yang terlewat digabung
+    menjadi satu run segera jika catch_up aktif, atau dilewati sampai penutupan berikutnya.
+    wait_next() menunggu di stop_event, sehingga stop() membangunkannya seketika.
+    """
+
+    def __init__(self, interval_minutes, clock=None, delay=2.0, jitter=0.0, key='', catch_up=True, stop_event=None):
+        self.interval_ms = int(interval_minutes * 60000)
+        self.clock = clock or ServerClock()
+        self.delay_ms = delay * 1000
+        # Offset jitter deterministik per key dalam [0, jitter) detik
+        self.jitter_ms = (zlib.crc32(key.encode()) / 2 ** 32) * jitter * 1000 if jitter else 0.0
+        self.catch_up = catch_up
+        self.stop_event = stop_event or threading.Event()
+        self.last_close = None
+        self.runs = 0
+        self.missed = 0
+
+    def set_interval(self, interval_minutes):
+        """Ganti interval; penjadwalan diselaraskan ulang ke candle interval baru"""
+        interval_ms = int(interval_minutes * 60000)
+        if interval_ms != self.interval_ms:
+            self.interval_ms = interval_ms
+            self.last_close = None
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _fire_at(self, close_ms):
+        return close_ms + self.delay_ms + self.jitter_ms
+
+    def next_close(self, now_ms):
+        """Waktu penutupan candle (ms) untuk run berikutnya"""
+        step = self.interval_ms
+        if self.last_close is None:
+            close = (int(now_ms) // step + 1) * step
+            # Penutupan yang baru saja lewat tapi belum dijalankan (masih dalam delay)
+            if self._fire_at(close - step) > now_ms:
+                close -= step
+            return close
+
+        close = self.last_close + step
+        fire_at = self._fire_at(close)
+        if fire_at > now_ms:
+            return close
+
+        # Run sudah terlambat; hitung penutupan yang terlewat sejak run terakhir
+        latest = close + (int(now_ms - fire_at) // step) * step
+        skipped = (latest - close) // step
+        if self.catch_up:
+            missed, close = skipped, latest
+        else:
+            missed, close = skipped + 1, latest + step
+        if missed:
+            self.missed += missed
+            SCHEDULE_MISSED.inc(missed)
+            logger.warning(f"{missed} candle close(s) missed, "
+                           f"{'running now' if self.catch_up else 'waiting for the next close'}")
+        return close
+
+    def wait_next(self):
+        """Tunggu sampai run berikutnya; mengembalikan waktu penutupan candle (ms) atau None jika dihentikan"""
+        close = self.next_close(self.clock.now_ms())
+        while True:
+            remaining = (self._fire_at(close) - self.clock.now_ms()) / 1000
+            if remaining <= 0:
+                break
+            # Tunggu per potongan agar perubahan jam dan sinkronisasi ulang ikut diperhitungkan
+            if self.stop_event.wait(min(remaining, 60)):
+                return None
+        if self.stop_event.is_set():
+            return None
+
+        self.last_close = close
+        self.runs += 1
+        SCHEDULE_LAG.observe(max(0.0, (self.clock.now_ms() - close) / 1000))
+        return close
+
+    def __iter__(self):
+        while True:
+            close = self.wait_next()
+            if close is None:
+                return
+            yield close
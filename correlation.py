@@ -0,0 +1,212 @@
+import threading
+
+import numpy as np
+
+
+class CorrelationEngine:
+    """Korelasi Pearson dan beta bergulir antar simbol dari log return yang diselaraskan per bar
+
+    Setiap bar (open time / step) menjadi satu baris return untuk semua simbol. Jumlah
+    berjalan per pasangan (n, Σx, Σx², Σxy) diperbarui saat baris masuk atau keluar dari
+    window, sehingga setiap bar baru hanya butuh O(N²) tanpa menghitung ulang riwayat.
+    """
+
+    def __init__(self, step_ms, windows=(30,), capacity=16):
+        self.step = step_ms
+        self.windows = tuple(sorted(windows))
+        self.size = max(self.windows)
+        self.symbols = []
+        self.index = {}
+        self.head = None
+        self.last_bar = {}
+        self._lock = threading.Lock()
+        self._updates = 0
+
+        # Ring buffer close dan return per bar, NaN jika simbol tidak punya data di bar itu
+        self.closes = np.full((self.size + 1, capacity), np.nan)
+        self.returns = np.full((self.size, capacity), np.nan)
+        self.sums = {w: self._empty_sums(capacity) for w in self.windows}
+
+    @staticmethod
+    def _empty_sums(capacity):
+        return {
+            'n': np.zeros((capacity, capacity)),
+            'x': np.zeros((capacity, capacity)),
+            'xx': np.zeros((capacity, capacity)),
+            'xy': np.zeros((capacity, capacity))
+        }
+
+    def _symbol_index(self, symbol):
+        i = self.index.get(symbol)
+        if i is not None:
+            return i
+
+        i = len(self.symbols)
+        capacity = self.returns.shape[1]
+        if i >= capacity:
+            # Perbesar semua array dua kali lipat
+            grow = capacity
+            self.closes = np.pad(self.closes, ((0, 0), (0, grow)), constant_values=np.nan)
+            self.returns = np.pad(self.returns, ((0, 0), (0, grow)), constant_values=np.nan)
+            for sums in self.sums.values():
+                for key in sums:
+                    sums[key] = np.pad(sums[key], ((0, grow), (0, grow)))
+
+        self.symbols.append(symbol)
+        self.index[symbol] = i
+        return i
+
+    def _apply_row(self, row, window, sign):
+        """Tambahkan (sign=1) atau keluarkan (sign=-1) satu baris return dari jumlah berjalan"""
+        present = ~np.isnan(row)
+        if not present.any():
+            return
+        values = np.where(present, row, 0.0)
+        mask = present.astype(np.float64)
+        sums = self.sums[window]
+        sums['n'] += sign * np.outer(mask, mask)
+        sums['x'] += sign * np.outer(values, mask)
+        sums['xx'] += sign * np.outer(values * values, mask)
+        sums['xy'] += sign * np.outer(values, values)
+
+    def _in_window(self, bar, window):
+        return self.head - window < bar <= self.head
+
+    def _advance(self, bar):
+        """Majukan head ke bar baru, keluarkan baris yang lewat dari setiap window"""
+        if self.head is None:
+            self.head = bar
+            return
+        if bar <= self.head:
+            return
+
+        if bar - self.head >= self.size:
+            self.returns[:] = np.nan
+            self.closes[:] = np.nan
+            for sums in self.sums.values():
+                for values in sums.values():
+                    values[:] = 0
+        else:
+            for b in range(self.head + 1, bar + 1):
+                for window in self.windows:
+                    self._apply_row(self.returns[(b - window) % self.size], window, -1)
+                self.returns[b % self.size] = np.nan
+                self.closes[b % (self.size + 1)] = np.nan
+        self.head = bar
+
+    def _apply_cell(self, row, i, window, sign):
+        """Kontribusi satu sel (simbol i) dari sebuah baris: hanya baris dan kolom i, O(N)"""
+        present = ~np.isnan(row)
+        values = np.where(present, row, 0.0)
+        mask = present.astype(np.float64)
+        v = values[i]
+        sums = self.sums[window]
+        for key, row_part, col_part in (
+            ('n', mask, mask),
+            ('x', v * mask, values),
+            ('xx', v * v * mask, values * values),
+            ('xy', v * values, values * v)
+        ):
+            sums[key][i, :] += sign * row_part
+            sums[key][:, i] += sign * col_part
+            # Elemen diagonal terhitung dua kali
+            sums[key][i, i] -= sign * row_part[i]
+
+    def _set_return(self, bar, i, value):
+        row = self.returns[bar % self.size]
+        windows = [w for w in self.windows if self._in_window(bar, w)]
+        if not np.isnan(row[i]):
+            for window in windows:
+                self._apply_cell(row, i, window, -1)
+        row[i] = value
+        for window in windows:
+            self._apply_cell(row, i, window, 1)
+
+    def add_bars(self, symbol, timestamps, closes):
+        """Masukkan bar yang sudah close untuk satu simbol; bar yang sudah pernah masuk diabaikan"""
+        with self._lock:
+            i = self._symbol_index(symbol)
+            last = self.last_bar.get(symbol)
+            added = 0
+
+            for ts, close in zip(timestamps, closes):
+                bar = int(ts) // self.step
+                if last is not None and bar <= last:
+                    continue
+                self._advance(bar)
+                if bar <= self.head - self.size:
+                    continue
+
+                self.closes[bar % (self.size + 1), i] = close
+                previous = self.closes[(bar - 1) % (self.size + 1), i]
+                # Return hanya dari dua bar berurutan, bar yang hilang tidak dijembatani
+                if last == bar - 1 and previous > 0 and close > 0:
+                    self._set_return(bar, i, np.log(close / previous))
+                last = bar
+                added += 1
+
+            if last is not None:
+                self.last_bar[symbol] = last
+            self._updates += added
+            # Hitung ulang jumlah berjalan secara berkala untuk membuang galat pembulatan
+            if self._updates >= 4 * self.size:
+                self._updates = 0
+                self._rebuild()
+            return added
+
+    def _rebuild(self):
+        for window in self.windows:
+            for values in self.sums[window].values():
+                values[:] = 0
+            for bar in range(self.head - window + 1, self.head + 1):
+                self._apply_row(self.returns[bar % self.size], window, 1)
+
+    def matrix(self, window=None, min_periods=3):
+        """Matriks korelasi dan beta untuk semua simbol; beta[i, j] = sensitivitas i terhadap j"""
+        window = window or self.windows[0]
+        with self._lock:
+            n_symbols = len(self.symbols)
+            sums = {key: values[:n_symbols, :n_symbols].copy() for key, values in self.sums[window].items()}
+            symbols = list(self.symbols)
+
+        n = sums['n']
+        sx, sxx, sxy = sums['x'], sums['xx'], sums['xy']
+        sy, syy = sx.T, sxx.T
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.sqrt(var_x * var_y)
+            beta = cov / var_y
+        valid = n >= min_periods
+        corr = np.where(valid, np.clip(corr, -1, 1), np.nan)
+        beta = np.where(valid, beta, np.nan)
+        return {'symbols': symbols, 'correlation': corr, 'beta': beta, 'periods': n.astype(np.int64)}
+
+    def pair(self, symbol, reference, window=None, min_periods=3):
+        """Korelasi dan beta satu simbol terhadap simbol referensi, dalam O(1)"""
+        window = window or self.windows[0]
+        with self._lock:
+            i = self.index.get(symbol)
+            j = self.index.get(reference)
+            if i is None or j is None:
+                return {'correlation': np.nan, 'beta': np.nan, 'periods': 0}
+            sums = self.sums[window]
+            n = sums['n'][i, j]
+            sx, sy = sums['x'][i, j], sums['x'][j, i]
+            sxx, syy = sums['xx'][i, j], sums['xx'][j, i]
+            sxy = sums['xy'][i, j]
+
+        if n < min_periods:
+            return {'correlation': np.nan, 'beta': np.nan, 'periods': int(n)}
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        correlation = cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else np.nan
+        beta = cov / var_y if var_y > 0 else np.nan
+        return {
+            'correlation': float(np.clip(correlation, -1, 1)) if correlation == correlation else np.nan,
+            'beta': float(beta),
+            'periods': int(round(n))
+        }
@@ -0,0 +1,155 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# data sudah diserialisasi sekali saat publish, dipakai ulang untuk semua client
+Event = namedtuple('Event', ['id', 'type', 'symbol', 'data'])
+
+
+class Subscription:
+    """Antrian event untuk satu client, dengan filter simbol opsional"""
+
+    def __init__(self, symbols=None, max_queue=256):
+        self.symbols = {s.upper() for s in symbols} if symbols else None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.evicted = False
+
+    def accepts(self, event):
+        # Event tanpa simbol (mis. status) dikirim ke semua client
+        return self.symbols is None or event.symbol is None or event.symbol in self.symbols
+
+    def get(self, timeout=None):
+        """Event berikutnya, atau None jika timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Fan-out event ke subscriber dengan riwayat terbatas untuk resume (Last-Event-ID)
+
+    Dengan store, event ditulis ke tabel events dan setiap proses membaca (tail) tabel itu,
+    sehingga client di worker mana pun menerima event yang sama dengan id yang sama.
+    """
+
+    def __init__(self, history=1000, max_queue=256, store=None, poll_interval=0.25):
+        self.max_queue = max_queue
+        self.history = deque(maxlen=history)
+        self.subscribers = set()
+        self.store = store
+        self.poll_interval = poll_interval
+        self.next_id = 1
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._tail = None
+
+    def start(self):
+        """Mulai membaca event dari store (sekali per proses)"""
+        if self.store is None or self._tail is not None:
+            return
+        self.next_id = self.store.last_event_id() + 1
+        self._tail = threading.Thread(target=self._run_tail, name='event-tail', daemon=True)
+        self._tail.start()
+
+    def _run_tail(self):
+        last_active = 0
+        while True:
+            try:
+                for row in self.store.events_after(self.next_id - 1):
+                    self._dispatch(Event(*row))
+                # Tandai bahwa ada client stream agar proses leader tahu harga perlu dipublikasikan
+                if self.subscribers and time.time() - last_active > 5:
+                    last_active = time.time()
+                    self.store.set_state(stream_active=last_active)
+            except Exception as e:
+                logger.error(f"Error reading events from store: {e}")
+            time.sleep(self.poll_interval)
+
+    def publish(self, event_type, data, symbol=None):
+        body = json.dumps(data, default=float)
+        symbol = symbol.upper() if symbol else None
+        if self.store is not None:
+            event_id = self.store.append_event(event_type, symbol, body)
+            return Event(event_id, event_type, symbol, body)
+
+        with self._lock:
+            event = Event(self.next_id, event_type, symbol, body)
+        self._dispatch(event)
+        return event
+
+    def _dispatch(self, event):
+        with self._lock:
+            self.next_id = event.id + 1
+            self.history.append(event)
+
+            for sub in list(self.subscribers):
+                if not sub.accepts(event):
+                    continue
+                try:
+                    sub.queue.put_nowait(event)
+                except queue.Full:
+                    # Client terlalu lambat: putuskan, client bisa resume dengan Last-Event-ID
+                    sub.evicted = True
+                    self.subscribers.discard(sub)
+                    self.evictions += 1
+                    logger.warning("Evicted slow event stream subscriber")
+        return event
+
+    def subscribe(self, symbols=None, last_event_id=None):
+        sub = Subscription(symbols, self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                # Kirim ulang event yang terlewat selama masih ada di riwayat
+                if self.store is not None and (not self.history or self.history[0].id > last_event_id + 1):
+                    # Riwayat lokal belum mencakup event tersebut (mis. worker baru), baca dari store
+                    since = max(last_event_id, self.next_id - 1 - self.history.maxlen)
+                    rows = self.store.events_after(since, limit=self.history.maxlen)
+                    missed = [e for e in map(Event._make, rows) if e.id < self.next_id and sub.accepts(e)]
+                else:
+                    missed = [e for e in self.history if e.id > last_event_id and sub.accepts(e)]
+                for event in missed[-self.max_queue:]:
+                    sub.queue.put_nowait(event)
+            self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self.subscribers.discard(sub)
+
+    def subscriber_count(self):
+        return len(self.subscribers)
+
+    def has_listeners(self, within=30):
+        """Apakah ada client stream di proses ini atau (dengan store) di proses lain"""
+        if self.subscribers:
+            return True
+        if self.store is None:
+            return False
+        return time.time() - self.store.get_state('stream_active', 0) < within
+
+
+def format_sse(event):
+    """Format event sebagai frame Server-Sent Events"""
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n"
+
+
+def stream_events(bus, sub, heartbeat=15):
+    """Generator frame SSE untuk satu subscription sampai client putus atau dikeluarkan"""
+    try:
+        yield "retry: 3000\n\n"
+        # Client yang dikeluarkan tetap menerima sisa antriannya sebelum koneksi ditutup
+        while not (sub.evicted and sub.queue.empty()):
+            event = sub.get(timeout=heartbeat)
+            if event is not None:
+                yield format_sse(event)
+            else:
+                # Komentar SSE agar koneksi tidak ditutup proxy
+                yield ": ping\n\n"
+    finally:
+        bus.unsubscribe(sub)
@@ -0,0 +1,362 @@
+"""Stand-in lokal untuk endpoint REST Binance yang dipakai bot (uji performa tanpa exchange)
+
+    python exchange_standin.py --port 8900                                  # data sintetis
+    python exchange_standin.py --mode record --cassette data/cassette.jsonl # rekam respons asli
+    python exchange_standin.py --mode replay --cassette data/cassette.jsonl --latency 80 --jitter 30
+
+Arahkan bot ke stand-in dengan [BINANCE] base_url = http://127.0.0.1:8900 di config.ini
+(atau environment BINANCE_BASE_URL).
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPSTREAM = 'https://api.binance.com'
+
+# Bobot request per endpoint (x-mbx-used-weight-1m), sama seperti spot API
+WEIGHTS = {
+    '/api/v3/ping': 1,
+    '/api/v3/time': 1,
+    '/api/v3/klines': 2,
+    '/api/v3/trades': 25,
+    '/api/v3/ticker/price': 2,
+    '/api/v3/ticker/24hr': 2
+}
+
+# Parameter yang berubah di setiap request dan diabaikan saat replay longgar
+VOLATILE_PARAMS = {'startTime', 'endTime', 'fromId', 'timestamp', 'signature', 'recvWindow'}
+
+
+def request_key(path, params, loose=False):
+    items = sorted((k, v) for k, v in params.items() if not (loose and k in VOLATILE_PARAMS))
+    return f"{path}?{urlencode(items)}"
+
+
+def weight_of(path, params):
+    if path in ('/api/v3/ticker/price', '/api/v3/ticker/24hr') and 'symbol' not in params:
+        return 4 if path.endswith('price') else 80
+    return WEIGHTS.get(path, 1)
+
+
+class ExchangeError(Exception):
+    """Error dengan format respons Binance ({"code": ..., "msg": ...})"""
+
+    def __init__(self, status, code, msg, headers=None):
+        super().__init__(msg)
+        self.status = status
+        self.code = code
+        self.msg = msg
+        self.headers = headers or {}
+
+
+class FaultInjector:
+    """Latensi, jitter, error 5xx dan 429 buatan dengan seed tetap agar bisa diulang"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0, throttle_rate=0, retry_after=1, seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def apply(self):
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            raise ExchangeError(429, -1003, "Too many requests (injected)", {'Retry-After': str(self.retry_after)})
+        if roll < self.throttle_rate + self.error_rate:
+            raise ExchangeError(500, -1000, "An unknown error occurred while processing the request (injected)")
+
+
+class WeightTracker:
+    """Bobot terpakai per menit kalender; melewati batas menghasilkan 429 seperti exchange asli"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.minute = None
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def add(self, weight):
+        with self._lock:
+            minute = int(time.time() // 60)
+            if minute != self.minute:
+                self.minute = minute
+                self.used = 0
+            self.used += weight
+            used = self.used
+        if self.limit is not None and used > self.limit:
+            retry_after = max(1, int(60 - time.time() % 60))
+            raise ExchangeError(429, -1003, f"Too much request weight used; current limit is {self.limit} request weight per 1 MINUTE",
+                                {'Retry-After': str(retry_after), 'X-MBX-USED-WEIGHT-1M': str(used)})
+        return used
+
+
+class Cassette:
+    """Rekaman respons (JSON lines); replay mengembalikan rekaman per request secara berurutan
+
+    Jika rekaman untuk satu key habis, rekaman terakhir diulang, sehingga replay selalu deterministik.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._exact = {}
+        self._loose = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        return self
+
+    def _index(self, record):
+        self._exact.setdefault(record['key'], []).append(record)
+        self._loose.setdefault(record['loose_key'], []).append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self._exact.values())
+
+    def append(self, path, params, status, body):
+        record = {
+            'key': request_key(path, params),
+            'loose_key': request_key(path, params, loose=True),
+            'status': status,
+            'body': body
+        }
+        with self._lock:
+            self._index(record)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def replay(self, path, params, loose=True):
+        key = request_key(path, params)
+        records = self._exact.get(key)
+        if records is None and loose:
+            key = request_key(path, params, loose=True)
+            records = self._loose.get(key)
+        if records is None:
+            return None
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return records[min(position, len(records) - 1)]
+
+
+class SyntheticBackend:
+    """Respons dari SyntheticMarket, dengan jam dinding sebagai waktu pasar"""
+
+    def __init__(self, market=None):
+        if market is None:
+            from synthetic_market import SyntheticMarket
+            market = SyntheticMarket()
+        self.market = market
+
+    def handle(self, path, params):
+        market = self.market
+        if path == '/api/v3/ping':
+            return {}
+        if path == '/api/v3/time':
+            return {'serverTime': market.now()}
+        if path == '/api/v3/klines':
+            symbol, interval = self._require(params, 'symbol', 'interval')
+            limit = min(int(params.get('limit', 500)), 1000)
+            start = int(params['startTime']) if 'startTime' in params else None
+            end = int(params['endTime']) if 'endTime' in params else None
+            return market.klines(symbol, interval, limit, start_ms=start, end_ms=end)
+        if path == '/api/v3/trades':
+            symbol, = self._require(params, 'symbol')
+            return market.trades(symbol, min(int(params.get('limit', 500)), 1000))
+        if path == '/api/v3/ticker/price':
+            if 'symbol' in params:
+                return {'symbol': params['symbol'], 'price': f"{market.price(params['symbol']):.8f}"}
+            return [{'symbol': s, 'price': f"{market.price(s):.8f}"} for s in self.symbols(params)]
+        if path == '/api/v3/ticker/24hr':
+            if 'symbol' in params:
+                return market.ticker_24h(params['symbol'])
+            return [market.ticker_24h(s) for s in self.symbols(params)]
+        raise ExchangeError(404, -1000, f"Endpoint {path} is not supported by the stand-in")
+
+    @staticmethod
+    def symbols(params):
+        if 'symbols' in params:
+            return json.loads(params['symbols'])
+        return ['BNBUSDT', 'BTCUSDT', 'ETHUSDT', 'BNBBTC', 'SOLUSDT', 'XRPUSDT', 'ADAUSDT', 'DOGEUSDT']
+
+    @staticmethod
+    def _require(params, *names):
+        missing = [n for n in names if n not in params]
+        if missing:
+            raise ExchangeError(400, -1102, f"Mandatory parameter '{missing[0]}' was not sent, was empty/null, or malformed.")
+        return [params[n] for n in names]
+
+
+class ProxyBackend:
+    """Teruskan request ke exchange asli dan rekam respons ke cassette"""
+
+    def __init__(self, cassette, upstream=DEFAULT_UPSTREAM, timeout=10):
+        import requests
+        self.cassette = cassette
+        self.upstream = upstream.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def handle(self, path, params):
+        response = self.session.get(self.upstream + path, params=params, timeout=self.timeout)
+        self.cassette.append(path, params, response.status_code, response.text)
+        if response.status_code != 200:
+            try:
+                error = response.json()
+            except ValueError:
+                error = {'code': -1000, 'msg': response.text}
+            raise ExchangeError(response.status_code, error.get('code', -1000), error.get('msg', ''),
+                                {k: v for k, v in response.headers.items() if k.lower() == 'retry-after'})
+        return json.loads(response.text)
+
+
+class ReplayBackend:
+    def __init__(self, cassette, loose=True, fallback=None):
+        self.cassette = cassette
+        self.loose = loose
+        self.fallback = fallback
+
+    def handle(self, path, params):
+        record = self.cassette.replay(path, params, self.loose)
+        if record is None:
+            if self.fallback is not None:
+                return self.fallback.handle(path, params)
+            raise ExchangeError(404, -1000, f"No recording for {request_key(path, params)}")
+        if record['status'] != 200:
+            try:
+                error = json.loads(record['body'])
+            except ValueError:
+                # Mis. halaman HTML 502 dari proxy di depan exchange
+                error = {'code': -1000, 'msg': record['body']}
+            raise ExchangeError(record['status'], error.get('code', -1000), error.get('msg', ''))
+        return json.loads(record['body'])
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, backend, faults=None, weights=None):
+        super().__init__(address, _StandinHandler)
+        self.backend = backend
+        self.faults = faults or FaultInjector()
+        self.weights = weights or WeightTracker()
+        self.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Jalankan di thread daemon (untuk uji beban di proses yang sama)"""
+        thread = threading.Thread(target=self.serve_forever, name='exchange-standin', daemon=True)
+        thread.start()
+        return self
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        server = self.server
+        server.requests += 1
+        headers = {}
+        try:
+            used = server.weights.add(weight_of(url.path, params))
+            headers['X-MBX-USED-WEIGHT-1M'] = str(used)
+            server.faults.apply()
+            status, payload = 200, server.backend.handle(url.path, params)
+        except ExchangeError as e:
+            status, payload = e.status, {'code': e.code, 'msg': e.msg}
+            headers.update(e.headers)
+        except Exception as e:
+            logger.error(f"Stand-in error for {self.path}: {e}")
+            status, payload = 500, {'code': -1000, 'msg': str(e)}
+
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def create_standin(host='127.0.0.1', port=0, mode='synthetic', cassette=None, upstream=DEFAULT_UPSTREAM,
+                   latency_ms=0, jitter_ms=0, error_rate=0, throttle_rate=0, weight_limit=None, seed=None,
+                   strict=False, market=None):
+    """Buat StandinServer; port 0 memilih port bebas (lihat server.url)"""
+    if mode == 'synthetic':
+        backend = SyntheticBackend(market)
+    elif mode == 'record':
+        backend = ProxyBackend(Cassette(cassette), upstream)
+    elif mode == 'replay':
+        fallback = None if strict else SyntheticBackend(market)
+        backend = ReplayBackend(Cassette(cassette).load(), fallback=fallback)
+    else:
+        raise ValueError(f"Unknown stand-in mode: {mode}")
+
+    faults = FaultInjector(latency_ms, jitter_ms, error_rate, throttle_rate, seed=seed)
+    return StandinServer((host, port), backend, faults, WeightTracker(weight_limit))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Binance REST endpoints used by the bot')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--mode', choices=('synthetic', 'record', 'replay'), default='synthetic')
+    parser.add_argument('--cassette', default='data/exchange_cassette.jsonl', help='Recording file for record/replay')
+    parser.add_argument('--upstream', default=DEFAULT_UPSTREAM, help='Real exchange used in record mode')
+    parser.add_argument('--strict', action='store_true', help='Replay: 404 for unrecorded requests instead of synthetic data')
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per request (ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='Random +/- latency (ms)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--weight-limit', type=int, help='Answer 429 once this request weight per minute is exceeded')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for injected latency and faults')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.mode == 'record':
+        os.makedirs(os.path.dirname(args.cassette) or '.', exist_ok=True)
+
+    server = create_standin(
+        args.host, args.port, args.mode, args.cassette, args.upstream, args.latency, args.jitter,
+        args.error_rate, args.throttle_rate, args.weight_limit, args.seed, args.strict
+    )
+    logger.info(f"Exchange stand-in ({args.mode}) listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
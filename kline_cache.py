@@ -0,0 +1,154 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Batas maksimum kline per request get_klines dari Binance
+MAX_KLINES_PER_REQUEST = 1000
+
+# Limit untuk refresh inkremental (limit < 100 hanya berbobot 1)
+REFRESH_LIMIT = 99
+
+
+class _KlineSeries:
+    """Ring buffer kline untuk satu pasangan (symbol, interval)"""
+
+    def __init__(self, max_candles):
+        self.rows = deque(maxlen=max_candles)
+        self.lock = threading.Lock()
+        # True selama series terus diperbarui oleh stream WebSocket
+        self.live = False
+        # True jika series harus disinkronkan ulang lewat REST sebelum bisa live
+        self.resync = False
+
+
+class KlineCache:
+    """Cache kline in-memory per (symbol, interval) dengan eviksi LRU"""
+
+    def __init__(self, client, max_series=64, max_candles=MAX_KLINES_PER_REQUEST):
+        self.client = client
+        self.max_series = max_series
+        self.max_candles = max_candles
+        self.hits = 0
+        self.misses = 0
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_series(self, symbol, interval):
+        """Ambil (atau buat) series dan tandai sebagai yang terbaru dipakai"""
+        key = (symbol, interval)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = _KlineSeries(self.max_candles)
+                self._series[key] = series
+                # Buang series yang paling lama tidak dipakai
+                while len(self._series) > self.max_series:
+                    evicted_key, _ = self._series.popitem(last=False)
+                    logger.debug(f"Kline cache evicted {evicted_key}")
+            else:
+                self._series.move_to_end(key)
+            return series
+
+    def get_klines(self, symbol, interval, limit=100):
+        """Dapatkan `limit` kline terakhir, hanya mengunduh candle yang baru"""
+        if limit > self.max_candles:
+            # Window lebih besar dari ring buffer, langsung ke API
+            return self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
+
+        series = self._get_series(symbol, interval)
+
+        with series.lock:
+            if len(series.rows) < limit:
+                self._reload(series, symbol, interval, limit)
+            elif series.live:
+                # Stream sudah menjaga candle terbaru, tidak perlu REST
+                self.hits += 1
+            else:
+                self._refresh(series, symbol, interval, limit)
+
+            return list(series.rows)[-limit:]
+
+    def _reload(self, series, symbol, interval, limit):
+        """Unduh ulang seluruh window"""
+        self.misses += 1
+        klines = self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
+        series.rows.clear()
+        series.rows.extend(klines)
+        series.resync = False
+
+    def _refresh(self, series, symbol, interval, limit):
+        """Unduh candle sejak open time candle terakhir dan ganti candle yang masih berjalan"""
+        last_open_time = series.rows[-1][0]
+        klines = self.client.get_klines(
+            symbol=symbol,
+            interval=interval,
+            startTime=last_open_time,
+            limit=REFRESH_LIMIT
+        )
+
+        if len(klines) >= REFRESH_LIMIT:
+            # Celah terlalu besar untuk disambung, muat ulang window
+            self._reload(series, symbol, interval, limit)
+            return
+
+        self.hits += 1
+        series.resync = False
+        if not klines:
+            return
+
+        # Candle dengan open time yang sama atau lebih baru diganti data terbaru
+        first_open_time = klines[0][0]
+        while series.rows and series.rows[-1][0] >= first_open_time:
+            series.rows.pop()
+        series.rows.extend(klines)
+
+    def apply_stream_kline(self, symbol, interval, row):
+        """Terapkan event kline dari stream ke series yang sudah ada di cache"""
+        with self._lock:
+            series = self._series.get((symbol, interval))
+        if series is None:
+            return
+
+        with series.lock:
+            rows = series.rows
+            if len(rows) < 2:
+                return
+
+            last_open_time = rows[-1][0]
+            step = last_open_time - rows[-2][0]
+            open_time = row[0]
+
+            if open_time == last_open_time:
+                rows[-1] = row
+            elif open_time == last_open_time + step:
+                rows.append(row)
+            elif open_time > last_open_time:
+                # Ada candle yang terlewat, biarkan refresh REST menambal celahnya
+                series.live = False
+                return
+            else:
+                return
+            series.live = not series.resync
+
+    def mark_stale(self):
+        """Paksa semua series kembali ke refresh REST (mis. saat stream terputus)"""
+        with self._lock:
+            series_list = list(self._series.values())
+        for series in series_list:
+            series.live = False
+            series.resync = True
+
+    def invalidate(self, symbol=None, interval=None):
+        """Hapus series dari cache (semua jika symbol tidak ditentukan)"""
+        with self._lock:
+            if symbol is None:
+                self._series.clear()
+                return
+            for key in list(self._series):
+                if key[0] == symbol and (interval is None or key[1] == interval):
+                    del self._series[key]
+
+    def __len__(self):
+        return len(self._series)
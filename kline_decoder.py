@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Posisi field dalam payload kline REST Binance
+FLOAT_FIELDS = (
+    ('open', 1),
+    ('high', 2),
+    ('low', 3),
+    ('close', 4),
+    ('volume', 5),
+    ('quote_asset_volume', 7),
+    ('taker_buy_base_asset_volume', 9),
+    ('taker_buy_quote_asset_volume', 10)
+)
+INT_FIELDS = (
+    ('timestamp', 0),
+    ('close_time', 6),
+    ('number_of_trades', 8)
+)
+
+# Field yang dikembalikan oleh get_historical_data versi list of dict
+RECORD_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class KlineColumns:
+    """Data kline dalam bentuk kolom array NumPy yang kontigu"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __len__(self):
+        return len(self.columns['timestamp'])
+
+    def to_dataframe(self):
+        """Buat DataFrame yang memakai array kolom tanpa menyalin"""
+        return pd.DataFrame(self.columns, copy=False)
+
+    def to_records(self):
+        """Konversi ke list of dict (format lama get_historical_data)"""
+        values = [self.columns[name].tolist() for name in RECORD_FIELDS if name in self.columns]
+        names = [name for name in RECORD_FIELDS if name in self.columns]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def decode_klines(klines):
+    """Decode payload kline mentah menjadi kolom float64/int64 dalam satu langkah"""
+    width = len(klines[0]) if len(klines) else 12
+    float_fields = [(name, index) for name, index in FLOAT_FIELDS if index < width]
+    int_fields = [(name, index) for name, index in INT_FIELDS if index < width]
+
+    if not len(klines):
+        columns = {name: np.empty(0, dtype=np.int64) for name, _ in int_fields}
+        columns.update({name: np.empty(0, dtype=np.float64) for name, _ in float_fields})
+        return KlineColumns(columns)
+
+    raw = np.array(klines, dtype=object)
+
+    # Satu blok per tipe, baris = field, sehingga setiap kolom kontigu di memori
+    float_block = np.ascontiguousarray(
+        raw[:, [index for _, index in float_fields]].T.astype(np.float64)
+    )
+    int_block = np.ascontiguousarray(
+        raw[:, [index for _, index in int_fields]].T.astype(np.int64)
+    )
+
+    columns = {}
+    for row, (name, _) in enumerate(int_fields):
+        columns[name] = int_block[row]
+    for row, (name, _) in enumerate(float_fields):
+        columns[name] = float_block[row]
+
+    return KlineColumns(columns)
+
+
+def columns_from_records(records):
+    """Bangun KlineColumns dari list of dict (format lama get_historical_data)"""
+    columns = {
+        name: np.array([r[name] for r in records], dtype=np.int64 if name == 'timestamp' else np.float64)
+        for name in RECORD_FIELDS
+    }
+    return KlineColumns(columns)
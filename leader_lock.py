@@ -0,0 +1,53 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada mode multi-worker, proses tunggal selalu leader
+    fcntl = None
+
+
+class LeaderLock:
+    """Pemilihan leader antar proses dengan file lock; lock lepas otomatis saat proses mati"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        # Tanpa fcntl tidak ada file lock; proses menjadi leader pada try_acquire pertama
+        self._elected = False
+
+    @property
+    def is_leader(self):
+        return self._fd is not None or self._elected
+
+    def try_acquire(self):
+        """Coba menjadi leader tanpa menunggu"""
+        if self.is_leader:
+            return True
+
+        if fcntl is None:
+            self._elected = True
+            return True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Catat pid leader untuk diagnosa
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        self._elected = False
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
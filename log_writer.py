@@ -0,0 +1,413 @@
+import atexit
+import csv
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from metrics import FUNCTION_SECONDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet opsional; format kolom lain (npz) hanya butuh NumPy
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'npz', 'parquet')
+_flush_seconds = FUNCTION_SECONDS.labels('log_writer_flush')
+
+
+def flatten(data, prefix=''):
+    """Dict bertingkat -> {'a.b.c': nilai}; list disimpan sebagai string JSON"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            flat[name] = json.dumps(value, default=_json_default)
+        else:
+            flat[name] = value
+    return flat
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _column_array(name, values):
+    """Nilai satu kolom -> array NumPy bertipe tetap (angka float64, waktu datetime64, sisanya string)"""
+    if name == 'timestamp':
+        return np.array(values, dtype='datetime64[us]')
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, (int, float, bool, np.number, np.bool_)) for v in present):
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+def _file_pattern(name, ext):
+    return re.compile(rf"^{re.escape(name)}(?:-(\d{{8}}))?(?:-(\d+))?(?:\.part(\d+))?\.{ext}$")
+
+
+def log_files(directory, name, ext):
+    """File log yang ada, urut menurut tanggal, nomor rotasi dan nomor part
+
+    Part (<segmen>.partK.<ext>) dari segmen yang sudah digabung diabaikan, sehingga file
+    yang sedang dipadatkan tidak terbaca dua kali.
+    """
+    pattern = _file_pattern(name, ext)
+    files = []
+    for filename in os.listdir(directory) if os.path.isdir(directory) else ():
+        match = pattern.match(filename)
+        if match:
+            day, seq, part = match.group(1) or '', int(match.group(2) or 0), match.group(3)
+            files.append(((day, seq, -1 if part is None else int(part)), os.path.join(directory, filename)))
+    compacted = {key[:2] for key, _ in files if key[2] < 0}
+    return [path for key, path in sorted(files) if key[2] < 0 or key[:2] not in compacted]
+
+
+class LogWriter:
+    """Penulis log di thread latar belakang: baris dikumpulkan lalu ditulis per batch
+
+    Batch ditulis setelah flush_rows baris atau flush_interval detik. File dirotasi per hari
+    (rotate='day': <name>-YYYYMMDD.<ext>) atau hanya menurut ukuran (rotate='size': <name>.<ext>),
+    dengan nomor -1, -2, ... setelah max_bytes (csv) atau max_rows (npz/parquet).
+
+    Format csv memakai kolom tetap (dict disimpan sebagai JSON). Format kolom (npz, parquet)
+    meratakan dict bertingkat menjadi kolom sendiri, mis. indicators.technical.rsi, sehingga
+    riwayat bisa dibaca langsung sebagai array dengan load_log(). Setiap flush ditulis sebagai
+    part baru yang tidak diubah lagi (<segmen>.partK.<ext>); saat segmen ditutup (rotasi atau
+    close) part-partnya digabung sekali menjadi file segmen.
+    """
+
+    def __init__(self, directory, name, columns, fmt='csv', rotate='day', flush_rows=500, flush_interval=5.0,
+                 max_bytes=64 * 1024 * 1024, max_rows=20000, max_queue=100000):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown log format '{fmt}' ({', '.join(FORMATS)})")
+        if fmt == 'parquet' and pq is None:
+            logger.warning("pyarrow is not installed, writing NumPy segments (npz) instead of Parquet")
+            fmt = 'npz'
+        if rotate not in ('day', 'size'):
+            raise ValueError(f"Unknown log rotation '{rotate}' (day, size)")
+
+        self.directory = directory
+        self.name = name
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.rotate = rotate
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.written = 0
+        self.dropped = 0
+
+        # Segmen kolom yang sedang terbuka; baris sudah ada di disk sebagai part
+        self._segment_stem = None
+        self._segment_path = None
+        self._segment_rows = 0
+        self._parts = []
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'log-writer-{name}', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self):
+        return self.queue.qsize()
+
+    def write(self, row):
+        """Antrikan satu baris (dict); tidak pernah memblokir jalur analisis"""
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.error(f"Log queue {self.name} full, row dropped")
+
+    def close(self, timeout=10):
+        """Tulis baris yang tersisa dan hentikan thread"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch.append(self.queue.get(timeout=max(0.0, min(deadline - time.monotonic(), 0.5))))
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            if stopping:
+                # Kosongkan antrian sebelum berhenti
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            if batch and (len(batch) >= self.flush_rows or time.monotonic() >= deadline or stopping):
+                try:
+                    with _flush_seconds.time():
+                        self._flush(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    logger.error(f"Error writing {len(batch)} rows to {self.name} log: {e}")
+                batch = []
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+            if stopping:
+                if self.fmt != 'csv':
+                    try:
+                        self._compact()
+                    except Exception as e:
+                        logger.error(f"Error compacting {self.name} log segment: {e}")
+                return
+
+    def _stem(self, day):
+        return f"{self.name}-{day}" if self.rotate == 'day' else self.name
+
+    def _path(self, stem, seq):
+        return os.path.join(self.directory, f"{stem}-{seq}.{self.fmt}" if seq else f"{stem}.{self.fmt}")
+
+    def _flush(self, batch):
+        os.makedirs(self.directory, exist_ok=True)
+        # Baris dikelompokkan per hari agar rotasi harian mengikuti timestamp baris
+        groups = {}
+        for row in batch:
+            groups.setdefault(self._row_day(row), []).append(row)
+        for day, rows in groups.items():
+            if self.fmt == 'csv':
+                self._write_csv(self._stem(day), rows)
+            else:
+                self._write_columns(self._stem(day), rows)
+
+    @staticmethod
+    def _row_day(row):
+        timestamp = row.get('timestamp')
+        try:
+            return datetime.fromisoformat(timestamp).strftime('%Y%m%d')
+        except (TypeError, ValueError):
+            return datetime.now().strftime('%Y%m%d')
+
+    def _write_csv(self, stem, rows):
+        seq = 0
+        path = self._path(stem, seq)
+        while self.max_bytes and os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+            seq += 1
+            path = self._path(stem, seq)
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(self.columns)
+            for row in rows:
+                writer.writerow([
+                    json.dumps(row.get(c), default=_json_default) if isinstance(row.get(c), (dict, list)) else row.get(c)
+                    for c in self.columns
+                ])
+
+    def _write_columns(self, stem, rows):
+        while rows:
+            if self._segment_stem != stem or self._segment_rows >= self.max_rows:
+                self._open_segment(stem)
+            take = rows[:self.max_rows - self._segment_rows]
+            rows = rows[len(take):]
+            self._write_part(take)
+
+    def _write_part(self, rows):
+        flat = [flatten(row) for row in rows]
+        names = list(dict.fromkeys(name for row in flat for name in row))
+        columns = {name: _column_array(name, [row.get(name) for row in flat]) for name in names}
+        root, ext = os.path.splitext(self._segment_path)
+        path = f"{root}.part{len(self._parts)}{ext}"
+        self._save(columns, path)
+        self._parts.append(path)
+        self._segment_rows += len(rows)
+
+    def _open_segment(self, stem):
+        self._compact()
+        # Segmen baru selalu memakai nomor berikutnya; segmen dari proses sebelumnya tidak ditulis ulang
+        day = stem[len(self.name) + 1:] or None
+        pattern = _file_pattern(self.name, self.fmt)
+        used = set()
+        for filename in os.listdir(self.directory):
+            match = pattern.match(filename)
+            if match and match.group(1) == day:
+                used.add(int(match.group(2) or 0))
+        seq = 0
+        while seq in used:
+            seq += 1
+        self._segment_stem = stem
+        self._segment_path = self._path(stem, seq)
+        self._segment_rows = 0
+        self._parts = []
+
+    def _compact(self):
+        """Gabungkan part segmen yang terbuka menjadi satu file segmen"""
+        if not self._parts:
+            return
+        if len(self._parts) == 1:
+            os.replace(self._parts[0], self._segment_path)
+        else:
+            self._save(_concat([_read_columns(path) for path in self._parts]), self._segment_path)
+            # File segmen sudah ada, jadi pembaca mengabaikan part yang belum terhapus
+            for path in self._parts:
+                os.remove(path)
+        self._parts = []
+
+    def _save(self, columns, path):
+        tmp = f"{path}.tmp"
+        if self.fmt == 'parquet':
+            pq.write_table(pa.table(columns), tmp)
+        else:
+            with open(tmp, 'wb') as f:
+                np.savez_compressed(f, **columns)
+        # Ganti file secara atomik agar pembaca tidak melihat file setengah jadi
+        os.replace(tmp, path)
+
+
+def _read_csv(path):
+    import pandas as pd
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    rows = []
+    for record in frame.to_dict('records'):
+        row = {}
+        for name, value in record.items():
+            if value.startswith('{'):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    # Format lama: koma di JSON indikator diganti titik koma
+                    try:
+                        value = json.loads(value.replace(';', ','))
+                    except ValueError:
+                        pass
+            row[name] = value
+        flat = flatten(row)
+        for name, value in flat.items():
+            if isinstance(value, str) and name != 'timestamp':
+                try:
+                    flat[name] = float(value)
+                except ValueError:
+                    pass
+        rows.append(flat)
+
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    return {name: _column_array(name, [row.get(name) for row in rows]) for name in names}
+
+
+def _read_columns(path):
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _missing(array, size):
+    if array.dtype.kind == 'M':
+        return np.full(size, np.datetime64('NaT'), dtype=array.dtype)
+    if array.dtype.kind in 'fiub':
+        return np.full(size, np.nan)
+    return np.full(size, '', dtype=str)
+
+
+def _concat(parts, names=None):
+    """Gabungkan beberapa {kolom: array}; kolom yang tidak ada di suatu bagian diisi kosong"""
+    if names is None:
+        names = list(dict.fromkeys(name for part in parts for name in part))
+    reference = {}
+    for part in parts:
+        for column, array in part.items():
+            reference.setdefault(column, array)
+
+    result = {}
+    for column in names:
+        arrays = []
+        for part in parts:
+            size = len(next(iter(part.values())))
+            array = part.get(column)
+            arrays.append(array if array is not None else _missing(reference[column], size))
+        if len({a.dtype.kind for a in arrays}) > 1:
+            # Bagian yang kolomnya hanya berisi None tersimpan sebagai NaN; isi sesuai tipe bagian lain
+            other = next((a for a in arrays if a.dtype.kind != 'f'), None)
+            if other is not None:
+                arrays = [_missing(other, len(a)) if a.dtype.kind == 'f' and np.isnan(a).all() else a for a in arrays]
+        if len({a.dtype.kind for a in arrays}) > 1:
+            arrays = [a.astype(str) for a in arrays]
+        result[column] = np.concatenate(arrays)
+    return result
+
+
+def _read_part(path):
+    try:
+        return _read_csv(path) if path.endswith('.csv') else _read_columns(path)
+    except FileNotFoundError:
+        # Part yang baru saja digabung ke file segmen
+        return None
+
+
+def load_log(directory, name, start=None, end=None, columns=None, fmt=None):
+    """Baca semua file log (semua rotasi) menjadi {kolom: array}, urut menurut waktu
+
+    start/end berupa datetime atau string ISO; file di luar rentang tanggal tidak dibuka.
+    Tanpa fmt, file npz, parquet dan csv yang ada dibaca semua.
+    """
+    start = np.datetime64(start, 'us') if start is not None else None
+    end = np.datetime64(end, 'us') if end is not None else None
+
+    paths = []
+    for ext in ([fmt] if fmt else FORMATS):
+        pattern = _file_pattern(name, ext)
+        for path in log_files(directory, name, ext):
+            day = pattern.match(os.path.basename(path)).group(1)
+            if day:
+                day = np.datetime64(f"{day[:4]}-{day[4:6]}-{day[6:]}", 'us')
+                if (start is not None and day + np.timedelta64(1, 'D') <= start) or (end is not None and day > end):
+                    continue
+            paths.append(path)
+
+    parts = [_read_part(path) for path in paths]
+    parts = [part for part in parts if part and len(next(iter(part.values())))]
+    if not parts:
+        return {}
+
+    names = list(dict.fromkeys(name for part in parts for name in part))
+    if columns is not None:
+        # Timestamp tetap dibaca untuk filter dan urutan, meski tidak diminta
+        names = [n for n in names if n in columns or n == 'timestamp']
+    result = _concat(parts, names)
+
+    stamps = result.get('timestamp')
+    if stamps is not None:
+        keep = np.ones(len(stamps), dtype=bool)
+        if start is not None:
+            keep &= stamps >= start
+        if end is not None:
+            keep &= stamps <= end
+        order = np.argsort(stamps[keep], kind='stable')
+        result = {column: array[keep][order] for column, array in result.items()}
+        if columns is not None and 'timestamp' not in columns:
+            del result['timestamp']
+    return result
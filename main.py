@@ -5,17 +5,29 @@ import json
 import logging
 import argparse
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from binance.client import Client
 from binance.exceptions import BinanceAPIException
-import telegram
-import schedule
-import talib
 import requests
 import configparser
 from colorama import init, Fore, Style
+from kline_cache import KlineCache
+from kline_decoder import decode_klines
+from streaming_indicators import IndicatorEngine
+from market_data import DEFAULT_WS_URL, LiveMarketView, MarketDataStream
+from scanner import MarketScanner, format_scan_table
+from whale_flow import WhaleFlow, parse_thresholds, parse_windows
+from correlation import CorrelationEngine
+from request_scheduler import create_client, register_client_metrics
+from profiler import Profiler, write_result
+from trade_history import SignalHistory, TradeHistory
+from log_writer import LogWriter
+from candle_scheduler import CandleScheduler, ServerClock
+from metrics import FUNCTION_SECONDS, Counter, Gauge, Histogram, get_or_create, register_function, start_http_server, timed
+from telegram_notifier import TelegramNotifier, register_notifier_metrics
+import backtest
 
 # Inisialisasi colorama untuk output berwarna
 init()
@@ -31,6 +43,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BNB_Trading_Bot")
 
+STAGE_SECONDS = get_or_create(
+    Histogram, 'analysis_stage_seconds', 'Duration of each sub-analysis in analyze_bnb_comprehensive', ['stage']
+)
+
 # Baca konfigurasi
 config = configparser.ConfigParser()
 config.read('config.ini')
@@ -39,7 +55,8 @@ config.read('config.ini')
 if not config.sections():
     config['BINANCE'] = {
         'api_key': os.environ.get('BINANCE_API_KEY', ''),
-        'api_secret': os.environ.get('BINANCE_SECRET_KEY', '')
+        'api_secret': os.environ.get('BINANCE_SECRET_KEY', ''),
+        'base_url': os.environ.get('BINANCE_BASE_URL', '')
     }
     config['TELEGRAM'] = {
         'bot_token': os.environ.get('TELEGRAM_BOT_TOKEN', ''),
@@ -50,13 +67,50 @@ if not config.sections():
         'quantity': '0.1',
         'enable_auto_trading': os.environ.get('ENABLE_AUTO_TRADING', 'False'),
         'signal_threshold': os.environ.get('SIGNAL_THRESHOLD', '65'),
-        'analysis_interval': os.environ.get('ANALYSIS_INTERVAL', '60')
+        'analysis_interval': os.environ.get('ANALYSIS_INTERVAL', '60'),
+        'stage_deadline': os.environ.get('STAGE_DEADLINE', '20')
+    }
+    config['MARKET_DATA'] = {
+        'enabled': os.environ.get('MARKET_DATA_STREAM', 'False'),
+        'ws_url': DEFAULT_WS_URL,
+        'intervals': '1h,1d'
+    }
+    config['SCANNER'] = {
+        'watchlist': os.environ.get('SCANNER_WATCHLIST', ''),
+        'min_quote_volume': os.environ.get('SCANNER_MIN_VOLUME', '10000000'),
+        'max_workers': '16'
+    }
+    config['WHALE'] = {
+        'windows': '1m,5m,1h',
+        'signal_window': '5m',
+        'threshold': os.environ.get('WHALE_THRESHOLD', '10000'),
+        'symbol_thresholds': 'BTCUSDT:100000'
+    }
+    config['CORRELATION'] = {
+        'interval': '1d',
+        'windows': '30,90',
+        'reference_symbols': 'BTCUSDT,ETHUSDT,BNBUSDT'
     }
     
     # Simpan konfigurasi default ke file
     with open('config.ini', 'w') as configfile:
         config.write(configfile)
 
+# Kolom file log CSV (format npz/parquet juga meratakan indikator menjadi kolom sendiri)
+SIGNAL_LOG_COLUMNS = ('timestamp', 'symbol', 'signal_type', 'price', 'confidence', 'indicators')
+TRADE_LOG_COLUMNS = ('timestamp', 'order_id', 'symbol', 'signal', 'price', 'quantity', 'total_value', 'confidence', 'status')
+
+# Hasil pengganti untuk tahap yang belum pernah selesai; bentuknya sama dengan hasil tahap asli
+STALE_STAGE_RESULT = {'signal': 'NEUTRAL', 'confidence': 0, 'indicators': {}}
+
+
+def format_value(value, digits=2):
+    """Format angka untuk pesan, atau 'N/A' jika nilainya tidak ada"""
+    try:
+        return f"{float(value):.{digits}f}"
+    except (TypeError, ValueError):
+        return 'N/A'
+
 # Kelas utama BNB Trading Bot
 class BNBTradingBot:
     def __init__(self):
@@ -69,12 +123,60 @@ class BNBTradingBot:
         self.enable_auto_trading = config['TRADING'].getboolean('enable_auto_trading')
         self.signal_threshold = int(config['TRADING']['signal_threshold'])
         self.analysis_interval = int(config['TRADING']['analysis_interval'])
+        self.stage_deadline = config.getfloat('TRADING', 'stage_deadline', fallback=20)
         
         self.client = None
-        self.telegram_bot = None
+        self.kline_cache = None
+        self.market_data = None
+        self.market_stream = None
+        self.notifier = None
         self.last_analysis_time = None
-        self.signals_log = []
-        self.trades_log = []
+        # Riwayat sinyal dan trade berkapasitas tetap; detail indikator disimpan di disk
+        history_dir = config.get('HISTORY', 'directory', fallback=os.path.join('data', 'history'))
+        self.signal_history = SignalHistory(os.path.join(history_dir, 'signals'),
+                                            config.getint('HISTORY', 'signals', fallback=10000))
+        self.trade_history = TradeHistory(os.path.join(history_dir, 'trades'),
+                                          config.getint('HISTORY', 'trades', fallback=10000))
+        
+        # Log sinyal dan trade ditulis per batch di thread latar belakang (section [LOGGING])
+        log_options = {
+            'fmt': config.get('LOGGING', 'format', fallback='csv'),
+            'rotate': config.get('LOGGING', 'rotate', fallback='day'),
+            'flush_rows': config.getint('LOGGING', 'flush_rows', fallback=500),
+            'flush_interval': config.getfloat('LOGGING', 'flush_interval', fallback=5.0),
+            'max_bytes': config.getint('LOGGING', 'max_bytes', fallback=64 * 1024 * 1024),
+            'max_rows': config.getint('LOGGING', 'max_rows', fallback=20000)
+        }
+        self.signal_log = LogWriter('logs', 'bnb_signals_log', SIGNAL_LOG_COLUMNS, **log_options)
+        self.trade_log = LogWriter('logs', 'bnb_trading_log', TRADE_LOG_COLUMNS, **log_options)
+        self.indicator_engines = {}
+        self.indicator_lock = threading.Lock()
+        self.profiler = Profiler()
+        self.scheduler = None
+        
+        # Agregator arus whale (window dan ambang USD per simbol, lihat section [WHALE])
+        self.whale_flow = WhaleFlow(
+            windows=parse_windows(config.get('WHALE', 'windows', fallback='1m,5m,1h')),
+            thresholds=parse_thresholds(config.get('WHALE', 'symbol_thresholds', fallback='')),
+            default_threshold=config.getfloat('WHALE', 'threshold', fallback=10000)
+        )
+        self.whale_window = config.get('WHALE', 'signal_window', fallback='5m')
+        
+        # Korelasi dan beta bergulir antar simbol dari candle yang sudah close (lihat section [CORRELATION])
+        self.correlation_interval = config.get('CORRELATION', 'interval', fallback='1d')
+        self.correlation = CorrelationEngine(
+            backtest.INTERVAL_MS[self.correlation_interval],
+            windows=[int(w) for w in config.get('CORRELATION', 'windows', fallback='30,90').split(',') if w.strip()]
+        )
+        self.correlation_refs = [
+            s.strip().upper() for s in config.get('CORRELATION', 'reference_symbols', fallback='BTCUSDT,ETHUSDT,BNBUSDT').split(',')
+            if s.strip()
+        ]
+        
+        # Executor untuk sub-analisis yang berjalan paralel
+        self.stage_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='analysis')
+        self.stage_futures = {}
+        self.stage_results = {}
         
         # Inisialisasi koneksi
         self.initialize_connections()
@@ -83,15 +185,20 @@ class BNBTradingBot:
         """Inisialisasi koneksi ke Binance dan Telegram"""
         try:
             # Inisialisasi Binance client
-            self.client = Client(self.binance_api_key, self.binance_api_secret)
+            self.client = create_client(self.binance_api_key, self.binance_api_secret, config.get('BINANCE', 'base_url', fallback=None))
+            self.kline_cache = KlineCache(self.client)
             logger.info(f"Berhasil terhubung ke Binance API")
             
+            # Mulai stream market data jika diaktifkan
+            if config.getboolean('MARKET_DATA', 'enabled', fallback=False):
+                self.start_market_data()
+            
             # Test koneksi dengan mendapatkan server time
             server_time = self.client.get_server_time()
             logger.info(f"Binance server time: {datetime.fromtimestamp(server_time['serverTime']/1000)}")
             
-            # Inisialisasi Telegram bot
-            self.telegram_bot = telegram.Bot(token=self.telegram_bot_token)
+            # Inisialisasi Telegram notifier (pengiriman lewat antrian latar belakang)
+            self.notifier = TelegramNotifier(self.telegram_bot_token, self.telegram_chat_id, parse_mode='Markdown')
             logger.info(f"Berhasil terhubung ke Telegram Bot API")
             
             # Kirim pesan selamat datang
@@ -104,97 +211,94 @@ class BNBTradingBot:
             logger.error(f"Error inisialisasi: {e}")
             sys.exit(1)
     
+    def start_market_data(self):
+        """Mulai stream WebSocket kline, aggTrade dan bookTicker"""
+        self.market_data = LiveMarketView()
+        self.market_data.attach_kline_cache(self.kline_cache)
+        self.market_data.add_listener(self.on_market_event)
+        
+        self.market_stream = MarketDataStream(
+            self.market_data,
+            symbols=[self.symbol, 'BTCUSDT'],
+            intervals=config.get('MARKET_DATA', 'intervals', fallback='1h,1d').split(','),
+            ws_url=config.get('MARKET_DATA', 'ws_url', fallback=DEFAULT_WS_URL)
+        )
+        self.market_stream.start()
+        logger.info(f"Market data stream dimulai untuk {self.symbol}")
+    
+    def on_market_event(self, event_type, symbol, data):
+        # Setiap aggTrade langsung masuk ke agregator whale
+        if event_type == 'trade':
+            self.whale_flow.add_trade(symbol, data, source='stream')
+    
+    def get_current_price(self, symbol=None):
+        """Dapatkan harga terkini, dari stream jika tersedia"""
+        if symbol is None:
+            symbol = self.symbol
+        
+        if self.market_data is not None:
+            price = self.market_data.get_price(symbol)
+            if price is not None:
+                return price
+        
+        ticker = self.client.get_symbol_ticker(symbol=symbol)
+        return float(ticker['price'])
+    
     def send_telegram_message(self, message):
-        """Kirim pesan ke Telegram"""
-        try:
-            if self.telegram_bot and self.telegram_chat_id:
-                self.telegram_bot.send_message(
-                    chat_id=self.telegram_chat_id,
-                    text=message,
-                    parse_mode=telegram.ParseMode.MARKDOWN
-                )
-                logger.info(f"Pesan terkirim ke Telegram")
-            else:
-                logger.warning("Telegram bot atau chat ID tidak dikonfigurasi")
-        except Exception as e:
-            logger.error(f"Error mengirim pesan Telegram: {e}")
+        """Kirim pesan ke Telegram tanpa memblokir (mengembalikan Future pengiriman)"""
+        if self.notifier is None:
+            logger.warning("Telegram bot atau chat ID tidak dikonfigurasi")
+            return None
+        return self.notifier.send_message(message)
     
     def get_historical_data(self, symbol, interval='1h', limit=100):
         """Dapatkan data historis dari Binance"""
         try:
-            klines = self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
-            data = []
-            for kline in klines:
-                data.append({
-                    'timestamp': kline[0],
-                    'open': float(kline[1]),
-                    'high': float(kline[2]),
-                    'low': float(kline[3]),
-                    'close': float(kline[4]),
-                    'volume': float(kline[5]),
-                    'close_time': kline[6],
-                    'quote_asset_volume': float(kline[7]),
-                    'number_of_trades': int(kline[8]),
-                    'taker_buy_base_asset_volume': float(kline[9]),
-                    'taker_buy_quote_asset_volume': float(kline[10])
-                })
-            return pd.DataFrame(data)
+            klines = self.kline_cache.get_klines(symbol, interval, limit)
+            return decode_klines(klines).to_dataframe()
         except Exception as e:
             logger.error(f"Error mendapatkan data historis: {e}")
             return pd.DataFrame()
     
-    def calculate_indicators(self, df):
-        """Hitung indikator teknis"""
-        try:
-            # Konversi ke numpy array untuk talib
-            close_prices = df['close'].values
-            high_prices = df['high'].values
-            low_prices = df['low'].values
-            volume = df['volume'].values
-            
-            # Hitung RSI
-            df['rsi'] = talib.RSI(close_prices, timeperiod=14)
-            
-            # Hitung MACD
-            macd, macd_signal, macd_hist = talib.MACD(close_prices, fastperiod=12, slowperiod=26, signalperiod=9)
-            df['macd'] = macd
-            df['macd_signal'] = macd_signal
-            df['macd_hist'] = macd_hist
-            
-            # Hitung Bollinger Bands
-            upper, middle, lower = talib.BBANDS(close_prices, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
-            df['bb_upper'] = upper
-            df['bb_middle'] = middle
-            df['bb_lower'] = lower
-            
-            # Hitung Moving Averages
-            df['sma_20'] = talib.SMA(close_prices, timeperiod=20)
-            df['sma_50'] = talib.SMA(close_prices, timeperiod=50)
-            df['sma_200'] = talib.SMA(close_prices, timeperiod=200)
-            df['ema_20'] = talib.EMA(close_prices, timeperiod=20)
-            
-            # Hitung Stochastic
-            df['slowk'], df['slowd'] = talib.STOCH(high_prices, low_prices, close_prices, 
-                                                  fastk_period=14, slowk_period=3, slowk_matype=0, 
-                                                  slowd_period=3, slowd_matype=0)
-            
-            # Hitung ATR (Average True Range)
-            df['atr'] = talib.ATR(high_prices, low_prices, close_prices, timeperiod=14)
-            
-            # Hitung OBV (On Balance Volume)
-            df['obv'] = talib.OBV(close_prices, volume)
-            
-            return df
-        except Exception as e:
-            logger.error(f"Error menghitung indikator: {e}")
-            return df
+    @timed(FUNCTION_SECONDS, 'update_indicator_engine')
+    def update_indicator_engine(self, symbol, interval, df):
+        """Perbarui indikator streaming dengan candle baru dari DataFrame"""
+        key = (symbol, interval)
+        columns = (
+            df['timestamp'].values,
+            df['high'].values,
+            df['low'].values,
+            df['close'].values,
+            df['volume'].values
+        )
+        
+        with self.indicator_lock:
+            engine = self.indicator_engines.get(key)
+            
+            # Seed ulang jika engine belum ada atau ada celah data
+            if engine is None or not engine.catch_up(*columns):
+                engine = IndicatorEngine()
+                engine.seed(*columns)
+                self.indicator_engines[key] = engine
+            
+            return dict(engine.latest), dict(engine.prev or engine.latest)
     
-    def analyze_bnb_btc_correlation(self):
-        """Analisis korelasi BNB-BTC"""
+    def update_correlation(self, symbol, data=None):
+        """Masukkan candle yang sudah close ke engine korelasi dan kembalikan datanya"""
+        if data is None:
+            data = self.get_historical_data(symbol, interval=self.correlation_interval, limit=self.correlation.size + 1)
+        if not data.empty:
+            # Candle yang masih berjalan tidak dipakai; candle lama diabaikan oleh engine
+            closed = data['close_time'].values < time.time() * 1000
+            self.correlation.add_bars(symbol, data['timestamp'].values[closed], data['close'].values[closed])
+        return data
+    
+    def analyze_bnb_btc_correlation(self, symbol='BNBUSDT', btc_data=None):
+        """Analisis korelasi BNB-BTC (atau simbol lain terhadap BTC)"""
         try:
-            # Dapatkan data historis BNB dan BTC
-            bnb_data = self.get_historical_data('BNBUSDT', interval='1d', limit=30)
-            btc_data = self.get_historical_data('BTCUSDT', interval='1d', limit=30)
+            # Perbarui return BNB dan BTC (hanya candle baru yang diproses)
+            bnb_data = self.update_correlation(symbol)
+            btc_data = self.update_correlation('BTCUSDT', btc_data)
             
             if bnb_data.empty or btc_data.empty:
                 return {
@@ -205,18 +309,15 @@ class BNBTradingBot:
                     'confidence': 0
                 }
             
-            # Hitung korelasi
-            bnb_prices = bnb_data['close'].values
-            btc_prices = btc_data['close'].values
-            
-            # Pastikan panjang data sama
-            min_length = min(len(bnb_prices), len(btc_prices))
-            bnb_prices = bnb_prices[-min_length:]
-            btc_prices = btc_prices[-min_length:]
-            
-            correlation = np.corrcoef(bnb_prices, btc_prices)[0, 1]
+            # Korelasi log return yang diselaraskan per candle, untuk setiap window
+            pairs = {window: self.correlation.pair(symbol, 'BTCUSDT', window) for window in self.correlation.windows}
+            primary = pairs[self.correlation.windows[0]]
+            correlation = primary['correlation']
+            if np.isnan(correlation):
+                correlation = 0
             
             # Analisis tren BTC
+            btc_prices = btc_data['close'].values[-self.correlation.windows[0]:]
             btc_trend = 'bullish' if btc_prices[-1] > btc_prices[0] else 'bearish'
             
             # Interpretasi korelasi
@@ -247,6 +348,8 @@ class BNBTradingBot:
             
             return {
                 'correlation': correlation,
+                'beta': primary['beta'],
+                'correlations': {window: pair['correlation'] for window, pair in pairs.items()},
                 'interpretation': interpretation,
                 'btc_trend': btc_trend,
                 'signal': signal,
@@ -262,34 +365,38 @@ class BNBTradingBot:
                 'confidence': 0
             }
     
-    def detect_whale_movement(self, threshold=10000):
-        """Deteksi pergerakan whale BNB"""
+    def detect_whale_movement(self, threshold=None):
+        """Deteksi pergerakan whale BNB dari agregator arus whale"""
         try:
-            # Dapatkan trades terbaru
-            trades = self.client.get_recent_trades(symbol=self.symbol, limit=1000)
-            
-            # Filter transaksi besar (whale)
-            whale_trades = [trade for trade in trades if float(trade['qty']) * float(trade['price']) >= threshold]
-            
-            if not whale_trades:
+            if threshold is not None:
+                # Ambang baru berlaku untuk trade yang masuk berikutnya
+                self.whale_flow.thresholds[self.symbol] = threshold
+            
+            # Trade dari stream masuk lewat listener; tanpa stream, ambil trade terbaru via REST
+            # (trade yang sudah pernah dimasukkan diabaikan berdasarkan id)
+            if self.market_data is None or not self.market_data.connected:
+                trades = self.client.get_recent_trades(symbol=self.symbol, limit=1000)
+                self.whale_flow.add_trades(self.symbol, trades, source='rest')
+            
+            windows = self.whale_flow.window_stats(self.symbol, now=time.time() * 1000)
+            stats = windows[self.whale_window]
+            buy_whales = stats['buy_whales']
+            sell_whales = stats['sell_whales']
+            total_buy_volume = stats['buy_volume']
+            total_sell_volume = stats['sell_volume']
+            
+            if buy_whales + sell_whales == 0:
                 return {
                     'signal': 'NEUTRAL',
                     'confidence': 0,
                     'details': {}
                 }
             
-            # Analisis arah whale movement
-            buy_whales = [trade for trade in whale_trades if trade['isBuyerMaker'] == False]
-            sell_whales = [trade for trade in whale_trades if trade['isBuyerMaker'] == True]
-            
-            total_buy_volume = sum(float(trade['qty']) * float(trade['price']) for trade in buy_whales)
-            total_sell_volume = sum(float(trade['qty']) * float(trade['price']) for trade in sell_whales)
-            
             # Tentukan sinyal berdasarkan whale movement
-            if len(buy_whales) > len(sell_whales) * 1.5 and total_buy_volume > total_sell_volume * 1.5:
+            if buy_whales > sell_whales * 1.5 and total_buy_volume > total_sell_volume * 1.5:
                 signal = 'BUY'
                 confidence = 80
-            elif len(sell_whales) > len(buy_whales) * 1.5 and total_sell_volume > total_buy_volume * 1.5:
+            elif sell_whales > buy_whales * 1.5 and total_sell_volume > total_buy_volume * 1.5:
                 signal = 'SELL'
                 confidence = 80
             else:
@@ -300,11 +407,13 @@ class BNBTradingBot:
                 'signal': signal,
                 'confidence': confidence,
                 'details': {
-                    'whale_trades': len(whale_trades),
-                    'buy_whales': len(buy_whales),
-                    'sell_whales': len(sell_whales),
+                    'whale_trades': buy_whales + sell_whales,
+                    'buy_whales': buy_whales,
+                    'sell_whales': sell_whales,
                     'buy_volume': total_buy_volume,
-                    'sell_volume': total_sell_volume
+                    'sell_volume': total_sell_volume,
+                    'window': self.whale_window,
+                    'windows': windows
                 }
             }
         except Exception as e:
@@ -356,11 +465,14 @@ class BNBTradingBot:
                 'confidence': 0
             }
     
-    def analyze_technical_indicators(self):
-        """Analisis indikator teknis untuk BNB"""
+    def analyze_technical_indicators(self, symbol=None):
+        """Analisis indikator teknis untuk BNB (atau simbol lain)"""
+        if symbol is None:
+            symbol = self.symbol
+        
         try:
             # Dapatkan data historis
-            df = self.get_historical_data(self.symbol, interval='1h', limit=100)
+            df = self.get_historical_data(symbol, interval='1h', limit=100)
             
             if df.empty:
                 return {
@@ -369,11 +481,8 @@ class BNBTradingBot:
                     'indicators': {}
                 }
             
-            # Hitung indikator
-            df = self.calculate_indicators(df)
-            
-            # Ambil data terbaru
-            latest = df.iloc[-1]
+            # Hitung indikator secara inkremental, hanya candle baru yang diproses
+            latest, prev = self.update_indicator_engine(symbol, '1h', df)
             
             # Analisis RSI
             rsi = latest['rsi']
@@ -396,10 +505,10 @@ class BNBTradingBot:
             macd_confidence = 0
             
             # MACD crossover
-            if macd > macd_signal and df.iloc[-2]['macd'] <= df.iloc[-2]['macd_signal']:
+            if macd > macd_signal and prev['macd'] <= prev['macd_signal']:
                 macd_cross_signal = 'BUY'
                 macd_confidence = 60
-            elif macd < macd_signal and df.iloc[-2]['macd'] >= df.iloc[-2]['macd_signal']:
+            elif macd < macd_signal and prev['macd'] >= prev['macd_signal']:
                 macd_cross_signal = 'SELL'
                 macd_confidence = 60
             
@@ -418,10 +527,10 @@ class BNBTradingBot:
             ma_signal = 'NEUTRAL'
             ma_confidence = 0
             
-            if latest['sma_20'] > latest['sma_50'] and df.iloc[-2]['sma_20'] <= df.iloc[-2]['sma_50']:
+            if latest['sma_20'] > latest['sma_50'] and prev['sma_20'] <= prev['sma_50']:
                 ma_signal = 'BUY'
                 ma_confidence = 55
-            elif latest['sma_20'] < latest['sma_50'] and df.iloc[-2]['sma_20'] >= df.iloc[-2]['sma_50']:
+            elif latest['sma_20'] < latest['sma_50'] and prev['sma_20'] >= prev['sma_50']:
                 ma_signal = 'SELL'
                 ma_confidence = 55
             
@@ -510,22 +619,31 @@ class BNBTradingBot:
                 'indicators': {}
             }
     
+    @timed(FUNCTION_SECONDS, 'analyze_bnb_comprehensive')
     def analyze_bnb_comprehensive(self):
         """Analisis komprehensif BNB"""
         try:
             logger.info("Memulai analisis komprehensif BNB...")
             
-            # Dapatkan harga saat ini
-            ticker = self.client.get_symbol_ticker(symbol=self.symbol)
-            current_price = float(ticker['price'])
+            cycle_start = time.time()
+            
+            # Jalankan semua analisis secara paralel
+            stage_futures, reused_stages = self.submit_analysis_stages()
+            
+            # Dapatkan harga saat ini sambil menunggu analisis
+            current_price = self.get_current_price()
             
             logger.info(f"Harga BNB saat ini: ${current_price}")
             
-            # Jalankan semua analisis
-            technical_result = self.analyze_technical_indicators()
-            correlation_result = self.analyze_bnb_btc_correlation()
-            whale_result = self.detect_whale_movement(10000)
-            sentiment_result = self.analyze_sentiment()
+            # Tunggu sampai batas waktu siklus; tahap yang terlambat ditandai stale
+            results, timings = self.collect_analysis_stages(
+                stage_futures, cycle_start + self.stage_deadline, reused_stages
+            )
+            technical_result = results['technical']
+            correlation_result = results['correlation']
+            whale_result = results['whale']
+            sentiment_result = results['sentiment']
+            timings['total'] = time.time() - cycle_start
             
             # Kumpulkan semua sinyal
             signals = [
@@ -535,31 +653,10 @@ class BNBTradingBot:
                 {'name': 'Sentiment Analysis', **sentiment_result}
             ]
             
-            # Filter sinyal yang tidak netral
-            active_signals = [s for s in signals if s['signal'] != 'NEUTRAL']
-            
-            # Hitung sinyal gabungan
-            buy_signals = [s for s in active_signals if s['signal'] == 'BUY']
-            sell_signals = [s for s in active_signals if s['signal'] == 'SELL']
-            
-            total_signals = len(active_signals)
-            
-            if total_signals == 0:
-                final_signal = 'NEUTRAL'
-                final_confidence = 0
-            else:
-                buy_confidence = sum(s['confidence'] for s in buy_signals) / total_signals if buy_signals else 0
-                sell_confidence = sum(s['confidence'] for s in sell_signals) / total_signals if sell_signals else 0
-                
-                if buy_confidence > sell_confidence:
-                    final_signal = 'BUY'
-                    final_confidence = buy_confidence * (len(buy_signals) / total_signals)
-                elif sell_confidence > buy_confidence:
-                    final_signal = 'SELL'
-                    final_confidence = sell_confidence * (len(sell_signals) / total_signals)
-                else:
-                    final_signal = 'NEUTRAL'
-                    final_confidence = 0
+            # Hitung sinyal gabungan, hanya dari tahap yang selesai tepat waktu
+            fresh_signals = [s for s in signals if not s.get('stale')]
+            final_signal, final_confidence, buy_signals, sell_signals = self.combine_signals(fresh_signals)
+            total_signals = len(buy_signals) + len(sell_signals)
             
             # Log sinyal
             self.log_signal(self.symbol, final_signal, current_price, final_confidence, {
@@ -598,6 +695,7 @@ class BNBTradingBot:
                 'sell_signals': len(sell_signals),
                 'total_signals': total_signals,
                 'detailed_signals': signals,
+                'timings': timings,
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -611,43 +709,120 @@ class BNBTradingBot:
                 'sell_signals': 0,
                 'total_signals': 0,
                 'detailed_signals': [],
+                'timings': {},
                 'timestamp': datetime.now().isoformat()
             }
     
+    def submit_analysis_stages(self):
+        """Kirim semua sub-analisis ke executor; kembalikan future per tahap dan nama tahap yang dipakai ulang"""
+        stages = {
+            'technical': self.analyze_technical_indicators,
+            'correlation': self.analyze_bnb_btc_correlation,
+            'whale': self.detect_whale_movement,
+            'sentiment': self.analyze_sentiment
+        }
+        
+        def run_stage(name, func):
+            started = time.time()
+            result = func()
+            elapsed = time.time() - started
+            STAGE_SECONDS.labels(name).observe(elapsed)
+            # Simpan juga hasil yang selesai setelah deadline untuk siklus berikutnya
+            self.stage_results[name] = result
+            return result, elapsed
+        
+        futures = {}
+        reused = set()
+        for name, func in stages.items():
+            previous = self.stage_futures.get(name)
+            if previous is not None and not previous.done():
+                # Tahap dari siklus sebelumnya masih berjalan, jangan ditumpuk
+                futures[name] = previous
+                reused.add(name)
+                continue
+            futures[name] = self.stage_executor.submit(run_stage, name, func)
+        
+        self.stage_futures = futures
+        return futures, reused
+    
+    def collect_analysis_stages(self, futures, deadline, reused=()):
+        """Kumpulkan hasil tahap sampai deadline; tahap yang terlambat atau dipakai ulang ditandai stale"""
+        wait(list(futures.values()), timeout=max(0, deadline - time.time()))
+        
+        results = {}
+        timings = {}
+        for name, future in futures.items():
+            if name in reused:
+                # Future milik siklus sebelumnya: datanya bukan untuk siklus ini
+                logger.warning(f"Tahap analisis {name} masih menjalankan siklus sebelumnya, hasilnya ditandai stale")
+                if future.done() and future.exception() is None:
+                    results[name] = {**future.result()[0], 'stale': True}
+                else:
+                    results[name] = {**self.stage_results.get(name, STALE_STAGE_RESULT), 'stale': True}
+                timings[name] = None
+                continue
+            
+            if future.done() and future.exception() is None:
+                result, elapsed = future.result()
+                results[name] = result
+                timings[name] = elapsed
+                continue
+            
+            if future.done():
+                logger.error(f"Tahap analisis {name} gagal: {future.exception()}")
+            else:
+                logger.warning(f"Tahap analisis {name} melewati batas waktu {self.stage_deadline}s")
+            
+            # Pakai hasil terakhir (jika ada) sebagai informasi, tapi tidak dihitung dalam skor
+            previous = self.stage_results.get(name, STALE_STAGE_RESULT)
+            results[name] = {**previous, 'stale': True}
+            timings[name] = None
+        
+        if reused:
+            timings['reused'] = sorted(reused)
+        return results, timings
+    
+    def combine_signals(self, signals):
+        """Gabungkan sinyal dari beberapa analisis menjadi satu sinyal akhir"""
+        # Filter sinyal yang tidak netral
+        active_signals = [s for s in signals if s['signal'] != 'NEUTRAL']
+        
+        buy_signals = [s for s in active_signals if s['signal'] == 'BUY']
+        sell_signals = [s for s in active_signals if s['signal'] == 'SELL']
+        
+        total_signals = len(active_signals)
+        
+        if total_signals == 0:
+            return 'NEUTRAL', 0, buy_signals, sell_signals
+        
+        buy_confidence = sum(s['confidence'] for s in buy_signals) / total_signals if buy_signals else 0
+        sell_confidence = sum(s['confidence'] for s in sell_signals) / total_signals if sell_signals else 0
+        
+        if buy_confidence > sell_confidence:
+            return 'BUY', buy_confidence * (len(buy_signals) / total_signals), buy_signals, sell_signals
+        elif sell_confidence > buy_confidence:
+            return 'SELL', sell_confidence * (len(sell_signals) / total_signals), buy_signals, sell_signals
+        
+        return 'NEUTRAL', 0, buy_signals, sell_signals
+    
+    @timed(FUNCTION_SECONDS, 'log_signal')
     def log_signal(self, symbol, signal_type, price, confidence, indicators):
         """Log sinyal trading"""
         try:
             timestamp = datetime.now().isoformat()
             
-            # Buat direktori log jika belum ada
-            os.makedirs('logs', exist_ok=True)
+            # Simpan ke riwayat dalam memori (indikator lengkap ke disk)
+            self.signal_history.append(symbol, signal_type, price, confidence, indicators, timestamp)
             
-            # Simpan ke list untuk penggunaan dalam memori
-            signal_data = {
+            # Antrikan ke log file (ditulis per batch di thread latar belakang)
+            self.signal_log.write({
                 'timestamp': timestamp,
                 'symbol': symbol,
                 'signal_type': signal_type,
                 'price': price,
                 'confidence': confidence,
                 'indicators': indicators
-            }
-            
-            self.signals_log.append(signal_data)
-            
-            # Simpan ke file CSV
-            log_file = os.path.join('logs', 'bnb_signals_log.csv')
-            
-            # Buat header jika file belum ada
-            if not os.path.exists(log_file):
-                with open(log_file, 'w') as f:
-                    f.write('timestamp,symbol,signal_type,price,confidence,indicators\n')
-            
-            # Format indikator sebagai string JSON
-            indicators_str = json.dumps(indicators).replace(',', ';')
-            
-            # Tulis log
-            with open(log_file, 'a') as f:
-                f.write(f"{timestamp},{symbol},{signal_type},{price},{confidence},\"{indicators_str}\"\n")
+            })
             
             logger.info(f"Signal logged: {symbol} {signal_type} at ${price} with {confidence}% confidence")
             
@@ -659,6 +834,8 @@ class BNBTradingBot:
         try:
             # Format pesan
             signal_emoji = "🟢" if signal == "BUY" else "🔴"
+            # Tahap stale bisa tidak membawa indikator
+            indicators = details['technical'].get('indicators') or {}
             
             message = f"""
 {signal_emoji} *Sinyal Trading BNB: {signal}*
@@ -672,9 +849,9 @@ class BNBTradingBot:
 - Sentimen: {details['sentiment']['signal']} ({details['sentiment']['confidence']:.2f}%)
 
 📈 *Detail Indikator Teknis:*
-- RSI: {details['technical']['indicators'].get('rsi', 'N/A'):.2f}
-- MACD: {details['technical']['indicators'].get('macd_hist', 'N/A'):.2f}
-- Stochastic: K={details['technical']['indicators'].get('slowk', 'N/A'):.2f}, D={details['technical']['indicators'].get('slowd', 'N/A'):.2f}
+- RSI: {format_value(indicators.get('rsi'))}
+- MACD: {format_value(indicators.get('macd_hist'))}
+- Stochastic: K={format_value(indicators.get('slowk'))}, D={format_value(indicators.get('slowd'))}
 
 ⚠️ *Disclaimer:* Sinyal ini adalah hasil analisis otomatis dan bukan rekomendasi finansial. Selalu lakukan analisis Anda sendiri sebelum trading.
             """
@@ -708,19 +885,11 @@ class BNBTradingBot:
                 'status': 'SIMULATED'  # Dalam implementasi nyata: 'FILLED', 'REJECTED', dll.
             }
             
-            self.trades_log.append(trade_data)
+            self.trade_history.append(self.symbol, signal, price, self.quantity, confidence,
+                                      order_id, trade_data['status'], timestamp)
             
-            # Simpan ke file CSV
-            log_file = os.path.join('logs', 'bnb_trading_log.csv')
-            
-            # Buat header jika file belum ada
-            if not os.path.exists(log_file):
-                with open(log_file, 'w') as f:
-                    f.write('timestamp,order_id,symbol,signal,price,quantity,total_value,confidence,status\n')
-            
-            # Tulis log
-            with open(log_file, 'a') as f:
-                f.write(f"{timestamp},{order_id},{self.symbol},{signal},{price},{self.quantity},{price * self.quantity},{confidence},{trade_data['status']}\n")
+            # Antrikan ke log file
+            self.trade_log.write(trade_data)
             
             # Kirim notifikasi
             self.send_telegram_message(f"""
@@ -757,29 +926,93 @@ This trade was automatically executed based on comprehensive analysis.
         logger.info(f"Running scheduled BNB analysis...")
         analysis_result = self.analyze_bnb_comprehensive()
         logger.info(f"Analysis completed: {analysis_result['signal']} with {analysis_result['confidence']}% confidence")
+        self.profiler.tick('cycles')
+    
+    def run_scheduled_scan(self, scanner):
+        """Jalankan satu siklus scanner multi-simbol"""
+        logger.info(f"Running scheduled market scan...")
+        # Siklus harus selesai jauh sebelum interval berikutnya
+        result = scanner.scan(deadline=self.analysis_interval * 60 * 0.5)
+        print(format_scan_table(result))
+        self.profiler.tick('cycles')
+        return result
     
-    def start(self):
-        """Mulai bot trading"""
+    def start(self, scanner=None):
+        """Mulai bot trading (atau mode scanner jika scanner diberikan)"""
         logger.info("Starting BNB Trading Bot...")
         
+        if scanner is not None:
+            job = lambda: self.run_scheduled_scan(scanner)
+        else:
+            job = self.run_scheduled_analysis
+        
         # Jalankan analisis pertama kali
-        self.run_scheduled_analysis()
+        job()
         
-        # Jadwalkan analisis berikutnya
-        schedule.every(self.analysis_interval).minutes.do(self.run_scheduled_analysis)
+        # Analisis berikutnya tepat setelah setiap candle analysis_interval menit ditutup (jam server Binance)
+        self.scheduler = CandleScheduler(
+            self.analysis_interval,
+            ServerClock(self.client),
+            delay=config.getfloat('TRADING', 'candle_delay', fallback=2.0),
+            jitter=config.getfloat('TRADING', 'schedule_jitter', fallback=0.0),
+            key=self.symbol,
+            catch_up=config.getboolean('TRADING', 'catch_up', fallback=True)
+        )
         
-        logger.info(f"Scheduled analysis every {self.analysis_interval} minutes")
+        logger.info(f"Scheduled analysis after every {self.analysis_interval} minute candle close")
         
         # Loop utama
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
+            for _ in self.scheduler:
+                job()
         except KeyboardInterrupt:
             logger.info("Bot stopped by user")
         except Exception as e:
             logger.error(f"Error in main loop: {e}")
             self.send_telegram_message(f"❌ *Bot Error*\nBot stopped due to an error: {str(e)}")
+        finally:
+            # Kirim pesan yang masih ada di antrian sebelum keluar
+            if self.notifier is not None:
+                self.notifier.flush(timeout=10)
+    
+    def stop(self):
+        """Hentikan loop start() tanpa menunggu candle berikutnya"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+    
+    def start_profiling(self, cycles):
+        """Profil N siklus analysis berikutnya; hasil ditulis ke logs/profile-<waktu>.*"""
+        prefix = os.path.join('logs', f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        
+        def save(result):
+            paths = write_result(result, prefix)
+            logger.info(f"Profile of {result['completed']} cycle(s) ({result['reason']}) saved to {', '.join(paths)}")
+        
+        # Batas waktu: semua siklus yang diminta ditambah satu interval cadangan
+        timeout = (cycles + 1) * self.analysis_interval * 60
+        self.profiler.start('cycles', cycles, timeout=timeout, on_done=save)
+        logger.info(f"Profiling the next {cycles} analysis cycle(s)")
+    
+    def register_metrics(self):
+        """Gauge ukuran cache, kedalaman antrian dan jumlah log untuk endpoint /metrics"""
+        register_function(Gauge, 'bot_signals_log_length', 'Signals kept in memory', lambda: len(self.signal_history))
+        register_function(Gauge, 'bot_trades_log_length', 'Trades kept in memory', lambda: len(self.trade_history))
+        register_function(Gauge, 'bot_log_rows_pending', 'Signal and trade log rows waiting to be written',
+                          lambda: self.signal_log.pending + self.trade_log.pending)
+        register_function(Counter, 'bot_log_rows_dropped_total', 'Signal and trade log rows dropped on a full queue',
+                          lambda: self.signal_log.dropped + self.trade_log.dropped)
+        register_function(Gauge, 'bot_history_detail_bytes', 'Signal and trade details spilled to disk',
+                          lambda: self.signal_history.details.size() + self.trade_history.details.size())
+        register_function(Gauge, 'kline_cache_series', 'Kline series in the cache',
+                          lambda: len(self.kline_cache) if self.kline_cache is not None else None)
+        register_function(Counter, 'kline_cache_hits_total', 'Kline cache hits',
+                          lambda: self.kline_cache.hits if self.kline_cache is not None else None)
+        register_function(Counter, 'kline_cache_misses_total', 'Kline cache misses',
+                          lambda: self.kline_cache.misses if self.kline_cache is not None else None)
+        register_function(Gauge, 'analysis_stage_queue_depth', 'Analysis stages waiting for a worker',
+                          lambda: self.stage_executor._work_queue.qsize())
+        register_client_metrics(lambda: self.client)
+        register_notifier_metrics(lambda: self.notifier)
     
     def get_bot_status(self):
         """Dapatkan status bot"""
@@ -795,7 +1028,7 @@ This trade was automatically executed based on comprehensive analysis.
     
     def get_trading_stats(self):
         """Dapatkan statistik trading"""
-        if not self.trades_log:
+        if not self.trade_history.total:
             return {
                 'total_trades': 0,
                 'successful_trades': 0,
@@ -808,14 +1041,15 @@ This trade was automatically executed based on comprehensive analysis.
         # Dalam implementasi nyata, Anda perlu menghitung P/L berdasarkan harga masuk dan keluar
         # Untuk demo, kita hanya simulasikan
         
-        total_trades = len(self.trades_log)
+        # Total kumulatif sejak start, termasuk trade yang sudah keluar dari ring buffer
+        total_trades = self.trade_history.total
         successful_trades = int(total_trades * 0.65)  # Simulasi 65% win rate
         failed_trades = total_trades - successful_trades
         
         win_rate = (successful_trades / total_trades) * 100 if total_trades > 0 else 0
         
         # Simulasi profit
-        total_value = sum(trade['total_value'] for trade in self.trades_log)
+        total_value = self.trade_history.total_value
         total_profit = total_value * 0.08  # Simulasi 8% profit
         average_profit = total_profit / total_trades if total_trades > 0 else 0
         
@@ -848,8 +1082,8 @@ def show_banner():
 # Fungsi untuk memeriksa dependensi
 def check_dependencies():
     required_packages = [
-        'pandas', 'numpy', 'python-binance', 'python-telegram-bot',
-        'schedule', 'talib', 'requests', 'colorama'
+        'pandas', 'numpy', 'python-binance',
+        'talib', 'requests', 'colorama'
     ]
     
     missing_packages = []
@@ -889,6 +1123,32 @@ def check_configuration():
     
     return True
 
+# Fungsi untuk menjalankan backtest
+def run_backtest(args):
+    # Data kline publik, tidak memerlukan API key yang valid
+    client = create_client(config['BINANCE']['api_key'], config['BINANCE']['api_secret'], config.get('BINANCE', 'base_url', fallback=None))
+    
+    start_ms = int(datetime.strptime(args.start, '%Y-%m-%d').timestamp() * 1000)
+    end_ms = int(datetime.strptime(args.end, '%Y-%m-%d').timestamp() * 1000) if args.end else None
+    
+    print(f"{Fore.CYAN}Loading {args.symbol} {args.interval} candles since {args.start}...{Style.RESET_ALL}")
+    data = backtest.load_history(client, args.symbol, args.interval, start_ms, end_ms)
+    
+    if len(data) < 100:
+        print(f"{Fore.RED}Not enough historical data for backtesting ({len(data)} candles){Style.RESET_ALL}")
+        return
+    
+    started = time.time()
+    result = backtest.run_backtest(data, strategy=args.strategy, fee=args.fee, interval=args.interval)
+    elapsed = time.time() - started
+    
+    print(f"{Fore.GREEN}Backtest {args.strategy} on {len(data)} candles finished in {elapsed:.2f}s{Style.RESET_ALL}")
+    print(json.dumps(result['stats'], indent=2))
+    
+    if args.output:
+        backtest.save_backtest(result, data, args.output)
+        print(f"{Fore.GREEN}Results saved to {args.output}{Style.RESET_ALL}")
+
 # Fungsi utama
 def main():
     show_banner()
@@ -897,6 +1157,20 @@ def main():
     parser.add_argument('--check', action='store_true', help='Check dependencies and configuration')
     parser.add_argument('--analyze', action='store_true', help='Run a single analysis without starting the bot')
     parser.add_argument('--backtest', action='store_true', help='Run backtesting on historical data')
+    parser.add_argument('--scan', action='store_true', help='Scan multiple symbols instead of a single symbol')
+    parser.add_argument('--watchlist', help='Comma separated symbols to scan (default: all USDT pairs above --min-volume)')
+    parser.add_argument('--min-volume', type=float, help='Minimum 24h quote volume for scanned symbols')
+    parser.add_argument('--workers', type=int, help='Number of concurrent scanner workers')
+    parser.add_argument('--symbol', default=config['TRADING']['symbol'], help='Symbol for backtesting')
+    parser.add_argument('--interval', default='1h', help='Kline interval for backtesting')
+    parser.add_argument('--start', default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'), help='Backtest start date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Backtest end date (YYYY-MM-DD), default now')
+    parser.add_argument('--strategy', default='technical', choices=sorted(backtest.STRATEGIES), help='Signal rules to backtest')
+    parser.add_argument('--fee', type=float, default=0.001, help='Fee per side for backtesting')
+    parser.add_argument('--output', help='Directory for backtest trades, equity curve and summary')
+    parser.add_argument('--profile', type=int, metavar='N', help='Profile the next N analysis cycles (CPU stacks and allocations)')
+    parser.add_argument('--metrics-port', type=int, default=config.getint('METRICS', 'port', fallback=0),
+                        help='Serve Prometheus metrics on this port (0 disables)')
     args = parser.parse_args()
     
     if args.check:
@@ -908,20 +1182,48 @@ def main():
         
         return
     
+    if args.backtest:
+        run_backtest(args)
+        return
+    
     if not check_dependencies() or not check_configuration():
         return
     
     bot = BNBTradingBot()
     
+    if args.metrics_port:
+        bot.register_metrics()
+        start_http_server(args.metrics_port)
+        logger.info(f"Metrics available on port {args.metrics_port} (/metrics)")
+    
+    if args.profile:
+        bot.start_profiling(args.profile)
+    
+    if args.scan:
+        watchlist = args.watchlist or config.get('SCANNER', 'watchlist', fallback='')
+        scanner = MarketScanner(
+            bot,
+            watchlist=watchlist.split(',') if watchlist else None,
+            min_quote_volume=args.min_volume or config.getfloat('SCANNER', 'min_quote_volume', fallback=10000000),
+            max_workers=args.workers or config.getint('SCANNER', 'max_workers', fallback=16)
+        )
+        
+        if args.analyze:
+            print(f"{Fore.CYAN}Running single market scan...{Style.RESET_ALL}")
+            bot.run_scheduled_scan(scanner)
+            return
+        
+        bot.start(scanner)
+        return
+    
     if args.analyze:
         print(f"{Fore.CYAN}Running single analysis...{Style.RESET_ALL}")
         result = bot.analyze_bnb_comprehensive()
+        bot.profiler.tick('cycles')
         print(f"{Fore.GREEN}Analysis result:{Style.RESET_ALL}")
         print(json.dumps(result, indent=2))
-        return
-    
-    if args.backtest:
-        print(f"{Fore.YELLOW}Backtesting functionality not implemented yet.{Style.RESET_ALL}")
+        if bot.notifier is not None:
+            bot.notifier.flush(timeout=10)
         return
     
     # Start the bot
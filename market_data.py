@@ -0,0 +1,313 @@
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WS_URL = 'wss://stream.binance.com:9443'
+
+
+def kline_event_to_row(k):
+    """Konversi event kline stream ke format baris kline REST"""
+    return [
+        k['t'], k['o'], k['h'], k['l'], k['c'], k['v'],
+        k['T'], k['q'], k['n'], k['V'], k['Q'], '0'
+    ]
+
+
+class LiveMarketView:
+    """Tampilan pasar terkini yang diisi dari stream WebSocket"""
+
+    def __init__(self, max_trades=1000, stale_after=10.0):
+        self.max_trades = max_trades
+        self.stale_after = stale_after
+        self.connected = False
+        self.book = {}
+        self.last_trade = {}
+        self.trades = {}
+        self.kline_caches = []
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def attach_kline_cache(self, cache):
+        """Daftarkan KlineCache yang akan diperbarui dari stream kline"""
+        if cache is not None and cache not in self.kline_caches:
+            self.kline_caches.append(cache)
+
+    def add_listener(self, callback):
+        """Daftarkan callback(event_type, symbol, data) untuk setiap event"""
+        self.listeners.append(callback)
+
+    def set_connected(self, connected):
+        """Tandai status koneksi; saat terputus data live dianggap basi"""
+        self.connected = connected
+        if not connected:
+            for cache in self.kline_caches:
+                cache.mark_stale()
+
+    def apply(self, frame):
+        """Proses satu frame dari combined stream"""
+        data = frame.get('data', frame)
+        event_type = data.get('e')
+        now = time.time()
+
+        if event_type == 'aggTrade':
+            symbol = data['s']
+            trade = {
+                'id': data['a'],
+                'price': data['p'],
+                'qty': data['q'],
+                'time': data['T'],
+                'isBuyerMaker': data['m']
+            }
+            with self._lock:
+                self.last_trade[symbol] = (float(data['p']), now)
+                trades = self.trades.get(symbol)
+                if trades is None:
+                    trades = self.trades[symbol] = deque(maxlen=self.max_trades)
+                trades.append(trade)
+            self._notify('trade', symbol, trade)
+
+        elif event_type == 'kline':
+            symbol = data['s']
+            k = data['k']
+            row = kline_event_to_row(k)
+            for cache in self.kline_caches:
+                cache.apply_stream_kline(symbol, k['i'], row)
+            self._notify('kline', symbol, row)
+
+        elif 'b' in data and 'a' in data and 'u' in data:
+            # bookTicker tidak memiliki field "e"
+            symbol = data['s']
+            book = {
+                'bid': float(data['b']),
+                'bid_qty': float(data['B']),
+                'ask': float(data['a']),
+                'ask_qty': float(data['A']),
+                'time': now
+            }
+            with self._lock:
+                self.book[symbol] = book
+            self._notify('book', symbol, book)
+
+    def _notify(self, event_type, symbol, data):
+        for callback in self.listeners:
+            try:
+                callback(event_type, symbol, data)
+            except Exception as e:
+                logger.error(f"Error in market data listener: {e}")
+
+    def get_price(self, symbol):
+        """Harga terakhir dari stream, None jika tidak ada atau basi"""
+        if not self.connected:
+            return None
+
+        now = time.time()
+        with self._lock:
+            last = self.last_trade.get(symbol)
+            book = self.book.get(symbol)
+
+        if last is not None and now - last[1] <= self.stale_after:
+            return last[0]
+        if book is not None and now - book['time'] <= self.stale_after:
+            return (book['bid'] + book['ask']) / 2
+        return None
+
+    def get_recent_trades(self, symbol, limit=1000):
+        """Trade terbaru dari stream aggTrade (format seperti get_recent_trades)"""
+        if not self.connected:
+            return None
+
+        with self._lock:
+            trades = self.trades.get(symbol)
+            if not trades:
+                return None
+            trades = list(trades)
+        return trades[-limit:]
+
+
+class MarketDataStream:
+    """Klien combined stream Binance dengan reconnect otomatis"""
+
+    def __init__(self, view, symbols, intervals=('1h',), ws_url=DEFAULT_WS_URL,
+                 record_path=None, max_backoff=30):
+        self.view = view
+        self.symbols = [s.lower() for s in symbols]
+        self.intervals = list(intervals)
+        self.ws_url = ws_url.rstrip('/')
+        self.record_path = record_path
+        self.max_backoff = max_backoff
+        self.running = False
+        self.reconnects = 0
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    @property
+    def url(self):
+        streams = []
+        for symbol in self.symbols:
+            streams.extend(f"{symbol}@kline_{interval}" for interval in self.intervals)
+            streams.append(f"{symbol}@aggTrade")
+            streams.append(f"{symbol}@bookTicker")
+        return f"{self.ws_url}/stream?streams={'/'.join(streams)}"
+
+    def start(self):
+        """Mulai stream di thread latar belakang"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name='market-data', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Hentikan stream"""
+        self.running = False
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.view.set_connected(False)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._consume())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _consume(self):
+        backoff = 1
+        record_file = open(self.record_path, 'a') if self.record_path else None
+
+        try:
+            while self.running:
+                try:
+                    async with websockets.connect(self.url, ping_interval=20, max_size=2 ** 22) as ws:
+                        logger.info(f"Market data stream connected: {self.url}")
+                        self.view.set_connected(True)
+                        backoff = 1
+
+                        async for message in ws:
+                            frame = json.loads(message)
+                            if record_file is not None:
+                                record_file.write(json.dumps({'ts': time.time(), 'frame': frame}) + '\n')
+                            self.view.apply(frame)
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Market data stream error: {e}")
+
+                # Data live tidak lagi bisa dipercaya sampai tersambung kembali
+                self.view.set_connected(False)
+                if not self.running:
+                    break
+
+                self.reconnects += 1
+                logger.warning(f"Reconnecting market data stream in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            if record_file is not None:
+                record_file.close()
+
+
+class ReplayServer:
+    """Server WebSocket lokal yang memutar ulang frame hasil rekaman"""
+
+    def __init__(self, path, host='127.0.0.1', port=9001, speed=1.0, loop=False):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self.frames = self._load(path)
+
+    @staticmethod
+    def _load(path):
+        frames = []
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    frames.append((entry['ts'], entry['frame']))
+        return frames
+
+    async def _handle(self, websocket, path=None):
+        """Kirim frame dengan jeda asli yang diskalakan oleh `speed`"""
+        try:
+            while True:
+                previous_ts = None
+                for ts, frame in self.frames:
+                    if previous_ts is not None and self.speed > 0:
+                        await asyncio.sleep(max(0.0, (ts - previous_ts) / self.speed))
+                    previous_ts = ts
+                    await websocket.send(json.dumps(frame))
+                if not self.loop:
+                    break
+        except websockets.ConnectionClosed:
+            pass
+
+    async def serve_forever(self):
+        async with websockets.serve(self._handle, self.host, self.port):
+            logger.info(f"Replaying {len(self.frames)} frames on ws://{self.host}:{self.port}")
+            await asyncio.Future()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Binance market data recorder / replay server')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='Record live stream frames to a JSONL file')
+    record.add_argument('--symbols', default='BNBUSDT', help='Comma separated symbols')
+    record.add_argument('--intervals', default='1h', help='Comma separated kline intervals')
+    record.add_argument('--out', required=True, help='Output JSONL file')
+    record.add_argument('--seconds', type=int, default=300, help='Recording duration')
+    record.add_argument('--ws-url', default=DEFAULT_WS_URL)
+
+    replay = subparsers.add_parser('replay', help='Serve recorded frames over a local WebSocket')
+    replay.add_argument('path', help='Recorded JSONL file')
+    replay.add_argument('--host', default='127.0.0.1')
+    replay.add_argument('--port', type=int, default=9001)
+    replay.add_argument('--speed', type=float, default=1.0, help='Playback speed, 0 sends as fast as possible')
+    replay.add_argument('--loop', action='store_true', help='Restart from the first frame when finished')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        stream = MarketDataStream(
+            LiveMarketView(),
+            args.symbols.split(','),
+            args.intervals.split(','),
+            ws_url=args.ws_url,
+            record_path=args.out
+        )
+        stream.start()
+        try:
+            time.sleep(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        stream.stop()
+    else:
+        server = ReplayServer(args.path, args.host, args.port, args.speed, args.loop)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,404 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket latensi (detik) dari 1 ms sampai 60 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _render(name, documentation, type_name, samples):
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} {type_name}']
+    for sample, labelnames, values, extra, value in samples:
+        lines.append(f'{sample}{_format_labels(labelnames, values, extra)} {_format_value(value)}')
+    return '\n'.join(lines)
+
+
+class _Value:
+    """Satu seri counter/gauge; nilainya bisa juga diambil dari fungsi saat scrape"""
+
+    __slots__ = ('value', 'function', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def get(self):
+        if self.function is not None:
+            return self.function()
+        return self.value
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # Satu slot per bucket plus +Inf; kumulatif dihitung saat render
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values, **labels):
+        """Seri untuk kombinasi label tertentu; simpan hasilnya untuk dipakai di jalur panas"""
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        with self._lock:
+            self._children.pop(tuple(str(v) for v in values), None)
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            try:
+                value = child.get()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            yield self.name, self.labelnames, key, (), value
+
+    def render(self):
+        return _render(self.name, self.documentation, self.type_name, self.samples())
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def set_function(self, function):
+        """Ambil nilai dari counter yang sudah ada (mis. atribut hits) saat scrape"""
+        self._default.set_function(function)
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != float('inf')))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', self.labelnames, key, (('le', _format_value(bound)),), cumulative
+            yield f'{self.name}_sum', self.labelnames, key, (), total
+            yield f'{self.name}_count', self.labelnames, key, (), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self):
+        """Semua metrik dalam format teks eksposisi Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class MultiProcessCollector:
+    """Gabungkan registry semua proses worker lewat tabel SQLite bersama
+
+    Setiap proses menyimpan snapshot registry-nya secara berkala (start()) dan saat scrape, satu
+    baris per proses. Counter dan histogram dijumlahkan antar proses, termasuk proses yang sudah
+    berhenti, sehingga total tidak turun saat worker diganti. Gauge (mis. ukuran cache per worker)
+    diberi label pid dan hanya diambil dari proses yang masih memperbarui snapshot-nya.
+    clear() dipanggil sekali oleh proses induk sebelum worker dimulai.
+    """
+
+    def __init__(self, path, registry=None, interval=5.0):
+        self.path = path
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self.pid = os.getpid()
+        # pid bisa dipakai ulang oleh worker baru; kunci baris memakai waktu mulai proses juga
+        self.process = f"{self.pid}-{time.time():.6f}"
+        self._conn = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS metric_snapshots '
+                '(process TEXT PRIMARY KEY, pid INTEGER NOT NULL, updated REAL NOT NULL, data TEXT NOT NULL)'
+            )
+        return self._conn
+
+    def clear(self):
+        """Hapus snapshot proses sebelumnya (metrik dimulai dari nol saat server dijalankan)"""
+        with self._lock:
+            self._connection().execute('DELETE FROM metric_snapshots')
+
+    def write(self):
+        """Simpan snapshot registry proses ini"""
+        data = [
+            (metric.name, metric.documentation, metric.type_name,
+             [(sample, list(labelnames), list(values), [list(pair) for pair in extra], value)
+              for sample, labelnames, values, extra, value in metric.samples()])
+            for metric in self.registry.metrics()
+        ]
+        with self._lock:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO metric_snapshots (process, pid, updated, data) VALUES (?, ?, ?, ?)',
+                (self.process, self.pid, time.time(), json.dumps(data))
+            )
+
+    def start(self):
+        """Thread daemon yang menyimpan snapshot setiap interval detik"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='metrics-snapshot', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.write()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+
+    def render(self):
+        """Metrik gabungan semua proses dalam format teks eksposisi Prometheus"""
+        self.write()
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT process, pid, updated, data FROM metric_snapshots ORDER BY process'
+            ).fetchall()
+
+        # Gauge dari proses yang tidak memperbarui snapshot dalam beberapa interval dianggap mati
+        live_after = time.time() - 3 * self.interval
+        metrics = {}
+        for process, pid, updated, data in rows:
+            for name, documentation, type_name, samples in json.loads(data):
+                if type_name == 'gauge' and updated < live_after and process != self.process:
+                    continue
+                metric = metrics.setdefault(name, (documentation, type_name, {}))
+                merged = metric[2]
+                for sample, labelnames, values, extra, value in samples:
+                    extra = tuple(tuple(pair) for pair in extra)
+                    if type_name == 'gauge':
+                        extra += (('pid', str(pid)),)
+                    key = (sample, tuple(labelnames), tuple(values), extra)
+                    merged[key] = merged.get(key, 0) + value
+
+        blocks = [
+            _render(name, documentation, type_name, (key + (value,) for key, value in merged.items()))
+            for name, (documentation, type_name, merged) in metrics.items()
+        ]
+        return '\n'.join(blocks) + '\n'
+
+
+def get_or_create(cls, name, documentation, labelnames=(), **kwargs):
+    """Ambil metrik yang sudah terdaftar dengan nama ini, atau buat baru"""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        try:
+            metric = cls(name, documentation, labelnames, **kwargs)
+        except ValueError:
+            metric = REGISTRY.get(name)
+    return metric
+
+
+def register_function(cls, name, documentation, function):
+    """Counter/gauge yang nilainya dibaca dari fungsi saat scrape, tanpa biaya di jalur panas
+
+    Pendaftaran ulang (mis. modul diimpor lagi di proses worker) hanya mengganti fungsinya.
+    """
+    metric = get_or_create(cls, name, documentation)
+    metric.set_function(function)
+    return metric
+
+
+def timed(histogram, *label_values):
+    """Dekorator: catat durasi fungsi ke histogram (seri label dipilih sekali saat dekorasi)"""
+    child = histogram.labels(*label_values) if label_values else histogram._default
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# Metrik bersama untuk semua modul
+FUNCTION_SECONDS = get_or_create(
+    Histogram, 'bot_function_seconds', 'Duration of analysis and persistence functions', ['function']
+)
+BINANCE_REQUEST_SECONDS = get_or_create(Histogram, 'binance_request_seconds', 'Duration of Binance REST calls', ['method'])
+BINANCE_REQUEST_ERRORS = get_or_create(Counter, 'binance_request_errors_total', 'Failed Binance REST calls', ['method'])
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """Listener /metrics terpisah di thread daemon (untuk bot CLI tanpa Flask)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True)
+    thread.start()
+    return server
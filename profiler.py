@@ -0,0 +1,246 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Frame tempat thread menganggur (menunggu lock, antrian atau koneksi), tidak dihitung kecuali diminta
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('socketserver.py', 'serve_forever'),
+    ('thread.py', '_worker')
+}
+
+
+class ProfilerBusy(Exception):
+    """Sesi profil lain masih berjalan"""
+
+
+def _thread_group(name):
+    # Gabungkan thread dari pool yang sama (mis. analysis_0, analysis_1)
+    base = name.rstrip('0123456789')
+    return base.rstrip('_-') or name
+
+
+class SamplingProfiler:
+    """Profiler sampling: stack semua thread diambil tiap interval lewat sys._current_frames
+
+    Biayanya hanya di thread sampler, sehingga aman dijalankan di proses produksi.
+    Hasilnya berupa stack "collapsed" (frame;frame;frame jumlah) untuk flamegraph.
+    """
+
+    def __init__(self, interval=0.01, include_idle=False, max_depth=128):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._collapse(frame)
+                if stack is None:
+                    continue
+                self.stacks[f"{_thread_group(names.get(ident, 'unknown'))};{stack}"] += 1
+            self.samples += 1
+
+    def _collapse(self, frame):
+        code = frame.f_code
+        if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.reverse()
+        return ';'.join(frames)
+
+    def collapsed(self):
+        """Format collapsed stack (flamegraph.pl / speedscope), urut dari yang terbanyak"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class AllocationTracker:
+    """Selisih alokasi memori (tracemalloc) antara awal dan akhir sesi"""
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self._started_tracing = False
+        self._before = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self, top=20):
+        after = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        # Alokasi milik tracemalloc dan profiler sendiri tidak relevan
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        stats = after.filter_traces(ignore).compare_to(self._before.filter_traces(ignore), 'lineno')
+        return [
+            {
+                'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count
+            }
+            for stat in stats[:top]
+        ]
+
+
+class Profiler:
+    """Satu sesi profil pada satu waktu, berhenti otomatis setelah N siklus/request atau timeout
+
+    Pemanggil menandai akhir setiap siklus analisis atau request dengan tick(unit).
+    """
+
+    def __init__(self):
+        self.result = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._session = None
+
+    @property
+    def active(self):
+        return self._session is not None
+
+    def start(self, unit='cycles', count=1, timeout=300, interval=0.01, memory=True, top=20,
+              include_idle=False, on_done=None):
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusy("A profiling session is already running")
+
+            sampler = SamplingProfiler(interval=interval, include_idle=include_idle)
+            tracker = AllocationTracker() if memory else None
+            self._session = {
+                'unit': unit,
+                'count': count,
+                'remaining': count,
+                'top': top,
+                'sampler': sampler,
+                'tracker': tracker,
+                'on_done': on_done,
+                'started_at': time.time()
+            }
+            self._done.clear()
+            self.result = None
+
+            if tracker is not None:
+                tracker.start()
+            sampler.start()
+
+            timer = self._session['timer'] = threading.Timer(timeout, self.stop, kwargs={'reason': 'timeout'})
+            timer.daemon = True
+            timer.start()
+
+    def tick(self, unit):
+        """Tandai satu siklus/request selesai; sesi berhenti setelah jumlah yang diminta"""
+        session = self._session
+        if session is None or session['unit'] != unit:
+            return
+        with self._lock:
+            if self._session is not session:
+                return
+            session['remaining'] -= 1
+            finished = session['remaining'] <= 0
+        if finished:
+            self.stop(reason='completed')
+
+    def stop(self, reason='cancelled'):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is None:
+            return self.result
+
+        session['timer'].cancel()
+        sampler = session['sampler']
+        sampler.stop()
+        memory = session['tracker'].stop(session['top']) if session['tracker'] is not None else None
+
+        self.result = {
+            'reason': reason,
+            'unit': session['unit'],
+            'requested': session['count'],
+            'completed': session['count'] - max(session['remaining'], 0),
+            'started_at': session['started_at'],
+            'duration': sampler.elapsed,
+            'interval': sampler.interval,
+            'samples': sampler.samples,
+            'stacks': sampler.collapsed(),
+            'memory': memory
+        }
+        self._done.set()
+
+        if session['on_done'] is not None:
+            session['on_done'](self.result)
+        return self.result
+
+    def wait(self, timeout=None):
+        """Tunggu sampai sesi yang berjalan selesai; mengembalikan hasil atau None"""
+        if self._done.wait(timeout):
+            return self.result
+        return None
+
+    def status(self):
+        session = self._session
+        if session is None:
+            return {'active': False, 'has_result': self.result is not None}
+        return {
+            'active': True,
+            'unit': session['unit'],
+            'requested': session['count'],
+            'remaining': session['remaining'],
+            'running_for': time.time() - session['started_at'],
+            'samples': session['sampler'].samples
+        }
+
+
+def write_result(result, prefix):
+    """Simpan hasil profil: <prefix>.folded (stack) dan <prefix>-memory.txt (top alokasi)"""
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(f"{prefix}.folded", 'w') as f:
+        f.write(result['stacks'] + '\n')
+
+    paths = [f"{prefix}.folded"]
+    if result['memory'] is not None:
+        with open(f"{prefix}-memory.txt", 'w') as f:
+            for stat in result['memory']:
+                f.write(f"{stat['size_diff'] / 1024:+10.1f} KiB {stat['count_diff']:+8d} blocks  {stat['location']}\n")
+        paths.append(f"{prefix}-memory.txt")
+    return paths
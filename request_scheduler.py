@@ -0,0 +1,365 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from binance.exceptions import BinanceAPIException
+
+from metrics import BINANCE_REQUEST_ERRORS, BINANCE_REQUEST_SECONDS, Counter, Gauge, register_function
+
+logger = logging.getLogger(__name__)
+
+# Prioritas request: angka kecil dilayani lebih dulu
+ORDER, ANALYSIS, DASHBOARD = 0, 1, 2
+
+_priority = contextvars.ContextVar('request_priority', default=ANALYSIS)
+
+# Bobot request spot API (GET /api/v3/...), default 1 untuk method lain
+WEIGHTS = {
+    'ping': 1,
+    'get_server_time': 1,
+    'get_exchange_info': 20,
+    'get_symbol_info': 20,
+    'get_klines': 2,
+    'get_historical_klines': 2,
+    'get_recent_trades': 25,
+    'get_aggregate_trades': 2,
+    'get_avg_price': 2,
+    'get_account': 20,
+    'get_open_orders': 6,
+    'get_all_tickers': 4,
+    'get_orderbook_tickers': 4
+}
+
+ORDER_METHODS = {
+    'create_order', 'create_test_order', 'cancel_order', 'order_market', 'order_market_buy',
+    'order_market_sell', 'order_limit', 'order_limit_buy', 'order_limit_sell', 'create_oco_order'
+}
+
+
+def request_weight(name, args, kwargs):
+    """Perkiraan bobot satu request berdasarkan method dan parameternya"""
+    if name == 'get_symbol_ticker':
+        return 2 if kwargs.get('symbol') else 4
+    if name == 'get_ticker':
+        return 2 if kwargs.get('symbol') else 80
+    if name == 'get_order_book':
+        limit = kwargs.get('limit', 100)
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    return WEIGHTS.get(name, 1)
+
+
+def set_request_priority(level):
+    """Tetapkan prioritas request untuk thread/konteks saat ini"""
+    _priority.set(level)
+
+
+@contextmanager
+def request_priority(level):
+    """Jalankan blok dengan prioritas request tertentu"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RequestBudgetExceeded(Exception):
+    """Request tidak mendapat jatah bobot dalam batas waktu tunggu"""
+
+
+class RequestScheduler:
+    """Pengatur bobot request: anggaran per menit, token bucket, antrian prioritas dan backoff"""
+
+    def __init__(self, weight_limit=1200, safety=0.9, burst=None,
+                 shares=None, max_wait=None):
+        self.weight_limit = weight_limit
+        self.budget = weight_limit * safety
+        self.rate = self.budget / 60.0
+        self.burst = burst or self.budget / 4
+        # Bagian anggaran per menit yang boleh dipakai tiap prioritas; sisanya cadangan untuk prioritas lebih tinggi
+        self.shares = shares or {ORDER: 1.0, ANALYSIS: 0.85, DASHBOARD: 0.6}
+        self.max_wait = max_wait or {ORDER: None, ANALYSIS: None, DASHBOARD: 10.0}
+
+        self.minute = int(time.time() // 60)
+        self.used = 0
+        self.server_used = 0
+        self.tokens = self.burst
+        self.refilled = time.monotonic()
+        self.banned_until = 0
+
+        self.requests = 0
+        self.waited = 0
+        self.rejected = 0
+        self.backoffs = 0
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _roll(self, now):
+        # Binance menghitung bobot per menit kalender
+        minute = int(now // 60)
+        if minute != self.minute:
+            self.minute = minute
+            self.used = 0
+            self.server_used = 0
+
+        elapsed = time.monotonic() - self.refilled
+        self.refilled += elapsed
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def _delay(self, weight, priority, now):
+        """Detik yang harus ditunggu sebelum request boleh dikirim (0 jika boleh sekarang)"""
+        if now < self.banned_until:
+            return self.banned_until - now
+
+        if max(self.used, self.server_used) + weight > self.budget * self.shares[priority]:
+            return (self.minute + 1) * 60 - now + 0.05
+
+        if self.tokens < weight:
+            return (weight - self.tokens) / self.rate
+        return 0
+
+    def acquire(self, weight, priority=None):
+        """Tunggu giliran dan jatah bobot; request berprioritas tinggi selalu didahulukan"""
+        priority = _priority.get() if priority is None else priority
+        max_wait = self.max_wait.get(priority)
+        deadline = None if max_wait is None else time.time() + max_wait
+        ticket = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            waited = False
+            try:
+                while True:
+                    now = time.time()
+                    self._roll(now)
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        delay = self._delay(weight, priority, now)
+                        if delay <= 0:
+                            break
+
+                    if deadline is not None:
+                        if now >= deadline:
+                            self.rejected += 1
+                            raise RequestBudgetExceeded(f"No request weight available within {max_wait}s")
+                        delay = min(delay if delay is not None else max_wait, deadline - now)
+
+                    waited = True
+                    self._cond.wait(timeout=delay)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            self.used += weight
+            self.tokens -= weight
+            self.requests += 1
+            if waited:
+                self.waited += 1
+
+    def observe(self, response):
+        """Perbarui anggaran dari header respons Binance (dipasang sebagai hook session)"""
+        used = response.headers.get('x-mbx-used-weight-1m') or response.headers.get('X-MBX-USED-WEIGHT-1M')
+        with self._cond:
+            self._roll(time.time())
+            if used is not None:
+                try:
+                    # Bobot dari server juga mencakup proses lain dari IP yang sama
+                    self.server_used = max(self.server_used, int(used))
+                except ValueError:
+                    pass
+
+            if response.status_code in (418, 429):
+                retry_after = response.headers.get('Retry-After')
+                try:
+                    retry_after = float(retry_after)
+                except (TypeError, ValueError):
+                    retry_after = 60 if response.status_code == 429 else 120
+                self.banned_until = max(self.banned_until, time.time() + retry_after)
+                self.backoffs += 1
+                logger.warning(f"Binance rate limit ({response.status_code}), pausing requests for {retry_after:.0f}s")
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            self._roll(time.time())
+            return {
+                'weight_limit': self.weight_limit,
+                'budget': self.budget,
+                'used_weight': self.used,
+                'server_used_weight': self.server_used,
+                'tokens': round(self.tokens, 2),
+                'banned_for': max(0, self.banned_until - time.time()),
+                'queued': len(self._waiters),
+                'requests': self.requests,
+                'waited': self.waited,
+                'rejected': self.rejected,
+                'backoffs': self.backoffs
+            }
+
+
+def create_client(api_key, api_secret, base_url=None):
+    """Client python-binance yang sudah dibungkus ScheduledClient
+
+    base_url (atau environment BINANCE_BASE_URL, yang didahulukan) mengarahkan REST API
+    ke host lain, mis. stand-in exchange lokal: http://127.0.0.1:8900
+    """
+    from binance import client as binance_client
+    client_class = binance_client.Client
+    base_url = os.environ.get('BINANCE_BASE_URL') or base_url
+    if base_url:
+        # API_URL tanpa placeholder {} tidak diubah oleh Client.__init__
+        client_class = type(client_class.__name__, (client_class,), {'API_URL': base_url.rstrip('/') + '/api'})
+        logger.info(f"Using Binance REST base URL {base_url}")
+    return ScheduledClient(client_class(api_key, api_secret))
+
+
+class ScheduledClient:
+    """Pembungkus Client python-binance: semua request lewat RequestScheduler
+
+    Request GET identik yang sedang berjalan digabung (single-flight), dan permintaan
+    harga beberapa simbol dalam waktu berdekatan dilayani dari satu request semua ticker.
+    """
+
+    def __init__(self, client, scheduler=None, ticker_batch_age=1.0):
+        self._client = client
+        self.scheduler = scheduler or RequestScheduler()
+        self.ticker_batch_age = ticker_batch_age
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._tickers = None
+        self._tickers_time = 0
+        self._ticker_requests = {}
+        self.coalesced = 0
+        self.batched = 0
+
+        session = getattr(client, 'session', None)
+        if session is not None:
+            session.hooks['response'].append(lambda response, *args, **kwargs: self.scheduler.observe(response))
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        if name == 'get_symbol_ticker':
+            return self._get_symbol_ticker
+
+        def call(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+        return call
+
+    def _send(self, name, func, args, kwargs):
+        priority = ORDER if name in ORDER_METHODS else None
+        weight = request_weight(name, args, kwargs)
+
+        latency = BINANCE_REQUEST_SECONDS.labels(name)
+        for attempt in range(2):
+            self.scheduler.acquire(weight, priority)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                BINANCE_REQUEST_ERRORS.labels(name).inc()
+                # Request baca diulang sekali setelah jeda rate limit; order tidak pernah diulang
+                if (not isinstance(e, BinanceAPIException) or e.status_code not in (418, 429)
+                        or name in ORDER_METHODS or attempt):
+                    raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+
+    def _call(self, name, func, args, kwargs):
+        if name in ORDER_METHODS:
+            return self._send(name, func, args, kwargs)
+
+        try:
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return self._send(name, func, args, kwargs)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._send(name, func, args, kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _get_symbol_ticker(self, **params):
+        symbol = params.get('symbol')
+        if symbol is None:
+            return self._call('get_symbol_ticker', self._client.get_symbol_ticker, (), params)
+
+        now = time.time()
+        with self._lock:
+            if self._tickers is not None and now - self._tickers_time <= self.ticker_batch_age and symbol in self._tickers:
+                self.batched += 1
+                return {'symbol': symbol, 'price': self._tickers[symbol]}
+
+            # Hitung simbol berbeda yang diminta dalam jendela waktu singkat
+            self._ticker_requests = {
+                s: t for s, t in self._ticker_requests.items() if now - t <= self.ticker_batch_age
+            }
+            self._ticker_requests[symbol] = now
+            use_batch = len(self._ticker_requests) > 2
+
+        if not use_batch:
+            return self._call('get_symbol_ticker', self._client.get_symbol_ticker, (), params)
+
+        # Lebih dari dua simbol: satu request semua ticker (bobot 4) lebih murah dari beberapa request
+        tickers = self._call('get_all_tickers', self._client.get_all_tickers, (), {})
+        prices = {t['symbol']: t['price'] for t in tickers}
+        with self._lock:
+            self._tickers = prices
+            self._tickers_time = time.time()
+            self.batched += 1
+
+        if symbol not in prices:
+            return self._call('get_symbol_ticker', self._client.get_symbol_ticker, (), params)
+        return {'symbol': symbol, 'price': prices[symbol]}
+
+    def stats(self):
+        return {**self.scheduler.stats(), 'coalesced': self.coalesced, 'batched': self.batched}
+
+
+def register_client_metrics(get_client):
+    """Metrik anggaran bobot dan antrian request dari ScheduledClient, dibaca saat scrape"""
+    def stat(key):
+        def read():
+            client = get_client()
+            return client.stats()[key] if isinstance(client, ScheduledClient) else None
+        return read
+
+    register_function(Gauge, 'binance_used_weight', 'Request weight used in the current minute', stat('used_weight'))
+    register_function(Gauge, 'binance_server_used_weight', 'Request weight reported by Binance for this IP', stat('server_used_weight'))
+    register_function(Gauge, 'binance_request_queue_depth', 'Requests waiting for request weight', stat('queued'))
+    register_function(Counter, 'binance_requests_total', 'Binance REST calls sent', stat('requests'))
+    register_function(Counter, 'binance_requests_delayed_total', 'Binance REST calls that waited for weight', stat('waited'))
+    register_function(Counter, 'binance_requests_rejected_total', 'Binance REST calls rejected by the scheduler', stat('rejected'))
+    register_function(Counter, 'binance_rate_limit_backoffs_total', 'HTTP 418/429 responses from Binance', stat('backoffs'))
+    register_function(Counter, 'binance_requests_coalesced_total', 'Calls served by an identical in-flight request', stat('coalesced'))
+    register_function(Counter, 'binance_tickers_batched_total', 'Price lookups served from the all-tickers request', stat('batched'))
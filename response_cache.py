@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from request_scheduler import DASHBOARD, set_request_priority
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'stale_until')
+
+    def __init__(self, value, expires, stale_until):
+        self.value = value
+        self.expires = expires
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """Cache TTL dengan single-flight dan stale-while-revalidate untuk data API"""
+
+    def __init__(self, max_entries=1024, refresh_workers=2, priority=DASHBOARD):
+        self.max_entries = max_entries
+        # Prioritas request Binance untuk refresh latar belakang (sama dengan handler API)
+        self.priority = priority
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cache-refresh')
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def get(self, key, loader, ttl, stale_ttl=0):
+        """Ambil nilai dari cache, atau panggil loader sekali untuk semua request yang sama"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+
+            if entry is not None and now < entry.stale_until:
+                # Sajikan nilai lama dan perbarui di latar belakang
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    future = self._inflight[key] = Future()
+                    self._refresher.submit(self._load_quietly, key, loader, ttl, stale_ttl, future)
+                return entry.value
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+        return self._load(key, loader, ttl, stale_ttl, future)
+
+    def _load(self, key, loader, ttl, stale_ttl, future):
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _load_quietly(self, key, loader, ttl, stale_ttl, future):
+        set_request_priority(self.priority)
+        try:
+            self._load(key, loader, ttl, stale_ttl, future)
+        except Exception as e:
+            logger.error(f"Error refreshing cache entry {key}: {e}")
+
+    def invalidate(self, prefix=None):
+        """Hapus semua entry, atau hanya yang key-nya diawali prefix"""
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == prefix]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'hit_rate': (self.hits + self.stale_hits + self.coalesced) / lookups * 100 if lookups else 0
+            }
@@ -0,0 +1,148 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+logger = logging.getLogger("BNB_Trading_Bot")
+
+
+class MarketScanner:
+    """Scanner multi-simbol yang menjalankan pipeline analisis secara paralel"""
+
+    def __init__(self, bot, watchlist=None, min_quote_volume=None, quote_asset='USDT',
+                 max_workers=16, max_symbols=300):
+        self.bot = bot
+        self.watchlist = [s.strip().upper() for s in watchlist if s.strip()] if watchlist else None
+        self.min_quote_volume = min_quote_volume
+        self.quote_asset = quote_asset
+        self.max_workers = max_workers
+        self.max_symbols = max_symbols
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scanner')
+        self.last_result = None
+
+    def resolve_symbols(self):
+        """Tentukan daftar simbol: watchlist atau semua pair USDT di atas volume minimum"""
+        if self.watchlist:
+            return list(self.watchlist)
+
+        # Satu request ticker 24 jam untuk semua simbol
+        tickers = self.bot.client.get_ticker()
+        min_volume = self.min_quote_volume or 0
+        candidates = [
+            t for t in tickers
+            if t['symbol'].endswith(self.quote_asset) and float(t['quoteVolume']) >= min_volume
+        ]
+        candidates.sort(key=lambda t: float(t['quoteVolume']), reverse=True)
+        return [t['symbol'] for t in candidates[:self.max_symbols]]
+
+    def analyze_symbol(self, symbol, price, btc_data):
+        """Jalankan analisis teknis dan korelasi BTC untuk satu simbol"""
+        technical = self.bot.analyze_technical_indicators(symbol)
+        correlation = self.bot.analyze_bnb_btc_correlation(symbol, btc_data=btc_data)
+
+        signals = [
+            {'name': 'Technical Indicators', **technical},
+            {'name': 'BTC Correlation', **correlation}
+        ]
+        final_signal, final_confidence, buy_signals, sell_signals = self.bot.combine_signals(signals)
+
+        # Korelasi terhadap simbol referensi dibaca langsung dari jumlah berjalan engine
+        references = {
+            ref: self.bot.correlation.pair(symbol, ref)['correlation']
+            for ref in self.bot.correlation_refs if ref != symbol
+        }
+
+        return {
+            'symbol': symbol,
+            'price': price,
+            'signal': final_signal,
+            'confidence': final_confidence,
+            'buy_signals': len(buy_signals),
+            'sell_signals': len(sell_signals),
+            'technical_signal': technical['signal'],
+            'technical_confidence': technical['confidence'],
+            'correlation': correlation['correlation'],
+            'beta': correlation.get('beta'),
+            'correlations': references,
+            'rsi': technical['indicators'].get('rsi')
+        }
+
+    def scan(self, deadline=None):
+        """Jalankan satu siklus scan dan kembalikan tabel sinyal yang sudah diurutkan"""
+        started = time.time()
+        symbols = self.resolve_symbols()
+
+        # Pastikan cache kline cukup besar untuk semua simbol (interval 1h dan 1d)
+        cache = self.bot.kline_cache
+        cache.max_series = max(cache.max_series, 2 * len(symbols) + 8)
+
+        # Harga semua simbol dengan satu request, bukan N request ticker
+        prices = {t['symbol']: float(t['price']) for t in self.bot.client.get_all_tickers()}
+        # Simbol referensi korelasi diperbarui sekali per scan, bukan per simbol
+        btc_data = self.bot.update_correlation('BTCUSDT')
+        for ref in self.bot.correlation_refs:
+            if ref != 'BTCUSDT':
+                self.bot.update_correlation(ref)
+
+        futures = {
+            self.executor.submit(self.analyze_symbol, symbol, prices.get(symbol), btc_data): symbol
+            for symbol in symbols
+        }
+
+        remaining = None if deadline is None else max(0, deadline - (time.time() - started))
+        done, not_done = wait(futures, timeout=remaining)
+
+        table = []
+        errors = {}
+        for future in done:
+            symbol = futures[future]
+            try:
+                table.append(future.result())
+            except Exception as e:
+                logger.error(f"Error scanning {symbol}: {e}")
+                errors[symbol] = str(e)
+
+        for future in not_done:
+            future.cancel()
+            errors[futures[future]] = 'deadline exceeded'
+
+        # Urutkan: sinyal aktif dulu, lalu berdasarkan confidence
+        table.sort(key=lambda row: (row['signal'] != 'NEUTRAL', row['confidence']), reverse=True)
+        for rank, row in enumerate(table, start=1):
+            row['rank'] = rank
+
+        duration = time.time() - started
+        if not_done:
+            logger.warning(f"Scan deadline exceeded: {len(not_done)} of {len(symbols)} symbols skipped")
+        logger.info(f"Scan selesai: {len(table)} simbol dalam {duration:.2f}s")
+
+        self.last_result = {
+            'timestamp': datetime.now().isoformat(),
+            'duration': duration,
+            'symbols': len(symbols),
+            'errors': errors,
+            'table': table
+        }
+        return self.last_result
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+def format_scan_table(result, top=20):
+    """Format hasil scan sebagai tabel teks"""
+    lines = [
+        f"{'#':>3}  {'Symbol':<12} {'Signal':<8} {'Conf':>7}  {'Price':>14}  {'Tech':<8} {'RSI':>6}  {'Corr':>6}"
+    ]
+    for row in result['table'][:top]:
+        rsi = row['rsi']
+        rsi_text = f"{rsi:6.2f}" if isinstance(rsi, (int, float)) and rsi == rsi else f"{'n/a':>6}"
+        price_text = f"{row['price']:14.6f}" if row['price'] is not None else f"{'n/a':>14}"
+        lines.append(
+            f"{row['rank']:>3}  {row['symbol']:<12} {row['signal']:<8} {row['confidence']:7.2f}  "
+            f"{price_text}  {row['technical_signal']:<8} {rsi_text}  {row['correlation']:6.2f}"
+        )
+    lines.append(
+        f"{result['symbols']} symbols scanned in {result['duration']:.2f}s, {len(result['errors'])} errors"
+    )
+    return '\n'.join(lines)
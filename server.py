@@ -1,14 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import threading
 import time
 import json
 import os
+import argparse
+import hmac
+import importlib
 import logging
 from datetime import datetime
 import configparser
 from binance_bot import BinanceBot
-from telegram_notifier import TelegramNotifier
+from signal_store import SignalStore
+from market_data import DEFAULT_WS_URL, LiveMarketView, MarketDataStream
+from response_cache import ResponseCache
+from analysis_snapshot import SnapshotBoard
+from event_bus import EventBus, stream_events
+from leader_lock import LeaderLock
+from request_scheduler import DASHBOARD, register_client_metrics, set_request_priority
+from metrics import CONTENT_TYPE, Counter, Gauge, Histogram, MultiProcessCollector, get_or_create, register_function
+from profiler import Profiler, ProfilerBusy
+from candle_scheduler import CandleScheduler, ServerClock
+from whale_flow import WhaleFlow, parse_thresholds, parse_windows
+from telegram_notifier import TelegramNotifier, register_notifier_metrics
 
 # Konfigurasi logging
 logging.basicConfig(
@@ -29,13 +43,19 @@ config.read('config.ini')
 app = Flask(__name__)
 CORS(app)  # Mengaktifkan CORS untuk semua routes
 
+# Request Binance dari handler API memakai prioritas terendah, di bawah order dan analisis
+@app.before_request
+def set_dashboard_priority():
+    set_request_priority(DASHBOARD)
+
 # Inisialisasi bot dan notifier
 try:
     bot = BinanceBot(
         api_key=config['BINANCE']['api_key'],
         api_secret=config['BINANCE']['api_secret'],
         symbol=config['TRADING']['symbol'],
-        quantity=float(config['TRADING']['quantity'])
+        quantity=float(config['TRADING']['quantity']),
+        base_url=config.get('BINANCE', 'base_url', fallback=None)
     )
     
     notifier = TelegramNotifier(
@@ -43,16 +63,16 @@ try:
         chat_id=config['TELEGRAM']['chat_id']
     )
     
-    # Kirim notifikasi bahwa bot telah dimulai
-    notifier.send_message("🚀 BNB Trading Bot server telah dimulai!")
-    
 except Exception as e:
     logger.error(f"Error initializing bot: {e}")
     bot = None
     notifier = None
 
+# Sinyal, trade dan state bersama (SQLite mode WAL), dipakai oleh semua proses worker
+store = SignalStore(os.path.join('data', 'bot.db'))
+
 # Status bot
-bot_status = {
+DEFAULT_STATUS = {
     "running": False,
     "last_analysis": None,
     "analysis_interval": int(config['TRADING']['analysis_interval']),
@@ -64,7 +84,7 @@ bot_status = {
 }
 
 # Data trading
-trading_stats = {
+DEFAULT_STATS = {
     "total_trades": 0,
     "successful_trades": 0,
     "failed_trades": 0,
@@ -73,27 +93,134 @@ trading_stats = {
     "average_profit": 0
 }
 
-# Menyimpan sinyal trading
-trading_signals = []
+store.init_state('status', DEFAULT_STATUS)
+store.init_state('stats', DEFAULT_STATS)
+
+def get_status():
+    return {**DEFAULT_STATUS, **store.get_state('status', {})}
+
+def update_status(**changes):
+    """Ubah field status secara atomik; mengembalikan status baru"""
+    _, status = store.update_state('status', lambda status: {**DEFAULT_STATUS, **(status or {}), **changes})
+    return status
+
+def get_trading_stats_state():
+    return {**DEFAULT_STATS, **store.get_state('stats', {})}
+
+def record_trade_result(success):
+    """Perbarui statistik trading secara atomik"""
+    def apply(stats):
+        stats = {**DEFAULT_STATS, **(stats or {})}
+        stats["total_trades"] += 1
+        if success:
+            stats["successful_trades"] += 1
+        else:
+            stats["failed_trades"] += 1
+        
+        # Hitung win rate
+        stats["win_rate"] = (stats["successful_trades"] / stats["total_trades"]) * 100
+        return stats
+    
+    store.update_state('stats', apply)
+
+# Cache respons API, dibagi oleh semua client dashboard (TTL dalam detik, lihat section [CACHE])
+response_cache = ResponseCache()
+CACHE_TTL = {
+    'price': (config.getfloat('CACHE', 'price_ttl', fallback=2), config.getfloat('CACHE', 'price_stale', fallback=5)),
+    'historical': (config.getfloat('CACHE', 'historical_ttl', fallback=30), config.getfloat('CACHE', 'historical_stale', fallback=120)),
+    'prediction': (config.getfloat('CACHE', 'prediction_ttl', fallback=15), config.getfloat('CACHE', 'prediction_stale', fallback=60)),
+    'whale': (config.getfloat('CACHE', 'whale_ttl', fallback=5), 0)
+}
+
+def cached(key, loader):
+    ttl, stale_ttl = CACHE_TTL[key[0]]
+    return response_cache.get(key, loader, ttl, stale_ttl)
+
+def cached_price(symbol):
+    return cached(('price', symbol), lambda: {
+        "symbol": symbol,
+        "price": str(bot.get_current_price(symbol)),
+        "lastUpdate": datetime.now().isoformat()
+    })
+
+# Arus transaksi whale untuk grafik (lihat section [WHALE])
+whale_flow = WhaleFlow(
+    windows=parse_windows(config.get('WHALE', 'windows', fallback='1m,5m,1h')),
+    thresholds=parse_thresholds(config.get('WHALE', 'symbol_thresholds', fallback='')),
+    default_threshold=config.getfloat('WHALE', 'threshold', fallback=10000)
+)
+
+# Snapshot analisis terbaru per simbol, dipublikasikan oleh analysis_thread
+snapshots = SnapshotBoard(store)
+
+# Event untuk /api/stream (sinyal, harga, status), dibagikan ke semua worker lewat store
+event_bus = EventBus(
+    history=config.getint('STREAM', 'history', fallback=1000),
+    max_queue=config.getint('STREAM', 'client_buffer', fallback=256),
+    store=store
+)
+PRICE_EVENT_INTERVAL = config.getfloat('STREAM', 'price_interval', fallback=1.0)
+last_price_event = {}
+
+def publish_status(status=None):
+    status = status or get_status()
+    event_bus.publish("status", {
+        key: status[key] for key in ["running", "last_analysis", "analysis_interval", "signal_threshold", "auto_trading"]
+    })
+
+def publish_price(symbol, price):
+    # Batasi frekuensi event harga per simbol
+    now = time.time()
+    if now - last_price_event.get(symbol, 0) < PRICE_EVENT_INTERVAL:
+        return
+    last_price_event[symbol] = now
+    event_bus.publish("price", {"symbol": symbol, "price": str(price), "lastUpdate": datetime.now().isoformat()}, symbol)
+
+def record_trade(order_type, amount, result, source):
+    """Catat satu trade ke store"""
+    store.append_trade({
+        "timestamp": datetime.now().isoformat(),
+        "symbol": (result or {}).get("symbol", bot.symbol),
+        "type": order_type.upper(),
+        "amount": amount,
+        "price": (result or {}).get("price"),
+        "status": (result or {}).get("status"),
+        "source": source,
+        "result": result
+    })
+
+# Thread untuk analisis otomatis (hanya berjalan di proses leader)
+analysis_stop = threading.Event()
 
-# Thread untuk analisis otomatis
 def analysis_thread():
-    global bot_status, trading_signals
+    # Siklus berikutnya tepat setelah candle analysis_interval menit ditutup; stop_bot membangunkan wait
+    scheduler = CandleScheduler(
+        get_status()["analysis_interval"],
+        ServerClock(bot.client),
+        delay=config.getfloat('TRADING', 'candle_delay', fallback=2.0),
+        jitter=config.getfloat('TRADING', 'schedule_jitter', fallback=0.0),
+        key=bot.symbol,
+        catch_up=config.getboolean('TRADING', 'catch_up', fallback=True),
+        stop_event=analysis_stop
+    )
     
-    while bot_status["running"]:
+    while not analysis_stop.is_set():
+        status = get_status()
         try:
             logger.info("Running analysis...")
             
             # Dapatkan data historis
-            historical_data = bot.get_historical_data()
+            historical_data = bot.get_historical_columns()
             
             # Analisis data dan dapatkan sinyal
             signal = bot.analyze_data(historical_data)
             
+            # Publikasikan hasil untuk GET /api/bnb-trading
+            snapshots.publish(bot.symbol, build_prediction(signal))
+            
             # Simpan sinyal
             if signal:
-                trading_signals.append({
-                    "id": f"signal-{len(trading_signals) + 1}",
+                stored = store.append_signal({
                     "timestamp": datetime.now().isoformat(),
                     "symbol": bot.symbol,
                     "type": signal["type"],
@@ -101,119 +228,254 @@ def analysis_thread():
                     "confidence": signal["confidence"],
                     "indicators": signal["indicators"]
                 })
-                
-                # Batasi jumlah sinyal yang disimpan
-                if len(trading_signals) > 100:
-                    trading_signals = trading_signals[-100:]
+                event_bus.publish("signal", stored, bot.symbol)
                 
                 # Kirim notifikasi
                 notifier.send_signal(signal)
                 
                 # Eksekusi trading otomatis jika diaktifkan
-                if bot_status["auto_trading"] and signal["confidence"] >= bot_status["signal_threshold"]:
+                if status["auto_trading"] and signal["confidence"] >= status["signal_threshold"]:
                     if signal["type"] == "BUY":
                         result = bot.place_buy_order()
+                        record_trade("BUY", bot.quantity, result, "auto")
                         notifier.send_message(f"🟢 Auto BUY order executed: {result}")
                     elif signal["type"] == "SELL":
                         result = bot.place_sell_order()
+                        record_trade("SELL", bot.quantity, result, "auto")
                         notifier.send_message(f"🔴 Auto SELL order executed: {result}")
             
             # Update status bot
-            bot_status["last_analysis"] = datetime.now().isoformat()
-            
-            # Simpan data ke file
-            save_data_to_file()
-            
+            publish_status(update_status(last_analysis=datetime.now().isoformat()))
+        
         except Exception as e:
             logger.error(f"Error in analysis thread: {e}")
             notifier.send_message(f"⚠️ Error in analysis thread: {e}")
         
-        # Tunggu interval analisis berikutnya
-        time.sleep(bot_status["analysis_interval"] * 60)
+        profiler.tick('cycles')
+        
+        # Tunggu penutupan candle berikutnya (interval bisa berubah lewat status)
+        scheduler.set_interval(status["analysis_interval"])
+        if scheduler.wait_next() is None:
+            break
 
 # Thread utama
 analysis_thread_instance = None
 
-def start_bot():
-    global bot_status, analysis_thread_instance
+# Hanya satu proses (leader) yang menjalankan analisis, stream market data dan price feed
+leader = LeaderLock(os.path.join('data', 'analysis.lock'))
+supervisor_thread_instance = None
+
+# Stream market data (opsional, lihat section [MARKET_DATA] di config.ini)
+market_stream = None
+
+def on_market_event(event_type, symbol, data):
+    if event_type == 'trade':
+        whale_flow.add_trade(symbol, data, source='stream')
+        publish_price(symbol, data['price'])
+
+# Tanpa stream market data, harga untuk /api/stream diambil satu kali per interval untuk semua client
+price_feed_thread = None
+
+def price_feed():
+    set_request_priority(DASHBOARD)
+    while True:
+        if event_bus.has_listeners():
+            try:
+                publish_price(bot.symbol, cached_price(bot.symbol)["price"])
+            except Exception as e:
+                logger.error(f"Error in price feed: {e}")
+        time.sleep(PRICE_EVENT_INTERVAL)
+
+def ensure_price_feed():
+    global price_feed_thread
     
-    if not bot_status["running"]:
-        bot_status["running"] = True
-        bot_status["start_time"] = datetime.now().isoformat()
-        
-        # Mulai thread analisis
-        analysis_thread_instance = threading.Thread(target=analysis_thread)
-        analysis_thread_instance.daemon = True
-        analysis_thread_instance.start()
-        
-        logger.info("Bot started")
-        return True
+    if market_stream is None and price_feed_thread is None:
+        price_feed_thread = threading.Thread(target=price_feed, name='price-feed', daemon=True)
+        price_feed_thread.start()
+
+def start_market_data():
+    global market_stream
+    
+    if bot is None or not config.getboolean('MARKET_DATA', 'enabled', fallback=False):
+        return
+    
+    market_view = LiveMarketView()
+    bot.attach_market_data(market_view)
+    market_view.add_listener(on_market_event)
     
-    return False
+    market_stream = MarketDataStream(
+        market_view,
+        symbols=[bot.symbol],
+        intervals=config.get('MARKET_DATA', 'intervals', fallback='1h,1d').split(','),
+        ws_url=config.get('MARKET_DATA', 'ws_url', fallback=DEFAULT_WS_URL)
+    )
+    market_stream.start()
+    logger.info("Market data stream started")
+
+def set_running(running):
+    """Ubah flag running di store; mengembalikan True jika status berubah"""
+    def apply(status):
+        status = {**DEFAULT_STATUS, **(status or {})}
+        if status["running"] != running:
+            status["running"] = running
+            if running:
+                status["start_time"] = datetime.now().isoformat()
+        return status
+    
+    old, new = store.update_state('status', apply)
+    if (old or {}).get("running", False) == running:
+        return False
+    
+    publish_status(new)
+    logger.info("Bot started" if running else "Bot stopped")
+    return True
+
+# Proses leader mengikuti flag running di store, dari worker mana pun flag itu diubah
+def start_bot():
+    return set_running(True)
 
 def stop_bot():
-    global bot_status, analysis_thread_instance
+    stopped = set_running(False)
+    if stopped:
+        # Bangunkan analysis_thread di proses ini segera; supervisor proses leader lain menyusul
+        analysis_stop.set()
+    return stopped
+
+def on_leader_elected():
+    logger.info(f"Process {os.getpid()} is now the analysis leader")
     
-    if bot_status["running"]:
-        bot_status["running"] = False
-        
-        # Tunggu thread analisis berhenti
-        if analysis_thread_instance:
-            analysis_thread_instance.join(timeout=5)
-        
-        logger.info("Bot stopped")
-        return True
+    # Kirim notifikasi bahwa bot telah dimulai
+    if notifier:
+        notifier.send_message("🚀 BNB Trading Bot server telah dimulai!")
     
-    return False
+    # Mulai stream market data jika diaktifkan
+    start_market_data()
+    ensure_price_feed()
 
-# Fungsi untuk menyimpan data ke file
-def save_data_to_file():
-    try:
-        # Simpan sinyal trading
-        with open('data/signals.json', 'w') as f:
-            json.dump(trading_signals, f)
+def supervise():
+    global analysis_thread_instance
+    
+    last_prune = 0
+    while True:
+        try:
+            # Proses lain mengambil alih jika leader mati (file lock dilepas oleh OS)
+            if not leader.is_leader and leader.try_acquire():
+                on_leader_elected()
+            
+            if leader.is_leader:
+                running = get_status()["running"]
+                alive = analysis_thread_instance is not None and analysis_thread_instance.is_alive()
+                
+                if running and not alive:
+                    analysis_stop.clear()
+                    analysis_thread_instance = threading.Thread(target=analysis_thread, name='analysis', daemon=True)
+                    analysis_thread_instance.start()
+                elif not running and alive:
+                    analysis_stop.set()
+                
+                if time.time() - last_prune > 3600:
+                    last_prune = time.time()
+                    store.prune_events()
         
-        # Simpan statistik trading
-        with open('data/stats.json', 'w') as f:
-            json.dump(trading_stats, f)
+        except Exception as e:
+            logger.error(f"Error in supervisor: {e}")
         
-        # Simpan status bot
-        with open('data/status.json', 'w') as f:
-            json.dump(bot_status, f)
+        time.sleep(1)
+
+def start_background():
+    """Mulai thread latar belakang proses ini (dipanggil sekali per proses worker)"""
+    global supervisor_thread_instance
     
-    except Exception as e:
-        logger.error(f"Error saving data to file: {e}")
+    metrics_collector.start()
+    
+    if supervisor_thread_instance is not None or bot is None:
+        return
+    
+    event_bus.start()
+    supervisor_thread_instance = threading.Thread(target=supervise, name='supervisor', daemon=True)
+    supervisor_thread_instance.start()
 
-# Fungsi untuk memuat data dari file
-def load_data_from_file():
-    global trading_signals, trading_stats, bot_status
+# Pindahkan file JSON lama ke store (hanya sekali)
+def migrate_json_files():
+    if os.path.exists('data/signals.json') and store.count_signals() == 0:
+        with open('data/signals.json', 'r') as f:
+            store.import_signals(json.load(f))
+        os.replace('data/signals.json', 'data/signals.json.migrated')
+        logger.info("Migrated data/signals.json to signal store")
     
+    for key in ['stats', 'status']:
+        path = f'data/{key}.json'
+        if os.path.exists(path):
+            if store.get_state(key) is None:
+                with open(path, 'r') as f:
+                    store.set_state(**{key: json.load(f)})
+            os.replace(path, f'{path}.migrated')
+
+# Fungsi untuk memuat data dari store (sekali saat server dijalankan, sebelum worker dimulai)
+def load_data_from_file():
     try:
-        # Buat direktori data jika belum ada
-        os.makedirs('data', exist_ok=True)
-        
-        # Muat sinyal trading
-        if os.path.exists('data/signals.json'):
-            with open('data/signals.json', 'r') as f:
-                trading_signals = json.load(f)
+        migrate_json_files()
         
-        # Muat statistik trading
-        if os.path.exists('data/stats.json'):
-            with open('data/stats.json', 'r') as f:
-                trading_stats = json.load(f)
-        
-        # Muat status bot
-        if os.path.exists('data/status.json'):
-            with open('data/status.json', 'r') as f:
-                saved_status = json.load(f)
-                # Update hanya beberapa field
-                for key in ['analysis_interval', 'signal_threshold', 'auto_trading']:
-                    if key in saved_status:
-                        bot_status[key] = saved_status[key]
+        # Statistik dan pengaturan (analysis_interval, signal_threshold, auto_trading) tetap dari store;
+        # bot baru berjalan lagi jika dimulai ulang
+        update_status(running=False, uptime=0, start_time=datetime.now().isoformat())
     
     except Exception as e:
         logger.error(f"Error loading data from file: {e}")
 
+# Metrik Prometheus untuk /metrics; setiap proses worker punya registry sendiri, digabung lewat store
+metrics_collector = MultiProcessCollector(store.path)
+ROUTE_SECONDS = get_or_create(Histogram, 'http_request_seconds', 'Duration of API requests', ['route', 'method'])
+ROUTE_REQUESTS = get_or_create(Counter, 'http_requests_total', 'API requests by status code', ['route', 'method', 'status'])
+
+def cache_stat(key):
+    return lambda: response_cache.stats()[key]
+
+register_function(Gauge, 'response_cache_entries', 'Entries in the API response cache', cache_stat('entries'))
+register_function(Counter, 'response_cache_hits_total', 'Fresh API response cache hits', cache_stat('hits'))
+register_function(Counter, 'response_cache_stale_hits_total', 'Stale API response cache hits', cache_stat('stale_hits'))
+register_function(Counter, 'response_cache_misses_total', 'API response cache misses', cache_stat('misses'))
+register_function(Counter, 'response_cache_coalesced_total', 'Requests that waited for an in-flight load', cache_stat('coalesced'))
+register_function(Gauge, 'stream_subscribers', 'Connected /api/stream clients', event_bus.subscriber_count)
+register_function(Gauge, 'stored_signals', 'Signals in the store', store.count_signals)
+register_client_metrics(lambda: bot.client if bot is not None else None)
+register_notifier_metrics(lambda: notifier)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label dari pola rute, bukan URL, agar jumlah seri tetap kecil
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        ROUTE_SECONDS.labels(route, request.method).observe(time.perf_counter() - started)
+        ROUTE_REQUESTS.labels(route, request.method, response.status_code).inc()
+        if not route.startswith('/admin/'):
+            profiler.tick('requests')
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics_collector.render(), content_type=CONTENT_TYPE)
+
+# Profiler on-demand untuk siklus analysis_thread atau request API (lihat /admin/profile)
+profiler = Profiler()
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or config.get('ADMIN', 'token', fallback='')
+
+def admin_allowed():
+    # Dengan token: wajib header X-Admin-Token; tanpa token: hanya dari localhost
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.before_request
+def check_admin_access():
+    if request.path.startswith('/admin/') and not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+
 # API Routes
 
 @app.route('/api/price', methods=['GET'])
@@ -221,12 +483,7 @@ def get_price():
     symbol = request.args.get('symbol', 'BNBUSDT')
     
     try:
-        price = bot.get_current_price(symbol)
-        return jsonify({
-            "symbol": symbol,
-            "price": str(price),
-            "lastUpdate": datetime.now().isoformat()
-        })
+        return jsonify(cached_price(symbol))
     except Exception as e:
         logger.error(f"Error getting price: {e}")
         return jsonify({"error": str(e)}), 500
@@ -238,14 +495,39 @@ def get_historical():
     limit = int(request.args.get('limit', 30))
     
     try:
-        data = bot.get_historical_data(symbol, interval, limit)
+        data = cached(('historical', symbol, interval, limit), lambda: bot.get_historical_data(symbol, interval, limit))
         return jsonify(data)
     except Exception as e:
         logger.error(f"Error getting historical data: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/whale-flow', methods=['GET'])
+def get_whale_flow():
+    symbol = request.args.get('symbol', bot.symbol).upper()
+    minutes = int(request.args.get('minutes', 60))
+    
+    try:
+        # Tanpa stream aggTrade, isi agregator dari trade terbaru (paling sering sekali per TTL)
+        if bot.market_data is None or not bot.market_data.connected:
+            cached(('whale', symbol), lambda: whale_flow.add_trades(
+                symbol, bot.client.get_recent_trades(symbol=symbol, limit=1000), source='rest'
+            ))
+        
+        series = whale_flow.series(symbol, minutes)
+        return jsonify({
+            "symbol": symbol,
+            "threshold": whale_flow.threshold(symbol),
+            "windows": whale_flow.window_stats(symbol, now=time.time() * 1000),
+            "series": {key: values.tolist() for key, values in series.items()}
+        })
+    except Exception as e:
+        logger.error(f"Error getting whale flow: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/bot-status', methods=['GET'])
 def get_bot_status():
+    bot_status = get_status()
+    
     # Hitung uptime
     if bot_status["running"]:
         start_time = datetime.fromisoformat(bot_status["start_time"])
@@ -256,65 +538,69 @@ def get_bot_status():
 
 @app.route('/api/trading-stats', methods=['GET'])
 def get_trading_stats():
-    return jsonify(trading_stats)
+    return jsonify(get_trading_stats_state())
 
 @app.route('/api/signals', methods=['GET'])
 def get_signals():
     limit = int(request.args.get('limit', 10))
     signal_type = request.args.get('type')
     
-    filtered_signals = trading_signals
-    
-    # Filter berdasarkan tipe jika ditentukan
-    if signal_type:
-        filtered_signals = [s for s in filtered_signals if s["type"].upper() == signal_type.upper()]
-    
-    # Urutkan berdasarkan timestamp (terbaru dulu)
-    sorted_signals = sorted(filtered_signals, key=lambda x: x["timestamp"], reverse=True)
-    
-    # Batasi jumlah hasil
-    limited_signals = sorted_signals[:limit]
+    # Sinyal terbaru dulu, difilter berdasarkan tipe jika ditentukan
+    return jsonify(store.recent_signals(limit, signal_type))
+
+# Bentuk data prediksi dari hasil analyze_data
+def build_prediction(signal):
+    if not signal:
+        # Jika tidak ada sinyal, buat prediksi default
+        current_price = bot.get_current_price()
+        signal = {
+            "type": "NEUTRAL",
+            "price": current_price,
+            "confidence": 0.5,
+            "indicators": {
+                "rsi": 50,
+                "macd": "neutral",
+                "movingAverages": "sideways",
+                "volume": "stable"
+            },
+            "nextPriceTarget": current_price * 1.01,
+            "stopLoss": current_price * 0.99
+        }
     
-    return jsonify(limited_signals)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "currentPrice": signal["price"],
+        "prediction": signal["type"],
+        "confidence": signal["confidence"],
+        "indicators": signal["indicators"],
+        "nextPriceTarget": signal.get("nextPriceTarget", signal["price"] * 1.02),
+        "stopLoss": signal.get("stopLoss", signal["price"] * 0.98)
+    }
+
+# Hitung ulang prediksi dari data historis terbaru dan publikasikan snapshot-nya
+def compute_prediction():
+    historical_data = bot.get_historical_columns()
+    return snapshots.publish(bot.symbol, build_prediction(bot.analyze_data(historical_data)))
 
 @app.route('/api/bnb-trading', methods=['GET'])
 def get_prediction():
     try:
-        # Dapatkan data historis
-        historical_data = bot.get_historical_data()
-        
-        # Analisis data dan dapatkan sinyal
-        signal = bot.analyze_data(historical_data)
-        
-        if not signal:
-            # Jika tidak ada sinyal, buat prediksi default
-            current_price = bot.get_current_price()
-            signal = {
-                "type": "NEUTRAL",
-                "price": current_price,
-                "confidence": 0.5,
-                "indicators": {
-                    "rsi": 50,
-                    "macd": "neutral",
-                    "movingAverages": "sideways",
-                    "volume": "stable"
-                },
-                "nextPriceTarget": current_price * 1.01,
-                "stopLoss": current_price * 0.99
-            }
+        if request.args.get('fresh') == '1':
+            snapshot = compute_prediction()
+        else:
+            # Snapshot dari analysis_thread hanya dipakai selama bot berjalan dan snapshot belum
+            # lebih tua dari satu interval analisis; selain itu lewat cache prediksi (TTL, single-flight)
+            status = get_status()
+            snapshot = None
+            if status["running"]:
+                max_age = status["analysis_interval"] * 60 + CACHE_TTL['prediction'][1]
+                snapshot = snapshots.get(bot.symbol, max_age=max_age)
+            snapshot = snapshot or cached(('prediction', bot.symbol), compute_prediction)
         
-        return jsonify({
-            "status": "success",
-            "data": {
-                "timestamp": datetime.now().isoformat(),
-                "currentPrice": signal["price"],
-                "prediction": signal["type"],
-                "confidence": signal["confidence"],
-                "indicators": signal["indicators"],
-                "nextPriceTarget": signal.get("nextPriceTarget", signal["price"] * 1.02),
-                "stopLoss": signal.get("stopLoss", signal["price"] * 0.98)
-            }
-        })
+        response = Response(snapshot.body, mimetype='application/json')
+        response.set_etag(snapshot.etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     
     except Exception as e:
         logger.error(f"Error getting prediction: {e}")
@@ -331,28 +617,14 @@ def execute_trade():
         
         if order_type.upper() == 'BUY':
             result = bot.place_buy_order(amount)
-            # Update statistik trading
-            trading_stats["total_trades"] += 1
-            if result.get("status") == "success":
-                trading_stats["successful_trades"] += 1
-            else:
-                trading_stats["failed_trades"] += 1
         
         elif order_type.upper() == 'SELL':
             result = bot.place_sell_order(amount)
-            # Update statistik trading
-            trading_stats["total_trades"] += 1
-            if result.get("status") == "success":
-                trading_stats["successful_trades"] += 1
-            else:
-                trading_stats["failed_trades"] += 1
-        
-        # Hitung win rate
-        if trading_stats["total_trades"] > 0:
-            trading_stats["win_rate"] = (trading_stats["successful_trades"] / trading_stats["total_trades"]) * 100
         
-        # Simpan data ke file
-        save_data_to_file()
+        if result is not None:
+            record_trade(order_type, amount, result, "manual")
+            # Update statistik trading
+            record_trade_result(result.get("status") == "success")
         
         # Kirim notifikasi
         notifier.send_message(f"🔄 Manual {order_type} order executed: {result}")
@@ -363,7 +635,8 @@ def execute_trade():
             "orderDetails": {
                 "type": order_type,
                 "amount": amount,
-                "price": bot.get_current_price(),
+                # Harga eksekusi dari hasil order, bukan request ticker tambahan
+                "price": (result or {}).get("price"),
                 "timestamp": datetime.now().isoformat(),
                 "result": result
             }
@@ -380,11 +653,12 @@ def send_telegram():
         message = data.get('message', '')
         
         if message:
+            # Pesan hanya diantrikan; pengiriman dilakukan thread pengirim notifier
             notifier.send_message(message)
             return jsonify({
                 "status": "success",
-                "message": "Notification sent to Telegram"
-            })
+                "message": "Notification queued for Telegram"
+            }), 202
         else:
             return jsonify({
                 "status": "error",
@@ -401,16 +675,13 @@ def toggle_auto_trading():
         data = request.json
         enabled = data.get('enabled', False)
         
-        bot_status["auto_trading"] = enabled
+        publish_status(update_status(auto_trading=enabled))
         
         # Update konfigurasi
         config['TRADING']['enable_auto_trading'] = str(enabled)
         with open('config.ini', 'w') as f:
             config.write(f)
         
-        # Simpan data ke file
-        save_data_to_file()
-        
         # Kirim notifikasi
         notifier.send_message(f"🔄 Auto trading {'enabled' if enabled else 'disabled'}")
         
@@ -439,22 +710,138 @@ def api_stop_bot():
     else:
         return jsonify({"status": "error", "message": "Bot not running"}), 400
 
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    # Filter simbol per client, mis. ?symbols=BNBUSDT,BTCUSDT
+    symbols = [s for s in request.args.get('symbols', '').split(',') if s]
+    
+    # Resume dari event terakhir yang diterima client
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    sub = event_bus.subscribe(symbols or None, last_event_id)
+    
+    return Response(
+        stream_events(event_bus, sub),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/request-stats', methods=['GET'])
+def get_request_stats():
+    if bot is None or bot.client is None:
+        return jsonify({"status": "error", "message": "Binance client is not connected"}), 503
+    return jsonify(bot.client.stats())
+
+@app.route('/admin/profile', methods=['POST'])
+def start_profile():
+    options = request.get_json(silent=True) or request.args
+    unit = options.get('unit', 'cycles')
+    if unit not in ('cycles', 'requests'):
+        return jsonify({"status": "error", "message": "unit must be 'cycles' or 'requests'"}), 400
+    if unit == 'cycles' and not leader.is_leader:
+        # Siklus analisis hanya berjalan di proses leader
+        return jsonify({"status": "error", "message": "Analysis cycles do not run in this worker"}), 409
+    
+    try:
+        count = int(options.get('count', 1))
+        timeout = float(options.get('timeout', 600))
+        profiler.start(
+            unit=unit,
+            count=count,
+            timeout=timeout,
+            interval=float(options.get('interval', 0.01)),
+            memory=str(options.get('memory', 'true')).lower() not in ('0', 'false', 'no'),
+            top=int(options.get('top', 20))
+        )
+    except ProfilerBusy as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    logger.info(f"Profiling the next {count} {unit} (timeout {timeout:.0f}s)")
+    
+    if str(options.get('wait', 'false')).lower() in ('1', 'true', 'yes'):
+        profiler.wait(timeout)
+        return get_profile()
+    return jsonify({"status": "success", "profile": profiler.status()}), 202
+
+@app.route('/admin/profile', methods=['GET'])
+def get_profile():
+    if request.args.get('format') == 'folded':
+        if profiler.result is None:
+            return jsonify({"status": "error", "message": "No profile available"}), 404
+        return Response(profiler.result['stacks'] + '\n', mimetype='text/plain')
+    return jsonify({"status": "success", "profile": profiler.status(), "result": profiler.result})
+
+@app.route('/admin/profile', methods=['DELETE'])
+def stop_profile():
+    return jsonify({"status": "success", "result": profiler.stop()})
+
 # Rute untuk health check
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "bot_running": bot_status["running"]
+        "bot_running": get_status()["running"]
     })
 
+def run_server(host, port, workers=1, threads=32):
+    """Jalankan API dengan beberapa proses worker (gunicorn) atau server Flask satu proses"""
+    if workers > 1:
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            logger.warning("gunicorn is not installed, falling back to the single-process server")
+            workers = 1
+    
+    # Snapshot metrik dari run sebelumnya tidak ikut dijumlahkan
+    metrics_collector.clear()
+    
+    if workers <= 1:
+        start_background()
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+    
+    class ServerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            # Thread per worker agar koneksi /api/stream tidak memblokir worker
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', threads)
+            self.cfg.set('post_worker_init', lambda worker: importlib.import_module('server').start_background())
+        
+        def load(self):
+            # Modul diimpor ulang di setiap worker setelah fork (koneksi SQLite dan HTTP tidak dibagi)
+            return importlib.import_module('server').app
+    
+    ServerApplication().run()
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BNB Trading Bot API server')
+    parser.add_argument('--host', default=config.get('SERVER', 'host', fallback='0.0.0.0'))
+    parser.add_argument('--port', type=int, default=config.getint('SERVER', 'port', fallback=5000))
+    parser.add_argument('--workers', type=int, default=config.getint('SERVER', 'workers', fallback=1),
+                        help='Worker processes (requires gunicorn when > 1)')
+    parser.add_argument('--threads', type=int, default=config.getint('SERVER', 'threads', fallback=32),
+                        help='Threads per worker process')
+    args = parser.parse_args()
+    
     # Muat data dari file
     load_data_from_file()
     
     # Mulai bot jika auto_trading diaktifkan
-    if bot_status["auto_trading"]:
+    if get_status()["auto_trading"]:
         start_bot()
     
-    # Jalankan server Flask
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    # Jalankan server
+    run_server(args.host, args.port, args.workers, args.threads)
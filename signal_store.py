@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+
+from metrics import Histogram, get_or_create, timed
+
+STORE_WRITE_SECONDS = get_or_create(Histogram, 'store_write_seconds', 'Duration of SQLite store writes', ['operation'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    type TEXT NOT NULL,
+    price REAL,
+    confidence REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signals_type ON signals (type, id);
+
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    symbol TEXT,
+    side TEXT,
+    amount REAL,
+    price REAL,
+    status TEXT,
+    payload TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    symbol TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SignalStore:
+    """Penyimpanan sinyal dan trade append-only berbasis SQLite (mode WAL)"""
+
+    def __init__(self, path=os.path.join('data', 'bot.db')):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Beberapa proses worker bisa menulis bersamaan; tunggu lock alih-alih gagal
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # NORMAL aman di mode WAL: commit tetap atomik, hanya durabilitas saat listrik mati yang berkurang
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @timed(STORE_WRITE_SECONDS, 'append_signal')
+    def append_signal(self, signal):
+        """Tambahkan satu sinyal; mengembalikan sinyal dengan id yang diberikan store"""
+        payload = {k: v for k, v in signal.items() if k != 'id'}
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO signals (timestamp, symbol, type, price, confidence, payload) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    signal['timestamp'],
+                    signal.get('symbol', ''),
+                    signal['type'],
+                    signal.get('price'),
+                    signal.get('confidence'),
+                    json.dumps(payload, default=float)
+                )
+            )
+        return {'id': f"signal-{cursor.lastrowid}", **payload}
+
+    def recent_signals(self, limit=10, signal_type=None):
+        """Sinyal terbaru lebih dulu, dibaca lewat index tanpa memuat seluruh riwayat"""
+        with self._lock:
+            if signal_type:
+                rows = self._conn.execute(
+                    'SELECT id, payload FROM signals WHERE type = ? ORDER BY id DESC LIMIT ?',
+                    (signal_type.upper(), limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    'SELECT id, payload FROM signals ORDER BY id DESC LIMIT ?',
+                    (limit,)
+                ).fetchall()
+        return [{'id': f"signal-{row_id}", **json.loads(payload)} for row_id, payload in rows]
+
+    def count_signals(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM signals').fetchone()[0]
+
+    @timed(STORE_WRITE_SECONDS, 'append_trade')
+    def append_trade(self, trade):
+        """Tambahkan satu trade ke riwayat"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO trades (timestamp, symbol, side, amount, price, status, payload) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    trade['timestamp'],
+                    trade.get('symbol'),
+                    trade.get('type'),
+                    trade.get('amount'),
+                    trade.get('price'),
+                    trade.get('status'),
+                    json.dumps(trade, default=str)
+                )
+            )
+        return cursor.lastrowid
+
+    def recent_trades(self, limit=10):
+        with self._lock:
+            rows = self._conn.execute('SELECT payload FROM trades ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    @timed(STORE_WRITE_SECONDS, 'set_state')
+    def set_state(self, **values):
+        """Simpan beberapa nilai state (mis. stats dan status) dalam satu transaksi"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                    [(key, json.dumps(value)) for key, value in values.items()]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def init_state(self, key, value):
+        """Tulis nilai awal hanya jika key belum ada"""
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO state (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    @timed(STORE_WRITE_SECONDS, 'update_state')
+    def update_state(self, key, update, default=None):
+        """Baca-ubah-tulis satu nilai secara atomik antar proses; mengembalikan (lama, baru)"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+                old = json.loads(row[0]) if row else default
+                new = update(old)
+                self._conn.execute(
+                    'INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                    (key, json.dumps(new))
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return old, new
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    @timed(STORE_WRITE_SECONDS, 'import_signals')
+    def import_signals(self, signals):
+        """Impor sinyal dari file JSON lama dalam satu transaksi"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT INTO signals (timestamp, symbol, type, price, confidence, payload) VALUES (?, ?, ?, ?, ?, ?)',
+                    [
+                        (
+                            s['timestamp'], s.get('symbol', ''), s['type'], s.get('price'), s.get('confidence'),
+                            json.dumps({k: v for k, v in s.items() if k != 'id'}, default=float)
+                        )
+                        for s in signals
+                    ]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    @timed(STORE_WRITE_SECONDS, 'append_event')
+    def append_event(self, event_type, symbol, data):
+        """Tambahkan event (data sudah berupa JSON); mengembalikan id event"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO events (type, symbol, data) VALUES (?, ?, ?)',
+                (event_type, symbol, data)
+            )
+        return cursor.lastrowid
+
+    def events_after(self, last_id, limit=500):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT id, type, symbol, data FROM events WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, limit)
+            ).fetchall()
+
+    def last_event_id(self):
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    @timed(STORE_WRITE_SECONDS, 'prune_events')
+    def prune_events(self, keep=10000):
+        """Hapus event lama, sisakan sejumlah event terakhir untuk resume"""
+        with self._lock:
+            self._conn.execute('DELETE FROM events WHERE id <= (SELECT MAX(id) FROM events) - ?', (keep,))
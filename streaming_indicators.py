@@ -0,0 +1,450 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+
+def _window_snapshot(window):
+    """Elemen yang akan tergeser oleh append berikutnya (None jika window belum penuh)"""
+    return window[0] if len(window) == window.maxlen else None
+
+
+def _window_restore(window, evicted):
+    """Batalkan satu append pada window sejak _window_snapshot"""
+    window.pop()
+    if evicted is not None:
+        window.appendleft(evicted)
+
+
+class SMA:
+    """Simple Moving Average dengan running sum"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.count += 1
+        self.total += x
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+    def snapshot(self):
+        return self.count, _window_snapshot(self.window), self.total, self.value
+
+    def restore(self, state):
+        count, evicted, self.total, self.value = state
+        # SMA di dalam indikator lain tidak selalu diperbarui setiap candle
+        if self.count != count:
+            _window_restore(self.window, evicted)
+            self.count = count
+
+
+class EMA:
+    """Exponential Moving Average, diawali SMA seperti TA-Lib"""
+
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def seed(self, value):
+        """Mulai EMA dari nilai awal yang sudah dihitung di luar"""
+        self.count = self.period
+        self.value = value
+
+    def update(self, x):
+        if self.count < self.period:
+            self.count += 1
+            self.total += x
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+    def snapshot(self):
+        return self.count, self.total, self.value
+
+    def restore(self, state):
+        self.count, self.total, self.value = state
+
+
+class RSI:
+    """Relative Strength Index dengan smoothing Wilder"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = NAN
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+
+        if self.count < self.period:
+            self.count += 1
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if self.count < self.period:
+                return self.value
+            self.avg_gain /= self.period
+            self.avg_loss /= self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        total = self.avg_gain + self.avg_loss
+        self.value = 100.0 * (self.avg_gain / total) if abs(total) >= 1e-14 else 0.0
+        return self.value
+
+    def snapshot(self):
+        return self.prev_close, self.count, self.avg_gain, self.avg_loss, self.value
+
+    def restore(self, state):
+        self.prev_close, self.count, self.avg_gain, self.avg_loss, self.value = state
+
+
+class MACD:
+    """MACD dengan penyelarasan EMA cepat/lambat seperti TA-Lib"""
+
+    def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
+        self.fast = EMA(fastperiod)
+        self.slow = EMA(slowperiod)
+        self.signal_ema = EMA(signalperiod)
+        self.recent = deque(maxlen=fastperiod)
+        self.macd = NAN
+        self.signal = NAN
+        self.hist = NAN
+
+    def update(self, close):
+        self.recent.append(close)
+        was_ready = self.slow.count == self.slow.period
+        self.slow.update(close)
+
+        if not was_ready:
+            if self.slow.count < self.slow.period:
+                return self.macd, self.signal, self.hist
+            # TA-Lib memulai EMA cepat pada bar yang sama dengan EMA lambat
+            self.fast.seed(sum(self.recent) / len(self.recent))
+        else:
+            self.fast.update(close)
+
+        line = self.fast.value - self.slow.value
+        self.signal_ema.update(line)
+
+        # TA-Lib hanya mengeluarkan MACD setelah garis sinyal siap
+        if not math.isnan(self.signal_ema.value):
+            self.macd = line
+            self.signal = self.signal_ema.value
+            self.hist = line - self.signal
+        return self.macd, self.signal, self.hist
+
+    def snapshot(self):
+        return (self.fast.snapshot(), self.slow.snapshot(), self.signal_ema.snapshot(),
+                _window_snapshot(self.recent), self.macd, self.signal, self.hist)
+
+    def restore(self, state):
+        fast, slow, signal_ema, evicted, self.macd, self.signal, self.hist = state
+        self.fast.restore(fast)
+        self.slow.restore(slow)
+        self.signal_ema.restore(signal_ema)
+        _window_restore(self.recent, evicted)
+
+
+class BBands:
+    """Bollinger Bands (SMA dan standar deviasi populasi)"""
+
+    def __init__(self, period=20, nbdevup=2, nbdevdn=2):
+        self.period = period
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.upper = NAN
+        self.middle = NAN
+        self.lower = NAN
+
+    def update(self, x):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+        if len(self.window) == self.period:
+            mean = self.total / self.period
+            variance = self.total_sq / self.period - mean * mean
+            stddev = math.sqrt(variance) if variance > 0 else 0.0
+            self.middle = mean
+            self.upper = mean + self.nbdevup * stddev
+            self.lower = mean - self.nbdevdn * stddev
+        return self.upper, self.middle, self.lower
+
+    def snapshot(self):
+        return _window_snapshot(self.window), self.total, self.total_sq, self.upper, self.middle, self.lower
+
+    def restore(self, state):
+        evicted, self.total, self.total_sq, self.upper, self.middle, self.lower = state
+        _window_restore(self.window, evicted)
+
+
+class _RollingExtreme:
+    """Min/max bergulir dengan monotonic deque (amortized O(1))"""
+
+    def __init__(self, period, is_max):
+        self.period = period
+        self.is_max = is_max
+        self.items = deque()
+        self.index = 0
+
+    def update(self, x):
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= x:
+                items.pop()
+        else:
+            while items and items[-1][1] >= x:
+                items.pop()
+        items.append((self.index, x))
+        if items[0][0] <= self.index - self.period:
+            items.popleft()
+        self.index += 1
+        return items[0][1]
+
+    def snapshot(self):
+        # Deque monoton berisi paling banyak period entri
+        return self.index, tuple(self.items)
+
+    def restore(self, state):
+        self.index, items = state
+        self.items = deque(items)
+
+
+class Stochastic:
+    """Stochastic Oscillator (slow %K / %D dengan SMA)"""
+
+    def __init__(self, fastk_period=14, slowk_period=3, slowd_period=3):
+        self.fastk_period = fastk_period
+        self.highest = _RollingExtreme(fastk_period, is_max=True)
+        self.lowest = _RollingExtreme(fastk_period, is_max=False)
+        self.slowk_sma = SMA(slowk_period)
+        self.slowd_sma = SMA(slowd_period)
+        self.count = 0
+        self.slowk = NAN
+        self.slowd = NAN
+
+    def update(self, high, low, close):
+        hh = self.highest.update(high)
+        ll = self.lowest.update(low)
+        self.count += 1
+        if self.count < self.fastk_period:
+            return self.slowk, self.slowd
+
+        diff = hh - ll
+        fastk = (close - ll) * (100.0 / diff) if diff != 0 else 0.0
+        slowk = self.slowk_sma.update(fastk)
+        if math.isnan(slowk):
+            return self.slowk, self.slowd
+
+        slowd = self.slowd_sma.update(slowk)
+        # TA-Lib mengeluarkan %K dan %D bersamaan
+        if not math.isnan(slowd):
+            self.slowk = slowk
+            self.slowd = slowd
+        return self.slowk, self.slowd
+
+    def snapshot(self):
+        return (self.highest.snapshot(), self.lowest.snapshot(), self.slowk_sma.snapshot(),
+                self.slowd_sma.snapshot(), self.count, self.slowk, self.slowd)
+
+    def restore(self, state):
+        highest, lowest, slowk_sma, slowd_sma, self.count, self.slowk, self.slowd = state
+        self.highest.restore(highest)
+        self.lowest.restore(lowest)
+        self.slowk_sma.restore(slowk_sma)
+        self.slowd_sma.restore(slowd_sma)
+
+
+class ATR:
+    """Average True Range dengan smoothing Wilder"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.count < self.period:
+            self.count += 1
+            self.total += true_range
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+    def snapshot(self):
+        return self.prev_close, self.count, self.total, self.value
+
+    def restore(self, state):
+        self.prev_close, self.count, self.total, self.value = state
+
+
+class OBV:
+    """On Balance Volume"""
+
+    def __init__(self):
+        self.prev_close = None
+        self.value = NAN
+
+    def update(self, close, volume):
+        if self.prev_close is None:
+            self.value = volume
+        elif close > self.prev_close:
+            self.value += volume
+        elif close < self.prev_close:
+            self.value -= volume
+        self.prev_close = close
+        return self.value
+
+    def snapshot(self):
+        return self.prev_close, self.value
+
+    def restore(self, state):
+        self.prev_close, self.value = state
+
+
+class IndicatorEngine:
+    """Kumpulan indikator streaming yang diperbarui satu candle per panggilan
+
+    Candle yang masih berjalan bisa diganti: sebelum candle baru diterapkan setiap indikator
+    menyimpan snapshot state kecilnya (skalar dan elemen window yang akan tergeser), dan
+    penggantian candle memulihkan snapshot itu lalu menerapkan ulang candle.
+    """
+
+    def __init__(self):
+        self.indicators = {
+            'rsi': RSI(14),
+            'macd': MACD(12, 26, 9),
+            'bbands': BBands(20, 2, 2),
+            'sma_20': SMA(20),
+            'sma_50': SMA(50),
+            'sma_200': SMA(200),
+            'ema_20': EMA(20),
+            'stoch': Stochastic(14, 3, 3),
+            'atr': ATR(14),
+            'obv': OBV()
+        }
+        self.open_time = None
+        self.latest = None
+        self.prev = None
+        self._checkpoint = None
+
+    def update(self, open_time, high, low, close, volume):
+        """Tambahkan satu candle; open time yang sama mengganti candle yang masih berjalan"""
+        if self.open_time is not None:
+            if open_time < self.open_time:
+                return self.latest
+            if open_time == self.open_time:
+                # Kembalikan state sebelum candle berjalan lalu terapkan ulang
+                self._restore()
+            else:
+                self._snapshot()
+                self.prev = self.latest
+        else:
+            self._snapshot()
+
+        return self._apply(open_time, high, low, close, volume)
+
+    def _snapshot(self):
+        self._checkpoint = {name: indicator.snapshot() for name, indicator in self.indicators.items()}
+
+    def _restore(self):
+        for name, state in self._checkpoint.items():
+            self.indicators[name].restore(state)
+
+    def _apply(self, open_time, high, low, close, volume):
+        """Perbarui semua indikator tanpa checkpoint"""
+        ind = self.indicators
+        macd, macd_signal, macd_hist = ind['macd'].update(close)
+        bb_upper, bb_middle, bb_lower = ind['bbands'].update(close)
+        slowk, slowd = ind['stoch'].update(high, low, close)
+
+        self.latest = {
+            'timestamp': open_time,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+            'rsi': ind['rsi'].update(close),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'sma_20': ind['sma_20'].update(close),
+            'sma_50': ind['sma_50'].update(close),
+            'sma_200': ind['sma_200'].update(close),
+            'ema_20': ind['ema_20'].update(close),
+            'slowk': slowk,
+            'slowd': slowd,
+            'atr': ind['atr'].update(high, low, close),
+            'obv': ind['obv'].update(close, volume)
+        }
+        self.open_time = open_time
+        return self.latest
+
+    def seed(self, timestamps, high, low, close, volume):
+        """Isi state dari data historis (array kolom)"""
+        rows = list(zip(timestamps.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist()))
+        if not rows:
+            return self.latest
+
+        # Checkpoint hanya diperlukan untuk candle terakhir yang mungkin masih berjalan
+        for row in rows[:-1]:
+            self.prev = self.latest
+            self._apply(*row)
+        return self.update(*rows[-1])
+
+    def catch_up(self, timestamps, high, low, close, volume):
+        """Terapkan hanya candle yang belum pernah dilihat; False jika ada celah"""
+        if self.open_time is None or not len(timestamps) or self.open_time < timestamps[0]:
+            return False
+
+        start = int(timestamps.searchsorted(self.open_time))
+        for row in zip(timestamps[start:].tolist(), high[start:].tolist(), low[start:].tolist(),
+                       close[start:].tolist(), volume[start:].tolist()):
+            self.update(*row)
+        return True
@@ -0,0 +1,264 @@
+import argparse
+import configparser
+import itertools
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import backtest
+from kline_decoder import KlineColumns
+
+logger = logging.getLogger("BNB_Trading_Bot")
+
+# Kolom yang dibutuhkan backtest, dibagikan ke worker lewat shared memory
+SHARED_COLUMNS = (
+    ('timestamp', np.int64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64)
+)
+
+# Parameter yang menentukan nilai indikator (bukan hanya ambang sinyal)
+PERIOD_PARAMS = (
+    'rsi_period', 'macd_fast', 'macd_slow', 'macd_signal', 'bb_period', 'bb_dev',
+    'sma_fast', 'sma_slow', 'stoch_k', 'stoch_slowk', 'stoch_slowd'
+)
+
+DEFAULT_GRID = {
+    'rsi_oversold': [20, 25, 30, 35],
+    'rsi_overbought': [65, 70, 75, 80],
+    'macd_fast': [8, 12],
+    'macd_slow': [21, 26],
+    'sma_fast': [10, 20],
+    'sma_slow': [50, 100],
+    'signal_threshold': [40, 50, 60]
+}
+
+# State per proses worker
+_worker_data = None
+_worker_shm = None
+_worker_cache = OrderedDict()
+_worker_config = {}
+
+
+def share_columns(data):
+    """Salin kolom data ke satu blok shared memory"""
+    length = len(data)
+    size = sum(np.dtype(dtype).itemsize * length for _, dtype in SHARED_COLUMNS)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    offset = 0
+    for name, dtype in SHARED_COLUMNS:
+        view = np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=offset)
+        view[:] = getattr(data, name)
+        offset += view.nbytes
+
+    return shm, length
+
+
+def _attach_columns(shm, length):
+    """Bangun KlineColumns yang menunjuk langsung ke buffer shared memory"""
+    columns = {}
+    offset = 0
+    for name, dtype in SHARED_COLUMNS:
+        columns[name] = np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=offset)
+        offset += columns[name].nbytes
+    return KlineColumns(columns)
+
+
+def _init_worker(shm_name, length, strategy, fee, interval):
+    global _worker_data, _worker_shm, _worker_config
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_data = _attach_columns(_worker_shm, length)
+    _worker_config = {'strategy': strategy, 'fee': fee, 'interval': interval}
+
+
+def _indicators_for(params, max_cached=16):
+    """Indikator di-cache per kombinasi periode sehingga ambang berbeda tidak menghitung ulang"""
+    key = tuple(params[name] for name in PERIOD_PARAMS)
+    indicators = _worker_cache.get(key)
+    if indicators is None:
+        indicators = backtest.compute_indicators(_worker_data, params)
+        _worker_cache[key] = indicators
+        while len(_worker_cache) > max_cached:
+            _worker_cache.popitem(last=False)
+    else:
+        _worker_cache.move_to_end(key)
+    return indicators
+
+
+def _evaluate(params):
+    params = {**backtest.DEFAULT_PARAMS, **params}
+    result = backtest.run_backtest(
+        _worker_data,
+        strategy=_worker_config['strategy'],
+        params=params,
+        fee=_worker_config['fee'],
+        interval=_worker_config['interval'],
+        indicators=_indicators_for(params)
+    )
+    return result['stats']
+
+
+def param_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def expand_grid(grid):
+    """Semua kombinasi parameter, diurutkan agar kombinasi periode yang sama berdekatan"""
+    names = sorted(grid, key=lambda name: (name not in PERIOD_PARAMS, name))
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+    def valid(combo):
+        p = {**backtest.DEFAULT_PARAMS, **combo}
+        return p['macd_fast'] < p['macd_slow'] and p['sma_fast'] < p['sma_slow'] and p['rsi_oversold'] < p['rsi_overbought']
+
+    # Buang kombinasi yang tidak masuk akal
+    return [c for c in combos if valid(c)]
+
+
+def load_completed(results_file):
+    """Baca hasil yang sudah ada agar sweep bisa dilanjutkan"""
+    completed = {}
+    if not os.path.exists(results_file):
+        return completed
+
+    with open(results_file, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Baris terakhir bisa terpotong jika proses dihentikan saat menulis
+                continue
+            completed[param_key(entry['params'])] = entry
+    return completed
+
+
+def write_ranking(entries, ranking_file, metric):
+    """Tulis tabel hasil yang diurutkan berdasarkan metrik"""
+    ranked = sorted(entries, key=lambda e: e['stats'].get(metric, float('-inf')), reverse=True)
+    param_names = sorted({name for e in ranked for name in e['params']})
+    stat_names = ['total_return', 'cagr', 'max_drawdown', 'sharpe', 'trades', 'win_rate', 'average_trade', 'exposure']
+
+    with open(ranking_file, 'w') as f:
+        f.write(','.join(['rank'] + param_names + stat_names) + '\n')
+        for rank, e in enumerate(ranked, start=1):
+            row = [str(rank)] + [str(e['params'].get(n, '')) for n in param_names] + [str(e['stats'].get(n, '')) for n in stat_names]
+            f.write(','.join(row) + '\n')
+    return ranked
+
+
+def run_sweep(data, grid, output_dir, strategy='technical', fee=0.001, interval='1h',
+              workers=None, metric='sharpe'):
+    """Evaluasi semua kombinasi grid di process pool dan tulis hasilnya secara bertahap"""
+    os.makedirs(output_dir, exist_ok=True)
+    results_file = os.path.join(output_dir, 'sweep_results.jsonl')
+    ranking_file = os.path.join(output_dir, 'sweep_ranking.csv')
+
+    combos = expand_grid(grid)
+    completed = load_completed(results_file)
+    pending = [c for c in combos if param_key(c) not in completed]
+    logger.info(f"Sweep: {len(combos)} combinations, {len(completed)} already done, {len(pending)} pending")
+
+    # Tutup baris terakhir yang terpotong agar hasil baru tidak tergabung dengannya
+    if os.path.exists(results_file) and os.path.getsize(results_file) > 0:
+        with open(results_file, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    shm, length = share_columns(data)
+    started = time.time()
+    try:
+        with open(results_file, 'a') as out, ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm.name, length, strategy, fee, interval)
+        ) as pool:
+            futures = {pool.submit(_evaluate, params): params for params in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                params = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    logger.error(f"Sweep error for {params}: {e}")
+                    continue
+
+                entry = {'params': params, 'stats': stats}
+                completed[param_key(params)] = entry
+                # Satu baris per hasil, langsung di-flush supaya aman jika dihentikan
+                out.write(json.dumps(entry) + '\n')
+                out.flush()
+
+                if done % 100 == 0:
+                    logger.info(f"Sweep progress: {done}/{len(pending)} ({time.time() - started:.1f}s)")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = write_ranking(list(completed.values()), ranking_file, metric)
+    logger.info(f"Sweep finished in {time.time() - started:.1f}s, ranking written to {ranking_file}")
+    return ranked
+
+
+def parse_grid(values):
+    """Parse argumen --grid name=v1,v2,v3 menjadi dict"""
+    grid = {}
+    for item in values:
+        name, _, raw = item.partition('=')
+        if name not in backtest.DEFAULT_PARAMS:
+            raise ValueError(f"Unknown parameter: {name}")
+        grid[name] = [float(v) if '.' in v else int(v) for v in raw.split(',') if v]
+    return grid
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+
+    parser = argparse.ArgumentParser(description='Parameter sweep over backtest signal rules')
+    parser.add_argument('--symbol', default=config.get('TRADING', 'symbol', fallback='BNBUSDT'))
+    parser.add_argument('--interval', default='1h')
+    parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='End date (YYYY-MM-DD), default now')
+    parser.add_argument('--strategy', default='technical', choices=sorted(backtest.STRATEGIES))
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--grid', action='append', default=[], help='Parameter values, e.g. rsi_oversold=20,25,30')
+    parser.add_argument('--grid-file', help='JSON file mapping parameter names to value lists')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--metric', default='sharpe', help='Stat used to rank results')
+    parser.add_argument('--output', default=os.path.join('logs', 'sweep'), help='Output directory (reused to resume)')
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid_file:
+        with open(args.grid_file, 'r') as f:
+            grid.update(json.load(f))
+    grid.update(parse_grid(args.grid))
+    if not grid:
+        grid = DEFAULT_GRID
+
+    from request_scheduler import create_client
+    client = create_client(config.get('BINANCE', 'api_key', fallback=''), config.get('BINANCE', 'api_secret', fallback=''),
+                           config.get('BINANCE', 'base_url', fallback=None))
+
+    start_ms = int(datetime.strptime(args.start, '%Y-%m-%d').timestamp() * 1000)
+    end_ms = int(datetime.strptime(args.end, '%Y-%m-%d').timestamp() * 1000) if args.end else None
+    data = backtest.load_history(client, args.symbol, args.interval, start_ms, end_ms)
+
+    ranked = run_sweep(data, grid, args.output, args.strategy, args.fee, args.interval, args.workers, args.metric)
+    for rank, entry in enumerate(ranked[:10], start=1):
+        print(f"{rank:>3}. {args.metric}={entry['stats'].get(args.metric, 0):.4f} {entry['params']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import time
+import zlib
+from statistics import NormalDist
+
+import numpy as np
+
+from backtest import INTERVAL_MS
+from kline_decoder import KlineColumns
+
+# Harga awal realistis untuk simbol umum; simbol lain mendapat harga dari hash namanya
+BASE_PRICES = {'BTCUSDT': 60000.0, 'ETHUSDT': 3000.0, 'BNBUSDT': 300.0, 'BNBBTC': 0.005}
+
+HOUR_MS = 3600000
+BLOCK = 4096
+
+# Komponen pasar bersama (periode dalam jam, amplitudo log-harga): semua simbol ikut bergerak
+MARKET_WAVES = ((24 * 30, 0.12), (24 * 7, 0.05), (36, 0.02))
+
+
+class SyntheticMarket:
+    """Pasar sintetis deterministik untuk benchmark, stand-in exchange dan uji beban
+
+    Setiap nilai (candle, trade, harga) adalah fungsi dari seed, simbol dan waktu saja,
+    sehingga rentang mana pun bisa diminta dalam urutan apa pun dan hasilnya selalu sama.
+    Log-harga = gelombang pasar bersama * beta simbol + gelombang sendiri + noise per bar.
+    """
+
+    def __init__(self, seed=42, volatility=0.01, correlation=0.6, trade_rate=4.0, whale_ratio=0.01,
+                 origin_ms=1577836800000, clock=None):
+        self.seed = seed
+        # Volatilitas noise per jam; bar lain diskalakan dengan akar waktu
+        self.volatility = volatility
+        # Bagian varians noise yang sama untuk semua simbol
+        self.correlation = correlation
+        self.trade_spacing = max(1, int(1000 / trade_rate))
+        self.whale_ratio = whale_ratio
+        self._whale_z = NormalDist().inv_cdf(1 - whale_ratio / 2)
+        self.origin_ms = origin_ms
+        self.clock = clock or (lambda: int(time.time() * 1000))
+        self._profiles = {}
+
+    def now(self):
+        return int(self.clock())
+
+    def _profile(self, symbol):
+        profile = self._profiles.get(symbol)
+        if profile is None:
+            key = zlib.crc32(symbol.encode())
+            rng = np.random.default_rng([self.seed, key])
+            base = BASE_PRICES.get(symbol, float(1 + key % 500) / (1 if symbol.endswith('USDT') else 10000))
+            profile = self._profiles[symbol] = {
+                'key': key,
+                'base': base,
+                'beta': rng.uniform(0.5, 1.5),
+                'phases': rng.uniform(0, 2 * np.pi, len(MARKET_WAVES) + 2),
+                'waves': ((24 * rng.uniform(5, 20), rng.uniform(0.02, 0.08)), (rng.uniform(4, 12), rng.uniform(0.005, 0.02)))
+            }
+        return profile
+
+    def _trend(self, symbol, t_ms):
+        """Komponen halus log-harga pada waktu t (tanpa noise)"""
+        profile = self._profile(symbol)
+        hours = np.asarray(t_ms, dtype=np.float64) / HOUR_MS
+        phases = profile['phases']
+        market = sum(a * np.sin(2 * np.pi * hours / p + phases[0] * (i + 1)) for i, (p, a) in enumerate(MARKET_WAVES))
+        own = sum(a * np.sin(2 * np.pi * hours / p + phases[i + len(MARKET_WAVES)]) for i, (p, a) in enumerate(profile['waves']))
+        return profile['beta'] * market + own
+
+    def _noise(self, symbol, stream, index, columns):
+        """Noise normal standar per indeks, dibangkitkan per blok agar bisa diakses acak"""
+        index = np.asarray(index, dtype=np.int64)
+        out = np.empty((len(index), columns))
+        if not len(index):
+            return out
+        key = self._profile(symbol)['key']
+        blocks = index // BLOCK
+        # Indeks diproses per potongan yang berada di blok yang sama
+        cuts = np.concatenate(([0], np.flatnonzero(np.diff(blocks)) + 1, [len(index)]))
+        for start, end in zip(cuts[:-1], cuts[1:]):
+            block = int(blocks[start])
+            rng = np.random.default_rng([self.seed, key, stream, block & 0x7fffffff])
+            out[start:end] = rng.standard_normal((BLOCK, columns))[index[start:end] - block * BLOCK]
+        return out
+
+    def _closes(self, symbol, step, bars):
+        sigma = self.volatility * np.sqrt(step / HOUR_MS)
+        close_times = (bars + 1) * step - 1
+        own = self._noise(symbol, step, bars, 1)[:, 0]
+        market = self._noise('', step, bars, 1)[:, 0]
+        noise = np.sqrt(self.correlation) * market + np.sqrt(1 - self.correlation) * own
+        return self._profile(symbol)['base'] * np.exp(self._trend(symbol, close_times) + sigma * noise)
+
+    def kline_columns(self, symbol, interval='1h', limit=500, start_ms=None, end_ms=None):
+        """Candle dalam bentuk KlineColumns (tanpa string), semantik seperti GET /api/v3/klines"""
+        step = INTERVAL_MS[interval]
+        end_ms = self.now() if end_ms is None else end_ms
+        last = min(end_ms, self.now()) // step
+        if start_ms is not None:
+            first = max(start_ms, self.origin_ms) // step
+            first += (first * step < start_ms)
+            last = min(last, first + limit - 1)
+        else:
+            first = max(last - limit + 1, self.origin_ms // step)
+
+        bars = np.arange(first, last + 1, dtype=np.int64)
+        closes = self._closes(symbol, step, np.concatenate(([first - 1], bars)))
+        opens, closes = closes[:-1], closes[1:]
+
+        sigma = self.volatility * np.sqrt(step / HOUR_MS)
+        extra = self._noise(symbol, step + 1, bars, 4)
+        high = np.maximum(opens, closes) * np.exp(np.abs(extra[:, 0]) * sigma * 0.5)
+        low = np.minimum(opens, closes) * np.exp(-np.abs(extra[:, 1]) * sigma * 0.5)
+        volume = np.exp(extra[:, 2] * 0.5) * 1000 * step / HOUR_MS
+        quote_volume = volume * (opens + closes) / 2
+        taker_share = 1 / (1 + np.exp(-extra[:, 3]))
+
+        return KlineColumns({
+            'timestamp': bars * step,
+            'close_time': bars * step + step - 1,
+            'number_of_trades': np.maximum(1, (volume * 3).astype(np.int64)),
+            'open': opens,
+            'high': high,
+            'low': low,
+            'close': closes,
+            'volume': volume,
+            'quote_asset_volume': quote_volume,
+            'taker_buy_base_asset_volume': volume * taker_share,
+            'taker_buy_quote_asset_volume': quote_volume * taker_share
+        })
+
+    def klines(self, symbol, interval='1h', limit=500, start_ms=None, end_ms=None):
+        """Candle dalam format payload REST Binance (list berisi string)"""
+        c = self.kline_columns(symbol, interval, limit, start_ms, end_ms)
+        return [
+            [int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{cl:.8f}", f"{v:.8f}", int(ct), f"{q:.8f}", int(n),
+             f"{tb:.8f}", f"{tq:.8f}", "0"]
+            for t, o, h, l, cl, v, ct, q, n, tb, tq in zip(
+                c.timestamp, c.open, c.high, c.low, c.close, c.volume, c.close_time, c.quote_asset_volume,
+                c.number_of_trades, c.taker_buy_base_asset_volume, c.taker_buy_quote_asset_volume
+            )
+        ]
+
+    def price(self, symbol, at_ms=None):
+        at_ms = self.now() if at_ms is None else at_ms
+        noise = self._noise(symbol, 0, [at_ms // 1000], 1)[0, 0]
+        return float(self._profile(symbol)['base'] * np.exp(self._trend(symbol, at_ms) + self.volatility * 0.05 * noise))
+
+    def trade_ids(self, end_ms=None):
+        """Id trade terakhir sampai waktu tertentu (trade terjadi setiap trade_spacing ms)"""
+        end_ms = self.now() if end_ms is None else end_ms
+        return (end_ms - self.origin_ms) // self.trade_spacing
+
+    def trades(self, symbol, limit=500, end_ms=None, from_id=None):
+        """Trade dalam format GET /api/v3/trades; whale muncul dengan peluang whale_ratio"""
+        last = self.trade_ids(end_ms)
+        if from_id is not None:
+            ids = np.arange(from_id, min(from_id + limit - 1, last) + 1, dtype=np.int64)
+        else:
+            ids = np.arange(max(0, last - limit + 1), last + 1, dtype=np.int64)
+
+        times = self.origin_ms + ids * self.trade_spacing
+        noise = self._noise(symbol, 1, ids, 4)
+        prices = self._profile(symbol)['base'] * np.exp(self._trend(symbol, times) + self.volatility * 0.05 * noise[:, 0])
+        # Nilai trade biasa sekitar 500 USD; whale 100-1000 kali lebih besar
+        value = 500 * np.exp(noise[:, 1])
+        whale = np.abs(noise[:, 2]) > self._whale_z
+        value = np.where(whale, value * (100 + 900 * (np.abs(noise[:, 3]) % 1)), value)
+        qtys = value / prices
+        buyer_maker = noise[:, 2] > 0
+
+        return [
+            {
+                'id': int(i), 'price': f"{p:.8f}", 'qty': f"{q:.8f}", 'quoteQty': f"{p * q:.8f}",
+                'time': int(t), 'isBuyerMaker': bool(m), 'isBestMatch': True
+            }
+            for i, p, q, t, m in zip(ids, prices, qtys, times, buyer_maker)
+        ]
+
+    def ticker_24h(self, symbol, at_ms=None):
+        at_ms = self.now() if at_ms is None else at_ms
+        bars = self.kline_columns(symbol, '1h', 24, end_ms=at_ms)
+        last = self.price(symbol, at_ms)
+        open_price = float(bars.open[0])
+        volume = float(bars.volume.sum())
+        return {
+            'symbol': symbol,
+            'priceChange': f"{last - open_price:.8f}",
+            'priceChangePercent': f"{(last / open_price - 1) * 100:.3f}",
+            'lastPrice': f"{last:.8f}",
+            'openPrice': f"{open_price:.8f}",
+            'highPrice': f"{float(bars.high.max()):.8f}",
+            'lowPrice': f"{float(bars.low.min()):.8f}",
+            'volume': f"{volume:.8f}",
+            'quoteVolume': f"{float(bars.quote_asset_volume.sum()):.8f}",
+            'openTime': int(bars.timestamp[0]),
+            'closeTime': at_ms,
+            'count': int(bars.number_of_trades.sum())
+        }
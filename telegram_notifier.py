@@ -1,37 +1,185 @@
 import logging
+import queue
+import threading
+import time
 import requests
+from concurrent.futures import Future
 from datetime import datetime
+from metrics import Counter, Gauge, Histogram, get_or_create, register_function
 
 logger = logging.getLogger(__name__)
 
+# Durasi pengiriman satu batch pesan, termasuk retry
+TELEGRAM_SEND_SECONDS = get_or_create(Histogram, 'telegram_send_seconds', 'Duration of Telegram message delivery')
+
+# Batas panjang pesan Telegram
+MAX_MESSAGE_LENGTH = 4096
+
 class TelegramNotifier:
-    def __init__(self, bot_token, chat_id):
+    def __init__(self, bot_token, chat_id, parse_mode='HTML', max_queue=1000, timeout=10, max_retries=5):
         self.bot_token = bot_token
         self.chat_id = chat_id
+        self.parse_mode = parse_mode
+        self.timeout = timeout
+        self.max_retries = max_retries
         self.api_url = f"https://api.telegram.org/bot{bot_token}"
+        
+        # Session keep-alive yang dipakai ulang untuk semua request
+        self.session = requests.Session()
+        
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._held = None
+        self._worker = None
+        self._lock = threading.Lock()
     
-    def send_message(self, message):
-        """Mengirim pesan ke Telegram"""
+    def _ensure_worker(self):
+        """Mulai thread pengirim saat pesan pertama dikirim"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='telegram-sender', daemon=True)
+                self._worker.start()
+    
+    def send_message(self, message, chat_id=None, parse_mode=None):
+        """Masukkan pesan ke antrian pengiriman; mengembalikan Future hasil pengiriman"""
+        future = Future()
+        chat_id = chat_id or self.chat_id
+        
+        if not self.bot_token or not chat_id:
+            logger.warning("Telegram bot atau chat ID tidak dikonfigurasi")
+            future.set_result(False)
+            return future
+        
         try:
-            url = f"{self.api_url}/sendMessage"
-            data = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": "HTML"
-            }
-            
-            response = requests.post(url, data=data)
-            
-            if response.status_code == 200:
-                logger.info(f"Message sent to Telegram: {message}")
-                return True
-            else:
-                logger.error(f"Failed to send message to Telegram: {response.text}")
+            self.queue.put_nowait((chat_id, parse_mode or self.parse_mode, message, future))
+        except queue.Full:
+            self.dropped += 1
+            logger.error(f"Telegram queue full, message dropped: {message[:80]}")
+            future.set_result(False)
+            return future
+        
+        self._ensure_worker()
+        return future
+    
+    def flush(self, timeout=None):
+        """Tunggu sampai antrian kosong (mis. sebelum proses berhenti)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
                 return False
+            time.sleep(0.05)
+        return True
+    
+    def _next_batch(self):
+        """Ambil pesan berikutnya dan gabungkan pesan antri lain untuk chat yang sama"""
+        if self._held is not None:
+            first, self._held = self._held, None
+        else:
+            first = self.queue.get()
+        
+        chat_id, parse_mode, text, future = first
+        texts = [text]
+        futures = [future]
+        length = len(text)
+        
+        while self._held is None:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if item[0] == chat_id and item[1] == parse_mode and length + len(item[2]) + 2 <= MAX_MESSAGE_LENGTH:
+                texts.append(item[2])
+                futures.append(item[3])
+                length += len(item[2]) + 2
+            else:
+                # Pesan lain tetap dikirim berikutnya sesuai urutan
+                self._held = item
         
+        return chat_id, parse_mode, texts, futures
+    
+    def _run(self):
+        while True:
+            chat_id, parse_mode, texts, futures = self._next_batch()
+            with TELEGRAM_SEND_SECONDS.time():
+                results = self._send_batch(chat_id, parse_mode, texts)
+            
+            for future, ok in zip(futures, results):
+                future.set_result(ok)
+                self.queue.task_done()
+    
+    def _send_batch(self, chat_id, parse_mode, texts):
+        """Kirim pesan gabungan; hasil per pesan (True jika terkirim)"""
+        status = self._send_one(chat_id, parse_mode, "\n\n".join(texts))
+        if status != 200 and len(texts) > 1 and status is not None and 400 <= status < 500:
+            # Satu pesan bermasalah (mis. Markdown tidak valid) tidak boleh menggagalkan pesan lain
+            logger.warning(f"Telegram rejected a batch of {len(texts)} messages, sending them one by one")
+            results = [self._send_one(chat_id, parse_mode, text) == 200 for text in texts]
+        else:
+            results = [status == 200] * len(texts)
+        
+        sent = sum(results)
+        self.sent += sent
+        self.failed += len(results) - sent
+        return results
+    
+    def _send_one(self, chat_id, parse_mode, text):
+        """Kirim satu request; status HTTP terakhir, atau None jika tidak ada respons"""
+        try:
+            status = self._deliver(chat_id, parse_mode, text)
         except Exception as e:
             logger.error(f"Error sending message to Telegram: {e}")
-            return False
+            status = None
+        if status == 200:
+            logger.info(f"Message sent to Telegram: {text}")
+        return status
+    
+    def _deliver(self, chat_id, parse_mode, text):
+        """Kirim satu pesan, menghormati retry_after saat terkena rate limit (429)"""
+        url = f"{self.api_url}/sendMessage"
+        data = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode
+        }
+        
+        backoff = 1
+        error = "no response"
+        status = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, data=data, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            
+            error = response.text
+            status = response.status_code
+            if status == 200:
+                return status
+            
+            if response.status_code == 429:
+                try:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', backoff)
+                except ValueError:
+                    retry_after = backoff
+                logger.warning(f"Telegram rate limit, retrying after {retry_after}s")
+                time.sleep(retry_after)
+                continue
+            
+            if response.status_code >= 500:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            
+            break
+        
+        logger.error(f"Failed to send message to Telegram: {error}")
+        return status
     
     def send_signal(self, signal):
         """Mengirim sinyal trading ke Telegram"""
@@ -52,8 +200,23 @@ class TelegramNotifier:
             message += f"<b>Stop Loss:</b> ${signal['stopLoss']}\n"
             message += f"\n<i>Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</i>"
             
-            return self.send_message(message)
+            return self.send_message(message, parse_mode='HTML')
         
         except Exception as e:
             logger.error(f"Error sending signal to Telegram: {e}")
-            return False
+            future = Future()
+            future.set_result(False)
+            return future
+
+def register_notifier_metrics(get_notifier):
+    """Metrik antrian dan hasil pengiriman TelegramNotifier, dibaca saat scrape"""
+    def attribute(read):
+        def value():
+            notifier = get_notifier()
+            return read(notifier) if notifier is not None else None
+        return value
+    
+    register_function(Gauge, 'telegram_queue_depth', 'Telegram messages waiting to be sent', attribute(lambda n: n.queue.qsize()))
+    register_function(Counter, 'telegram_sent_total', 'Telegram messages delivered', attribute(lambda n: n.sent))
+    register_function(Counter, 'telegram_failed_total', 'Telegram messages that failed after retries', attribute(lambda n: n.failed))
+    register_function(Counter, 'telegram_dropped_total', 'Telegram messages dropped because the queue was full', attribute(lambda n: n.dropped))
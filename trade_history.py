@@ -0,0 +1,386 @@
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: direktori proses lain tidak bisa dikenali, hanya direktori sendiri yang dihapus
+    fcntl = None
+
+SIDES = ('NEUTRAL', 'BUY', 'SELL')
+SIDE_IDS = {side: i for i, side in enumerate(SIDES)}
+
+# Field panas per entri; detail (indikator, order id) disimpan di file dan dirujuk lewat segmen + offset
+SIGNAL_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('symbol', 'u2'),
+    ('side', 'u1'),
+    ('price', 'f8'),
+    ('confidence', 'f8'),
+    ('segment', 'i4'),
+    ('offset', 'i8')
+])
+
+TRADE_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('symbol', 'u2'),
+    ('side', 'u1'),
+    ('price', 'f8'),
+    ('quantity', 'f8'),
+    ('confidence', 'f8'),
+    ('segment', 'i4'),
+    ('offset', 'i8')
+])
+
+
+def _json_default(value):
+    # Hasil analisis berisi skalar dan array NumPy
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class DetailStore:
+    """Payload detail sebagai JSON lines di file segmen <dir>/<run>/<n>.jsonl, dibaca lewat (segmen, offset)
+
+    Setiap store menulis ke subdirektori sendiri (<pid>-<id>) yang dikunci dengan flock selama
+    proses hidup, sehingga beberapa bot dengan direktori yang sama tidak saling menghapus detail.
+    Subdirektori yang kuncinya lepas (prosesnya sudah berhenti) dibersihkan saat store dibuat.
+    Segmen yang tidak lagi dirujuk ring buffer dihapus, sehingga ukuran di disk juga terbatas.
+    """
+
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024):
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._remove_orphans(directory)
+
+        # Kunci diambil sebelum direktori diberi nama akhir, agar proses lain tidak menganggapnya yatim
+        self.directory = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(f"{self.directory}.tmp")
+        self._lock_fd = self._lock_directory(f"{self.directory}.tmp")
+        os.rename(f"{self.directory}.tmp", self.directory)
+
+        self.segment = 0
+        self.oldest = 0
+        self._file = open(self._path(0), 'ab')
+        atexit.register(self.close)
+
+    @staticmethod
+    def _lock_directory(path):
+        if fcntl is None:
+            return None
+        fd = os.open(os.path.join(path, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+
+    @staticmethod
+    def _remove_orphans(directory):
+        """Hapus subdirektori milik proses yang sudah berhenti (kuncinya bisa diambil)"""
+        if fcntl is None:
+            return
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith('.tmp') or not os.path.isdir(path):
+                continue
+            try:
+                fd = os.open(os.path.join(path, '.lock'), os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Masih dipakai proses lain
+                continue
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                os.close(fd)
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"{segment}.jsonl")
+
+    def write(self, payload):
+        line = json.dumps(payload, default=_json_default).encode('utf-8') + b'\n'
+        with self._lock:
+            offset = self._file.tell()
+            if offset and offset + len(line) > self.segment_bytes:
+                self._file.close()
+                self.segment += 1
+                self._file = open(self._path(self.segment), 'ab')
+                offset = 0
+            self._file.write(line)
+            return self.segment, offset
+
+    def read(self, segment, offset):
+        """Payload yang tersimpan, atau None jika segmennya sudah dihapus"""
+        with self._lock:
+            if segment < self.oldest:
+                return None
+            if segment == self.segment:
+                self._file.flush()
+        try:
+            with open(self._path(segment), 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+
+    def release_before(self, segment):
+        """Hapus segmen sebelum segment (entri yang merujuknya sudah keluar dari ring buffer)"""
+        with self._lock:
+            while self.oldest < min(segment, self.segment):
+                try:
+                    os.remove(self._path(self.oldest))
+                except OSError:
+                    pass
+                self.oldest += 1
+
+    def size(self):
+        total = 0
+        for segment in range(self.oldest, self.segment + 1):
+            try:
+                total += os.path.getsize(self._path(segment))
+            except OSError:
+                pass
+        return total
+
+    def close(self):
+        """Tutup dan hapus direktori store ini (detail hanya berlaku selama proses berjalan)"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+
+class RingBuffer:
+    """Array terstruktur NumPy berkapasitas tetap; entri tertua ditimpa setelah penuh"""
+
+    def __init__(self, dtype, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, row):
+        """Tulis satu entri; mengembalikan entri yang ditimpa (atau None)"""
+        slot = self.total % self.capacity
+        evicted = self.data[slot].copy() if self.total >= self.capacity else None
+        self.data[slot] = row
+        self.total += 1
+        return evicted
+
+    def _slot(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('history index out of range')
+        return (self.total - size + index) % self.capacity
+
+    def __getitem__(self, index):
+        return self.data[self._slot(index)]
+
+    def ordered(self):
+        """Salinan semua entri dari yang tertua"""
+        if self.total <= self.capacity:
+            return self.data[:self.total].copy()
+        start = self.total % self.capacity
+        return np.concatenate((self.data[start:], self.data[:start]))
+
+
+class SignalRecord:
+    __slots__ = ('timestamp', 'symbol', 'signal_type', 'price', 'confidence', '_details', '_ref')
+
+    def __init__(self, timestamp, symbol, signal_type, price, confidence, details, ref):
+        self.timestamp = timestamp
+        self.symbol = symbol
+        self.signal_type = signal_type
+        self.price = price
+        self.confidence = confidence
+        self._details = details
+        self._ref = ref
+
+    @classmethod
+    def from_row(cls, row, symbols, details):
+        return cls(
+            datetime.fromtimestamp(row['timestamp']).isoformat(), symbols[row['symbol']],
+            SIDES[row['side']], float(row['price']), float(row['confidence']),
+            details, (int(row['segment']), int(row['offset']))
+        )
+
+    @property
+    def indicators(self):
+        """Detail indikator, dibaca dari disk saat diakses"""
+        return self._details.read(*self._ref)
+
+    def to_dict(self, details=True):
+        data = {
+            'timestamp': self.timestamp,
+            'symbol': self.symbol,
+            'signal_type': self.signal_type,
+            'price': self.price,
+            'confidence': self.confidence
+        }
+        if details:
+            data['indicators'] = self.indicators
+        return data
+
+
+class TradeRecord:
+    __slots__ = ('timestamp', 'symbol', 'signal', 'price', 'quantity', 'confidence', '_details', '_ref')
+
+    def __init__(self, timestamp, symbol, signal, price, quantity, confidence, details, ref):
+        self.timestamp = timestamp
+        self.symbol = symbol
+        self.signal = signal
+        self.price = price
+        self.quantity = quantity
+        self.confidence = confidence
+        self._details = details
+        self._ref = ref
+
+    @classmethod
+    def from_row(cls, row, symbols, details):
+        return cls(
+            datetime.fromtimestamp(row['timestamp']).isoformat(), symbols[row['symbol']],
+            SIDES[row['side']], float(row['price']), float(row['quantity']), float(row['confidence']),
+            details, (int(row['segment']), int(row['offset']))
+        )
+
+    @property
+    def total_value(self):
+        return self.price * self.quantity
+
+    @property
+    def details(self):
+        """order_id dan status, dibaca dari disk saat diakses"""
+        return self._details.read(*self._ref) or {}
+
+    def to_dict(self, details=True):
+        data = {
+            'timestamp': self.timestamp,
+            'symbol': self.symbol,
+            'signal': self.signal,
+            'price': self.price,
+            'quantity': self.quantity,
+            'total_value': self.total_value,
+            'confidence': self.confidence
+        }
+        if details:
+            data.update(self.details)
+        return data
+
+
+class _History:
+    """Ring buffer field panas + DetailStore; record_type.from_row membuat objek per entri
+
+    on_append (opsional) menerima setiap baris baru di dalam lock, untuk agregat kumulatif.
+    """
+
+    def __init__(self, dtype, record_type, directory, capacity=10000, segment_bytes=16 * 1024 * 1024,
+                 on_append=None):
+        self.record_type = record_type
+        self.on_append = on_append
+        self.buffer = RingBuffer(dtype, capacity)
+        self.details = DetailStore(directory, segment_bytes)
+        self.symbols = []
+        self._symbol_ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    @property
+    def total(self):
+        """Jumlah entri sejak start, termasuk yang sudah keluar dari buffer"""
+        return self.buffer.total
+
+    def _symbol_id(self, symbol):
+        # Dipanggil di dalam self._lock
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def _append(self, stamp, symbol, values, payload):
+        with self._lock:
+            row = (stamp, self._symbol_id(symbol)) + values
+            # Tulis detail di dalam lock agar urutan segmen sama dengan urutan buffer
+            evicted = self.buffer.append(row + self.details.write(payload))
+            if self.on_append is not None:
+                self.on_append(row)
+            oldest_segment = int(self.buffer[0]['segment'])
+        if evicted is not None and int(evicted['segment']) < oldest_segment:
+            self.details.release_before(oldest_segment)
+
+    def _record(self, row):
+        return self.record_type.from_row(row, self.symbols, self.details)
+
+    def __getitem__(self, index):
+        with self._lock:
+            row = self.buffer[index].copy()
+        return self._record(row)
+
+    def __iter__(self):
+        for row in self.array():
+            yield self._record(row)
+
+    def recent(self, n):
+        """n entri terbaru, dari yang tertua"""
+        rows = self.array()
+        return [self._record(row) for row in rows[max(0, len(rows) - n):]]
+
+    def array(self):
+        """Field panas semua entri sebagai array terstruktur (salinan, dari yang tertua)"""
+        with self._lock:
+            return self.buffer.ordered()
+
+    def close(self):
+        self.details.close()
+
+
+class SignalHistory(_History):
+    """Riwayat sinyal berkapasitas tetap; indikator lengkap disimpan di disk"""
+
+    def __init__(self, directory, capacity=10000, segment_bytes=16 * 1024 * 1024):
+        super().__init__(SIGNAL_DTYPE, SignalRecord, directory, capacity, segment_bytes)
+
+    def append(self, symbol, signal_type, price, confidence, indicators, timestamp=None):
+        stamp = datetime.fromisoformat(timestamp).timestamp() if timestamp else time.time()
+        self._append(stamp, symbol, (SIDE_IDS.get(signal_type, 0), price, confidence), indicators)
+
+
+class TradeHistory(_History):
+    """Riwayat trade berkapasitas tetap dengan total kumulatif sejak start"""
+
+    def __init__(self, directory, capacity=10000, segment_bytes=16 * 1024 * 1024):
+        self.total_value = 0.0
+        super().__init__(TRADE_DTYPE, TradeRecord, directory, capacity, segment_bytes, on_append=self._add_total)
+
+    def append(self, symbol, signal, price, quantity, confidence, order_id, status, timestamp=None):
+        stamp = datetime.fromisoformat(timestamp).timestamp() if timestamp else time.time()
+        values = (SIDE_IDS.get(signal, 0), price, quantity, confidence)
+        self._append(stamp, symbol, values, {'order_id': order_id, 'status': status})
+
+    def _add_total(self, row):
+        # row: timestamp, symbol, side, price, quantity, confidence
+        self.total_value += row[3] * row[4]
@@ -0,0 +1,211 @@
+import threading
+import time
+
+import numpy as np
+
+# Kolom bucket: jumlah whale beli/jual dan nilai (USD) beli/jual
+BUY_COUNT, SELL_COUNT, BUY_VOLUME, SELL_VOLUME = range(4)
+
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_windows(text):
+    """Parse '1m,5m,1h' menjadi dict nama -> detik"""
+    windows = {}
+    for name in (w.strip() for w in text.split(',')):
+        if name:
+            windows[name] = int(name[:-1]) * WINDOW_UNITS[name[-1]]
+    return windows
+
+
+def parse_thresholds(text):
+    """Parse 'BTCUSDT:100000,ETHUSDT:50000' menjadi dict simbol -> ambang USD"""
+    thresholds = {}
+    for item in (t.strip() for t in text.split(',')):
+        if item:
+            symbol, _, value = item.partition(':')
+            thresholds[symbol.strip().upper()] = float(value)
+    return thresholds
+
+
+class _SymbolFlow:
+    """Ring buffer per detik (untuk window) dan per menit (untuk time series) satu simbol"""
+
+    def __init__(self, windows, series_minutes):
+        self.windows = windows
+        self.size = max(windows)
+        self.buckets = np.zeros((self.size, 4))
+        # Jumlah berjalan per window, diperbarui saat trade masuk dan saat detik lama keluar
+        self.sums = np.zeros((len(windows), 4))
+        self.second = None
+
+        self.minutes = np.zeros((series_minutes, 4))
+        self.minute_index = np.full(series_minutes, -1, dtype=np.int64)
+        self.last_minute = None
+
+        self.last_id = {}
+        self.last_time = 0
+        self.last_source = None
+
+    def advance(self, second):
+        """Geser window ke detik tertentu, keluarkan detik yang sudah lewat"""
+        if self.second is None:
+            self.second = second
+            return
+        current = self.second
+        if second <= current:
+            return
+
+        if second - current >= self.size:
+            self.buckets[:] = 0
+            self.sums[:] = 0
+        else:
+            for i, window in enumerate(self.windows):
+                # Detik (current - window, second - window] keluar dari window ini
+                end = min(current, second - window)
+                if end > current - window:
+                    leaving = np.arange(current - window + 1, end + 1) % self.size
+                    self.sums[i] -= self.buckets[leaving].sum(axis=0)
+            self.buckets[np.arange(current + 1, second + 1) % self.size] = 0
+        self.second = second
+
+    def add(self, second, is_buy, volume):
+        self.advance(second)
+        age = self.second - second
+        if age < self.size:
+            count_col, volume_col = (BUY_COUNT, BUY_VOLUME) if is_buy else (SELL_COUNT, SELL_VOLUME)
+            row = self.buckets[second % self.size]
+            row[count_col] += 1
+            row[volume_col] += volume
+            for i, window in enumerate(self.windows):
+                if age < window:
+                    self.sums[i, count_col] += 1
+                    self.sums[i, volume_col] += volume
+
+        minute = second // 60
+        slot = minute % len(self.minute_index)
+        if self.minute_index[slot] != minute:
+            if self.minute_index[slot] > minute:
+                return
+            self.minute_index[slot] = minute
+            self.minutes[slot] = 0
+        count_col, volume_col = (BUY_COUNT, BUY_VOLUME) if is_buy else (SELL_COUNT, SELL_VOLUME)
+        self.minutes[slot, count_col] += 1
+        self.minutes[slot, volume_col] += volume
+        self.last_minute = max(self.last_minute or minute, minute)
+
+
+class WhaleFlow:
+    """Agregator arus transaksi whale per simbol pada beberapa window waktu"""
+
+    def __init__(self, windows=None, thresholds=None, default_threshold=10000, series_minutes=1440):
+        self.windows = windows or {'1m': 60, '5m': 300, '1h': 3600}
+        self.thresholds = thresholds or {}
+        self.default_threshold = default_threshold
+        self.series_minutes = series_minutes
+        self._flows = {}
+        self._lock = threading.Lock()
+
+    def threshold(self, symbol):
+        return self.thresholds.get(symbol, self.default_threshold)
+
+    def _flow(self, symbol):
+        flow = self._flows.get(symbol)
+        if flow is None:
+            flow = self._flows[symbol] = _SymbolFlow(tuple(self.windows.values()), self.series_minutes)
+        return flow
+
+    def add_trades(self, symbol, trades, source='rest'):
+        """Masukkan trade (format REST/aggTrade), abaikan yang sudah pernah dimasukkan
+
+        Id trade dicatat per sumber karena id REST dan aggTrade berbeda; saat sumber
+        berganti, hanya trade yang lebih baru dari trade terakhir yang diterima.
+        """
+        if not trades:
+            return 0
+
+        # Parse sekali per trade
+        ids = np.fromiter((t['id'] for t in trades), dtype=np.int64, count=len(trades))
+        times = np.fromiter((t['time'] for t in trades), dtype=np.int64, count=len(trades))
+        prices = np.fromiter((float(t['price']) for t in trades), dtype=np.float64, count=len(trades))
+        qtys = np.fromiter((float(t['qty']) for t in trades), dtype=np.float64, count=len(trades))
+        is_buy = np.fromiter((not t['isBuyerMaker'] for t in trades), dtype=bool, count=len(trades))
+        volumes = prices * qtys
+
+        with self._lock:
+            flow = self._flow(symbol)
+            fresh = ids > flow.last_id.get(source, -1)
+            if flow.last_source is not None and flow.last_source != source:
+                fresh &= times > flow.last_time
+            if not fresh.any():
+                return 0
+
+            whales = np.flatnonzero(fresh & (volumes >= self.threshold(symbol)))
+            for i in whales[np.argsort(times[whales], kind='stable')]:
+                flow.add(int(times[i] // 1000), bool(is_buy[i]), float(volumes[i]))
+
+            flow.advance(int(times[fresh].max() // 1000))
+            flow.last_id[source] = int(ids[fresh].max())
+            flow.last_time = max(flow.last_time, int(times[fresh].max()))
+            flow.last_source = source
+            return len(whales)
+
+    def add_trade(self, symbol, trade, source='stream'):
+        """Masukkan satu trade (mis. dari stream aggTrade) tanpa overhead array"""
+        trade_id = trade['id']
+        trade_time = trade['time']
+        volume = float(trade['price']) * float(trade['qty'])
+
+        with self._lock:
+            flow = self._flow(symbol)
+            if trade_id <= flow.last_id.get(source, -1):
+                return 0
+            if flow.last_source is not None and flow.last_source != source and trade_time <= flow.last_time:
+                return 0
+
+            is_whale = volume >= self.threshold(symbol)
+            if is_whale:
+                flow.add(trade_time // 1000, not trade['isBuyerMaker'], volume)
+            else:
+                flow.advance(trade_time // 1000)
+
+            flow.last_id[source] = trade_id
+            flow.last_time = max(flow.last_time, trade_time)
+            flow.last_source = source
+            return int(is_whale)
+
+    def window_stats(self, symbol, now=None):
+        """Statistik whale untuk semua window; now dalam ms (default: trade terakhir)"""
+        with self._lock:
+            flow = self._flow(symbol)
+            if now is not None:
+                flow.advance(int(now // 1000))
+            sums = np.maximum(flow.sums, 0)
+            return {
+                name: {
+                    'buy_whales': int(round(sums[i, BUY_COUNT])),
+                    'sell_whales': int(round(sums[i, SELL_COUNT])),
+                    'buy_volume': float(sums[i, BUY_VOLUME]),
+                    'sell_volume': float(sums[i, SELL_VOLUME])
+                }
+                for i, name in enumerate(self.windows)
+            }
+
+    def series(self, symbol, minutes=60):
+        """Time series whale per menit (menit tanpa whale bernilai 0), untuk grafik dan backtest"""
+        with self._lock:
+            flow = self._flow(symbol)
+            minutes = min(minutes, self.series_minutes)
+            last = flow.last_minute if flow.last_minute is not None else int(time.time() // 60)
+            index = np.arange(last - minutes + 1, last + 1)
+            slots = index % self.series_minutes
+            present = flow.minute_index[slots] == index
+            values = np.where(present[:, None], flow.minutes[slots], 0)
+
+        return {
+            'timestamp': index * 60000,
+            'buy_whales': values[:, BUY_COUNT].astype(np.int64),
+            'sell_whales': values[:, SELL_COUNT].astype(np.int64),
+            'buy_volume': values[:, BUY_VOLUME],
+            'sell_volume': values[:, SELL_VOLUME]
+        }